@@ -0,0 +1,113 @@
+"""
+Redis 큐 직렬화 코덱 마이크로벤치마크
+- 코덱(json/msgpack) × 프레임 크기별 bytes/tx, encode/decode µs/tx
+- --redis-url 지정 시 큐에 실제로 넣어 Redis 메모리 증가량(bytes/tx)도 측정
+
+사용법:
+    python benchmarks/codec_bench.py
+    python benchmarks/codec_bench.py --count 50000 --redis-url redis://localhost:6379
+"""
+
+import os
+import sys
+import time
+import uuid
+import random
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'part-a-pipeline', 'common'))
+
+import codec
+
+def make_transactions(count: int, seed: int = 42) -> list:
+    """generator와 같은 필드/값 도메인의 트랜잭션"""
+    rng = random.Random(seed)
+    transactions = []
+    now = time.time()
+    for i in range(count):
+        hour = rng.randint(0, 23)
+        day_of_week = rng.randint(0, 6)
+        transactions.append({
+            'tx_id': str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+            'user_id': f"user_{rng.randint(0, 99999):05d}",
+            'user_tier': rng.choices(codec.TIERS, weights=[85, 13, 2])[0],
+            'card_number': f"4532-****-****-{rng.randint(1000, 9999)}",
+            'amount': rng.randint(1, 300) * 1000,
+            'merchant': rng.choice(codec.MERCHANT_NAMES),
+            'merchant_category': rng.choice(codec.CATEGORIES),
+            'region': rng.choice(codec.REGIONS),
+            'hour': hour,
+            'day_of_week': day_of_week,
+            'is_weekend': day_of_week >= 5,
+            'time_slot': rng.choice(codec.TIME_SLOTS),
+            'created_at': now + i * 0.001
+        })
+    return transactions
+
+def payload_size(payload) -> int:
+    return len(payload.encode('utf-8')) if isinstance(payload, str) else len(payload)
+
+def measure_redis_memory(redis_url: str, payloads: list) -> int:
+    """리스트 키에 payload를 넣기 전후 used_memory 차이"""
+    import redis
+    client = redis.Redis.from_url(redis_url)
+    key = f"codec_bench:{uuid.uuid4()}"
+    try:
+        before = client.info('memory')['used_memory']
+        pipe = client.pipeline()
+        for i in range(0, len(payloads), 1000):
+            pipe.lpush(key, *payloads[i:i + 1000])
+        pipe.execute()
+        after = client.info('memory')['used_memory']
+    finally:
+        client.delete(key)
+    return after - before
+
+def run(count: int, frame_sizes: list, redis_url: str = None) -> list:
+    transactions = make_transactions(count)
+    results = []
+    for name in codec.CODECS:
+        tx_codec = codec.get_codec(name)
+        for frame_size in frame_sizes:
+            start = time.perf_counter()
+            payloads = codec.encode_batch(tx_codec, transactions, frame_size)
+            encode_us = (time.perf_counter() - start) / count * 1e6
+            
+            wire = [p.encode('utf-8') if isinstance(p, str) else p for p in payloads]
+            start = time.perf_counter()
+            decoded = codec.decode_payloads(wire)
+            decode_us = (time.perf_counter() - start) / count * 1e6
+            assert decoded == transactions, f"{name} round-trip mismatch"
+            
+            result = {
+                'codec': name,
+                'frame_size': frame_size,
+                'bytes_per_tx': sum(payload_size(p) for p in payloads) / count,
+                'encode_us': encode_us,
+                'decode_us': decode_us,
+            }
+            if redis_url:
+                result['redis_bytes_per_tx'] = measure_redis_memory(redis_url, wire) / count
+            results.append(result)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Codec microbenchmark")
+    parser.add_argument('--count', type=int, default=20000)
+    parser.add_argument('--frame-sizes', default='1,100')
+    parser.add_argument('--redis-url', default=None)
+    args = parser.parse_args()
+    
+    frame_sizes = [int(x) for x in args.frame_sizes.split(',')]
+    results = run(args.count, frame_sizes, args.redis_url)
+    
+    baseline = next(r for r in results if r['codec'] == 'json' and r['frame_size'] == 1)
+    print(f"{'codec':8} {'frame':>5} {'bytes/tx':>9} {'encode µs':>10} {'decode µs':>10} {'redis B/tx':>11} {'size vs json':>12}")
+    for r in results:
+        redis_bytes = f"{r['redis_bytes_per_tx']:.1f}" if 'redis_bytes_per_tx' in r else '-'
+        ratio = r['bytes_per_tx'] / baseline['bytes_per_tx']
+        print(f"{r['codec']:8} {r['frame_size']:>5} {r['bytes_per_tx']:>9.1f} "
+              f"{r['encode_us']:>10.2f} {r['decode_us']:>10.2f} {redis_bytes:>11} {ratio:>11.1%}")
+
+if __name__ == "__main__":
+    main()
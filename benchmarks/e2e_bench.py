@@ -0,0 +1,359 @@
+"""
+End-to-end 파이프라인 벤치마크 (generator → Redis → consumer → sink)
+- 시나리오마다 generator / consumer를 서브프로세스로 고정 시간 실행
+- 각 프로세스의 구간 메트릭(phase{p}_{role}_metrics.csv, *_latency.jsonl)에서 warmup 이후 구간만 합산
+  → 역할별 처리량(TPS), 에러 수, 지연시간 p50/p95/p99/p99.9
+- Redis: --redis-url 미지정 시 fakeredis TCP 서버(이 프로세스 내 스레드)로 대체
+  (실제 Redis보다 느리므로 절대값이 아니라 같은 환경의 baseline과 비교하는 용도)
+- PostgreSQL: --postgres 미지정 시 consumer는 SINK_MODE=null (DB 쓰기 없음),
+  DB에 직접 쓰는 Phase 1/2 시나리오는 건너뜀 (POSTGRES_* 환경변수는 그대로 전달)
+- 결과: benchmarks/results/e2e_<시각>.json (+ 실행별 프로세스 로그/메트릭은 results/runs/ 아래)
+  --baseline 지정 시 시나리오별 비교, 허용 범위(--tolerance)를 넘게 나빠지면 exit 1
+
+사용법:
+    python benchmarks/e2e_bench.py
+    python benchmarks/e2e_bench.py --scenarios phase3_list_json,phase3_stream --duration 30
+    python benchmarks/e2e_bench.py --redis-url redis://localhost:6379 --postgres
+    python benchmarks/e2e_bench.py --save-baseline benchmarks/e2e_baseline.json
+    python benchmarks/e2e_bench.py --baseline benchmarks/e2e_baseline.json --tolerance 0.15
+"""
+
+import os
+import sys
+import csv
+import json
+import time
+import signal
+import socket
+import argparse
+import platform
+import threading
+import subprocess
+from datetime import datetime
+from urllib.parse import urlparse
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+GENERATOR_DIR = os.path.join(ROOT, 'part-a-pipeline', 'generator')
+CONSUMER_DIR = os.path.join(ROOT, 'part-a-pipeline', 'consumer')
+COMMON_DIR = os.path.join(ROOT, 'part-a-pipeline', 'common')
+
+sys.path.insert(0, COMMON_DIR)
+
+from histogram import LatencyHistogram
+
+# env: generator/consumer 공통, generator/consumer: 각 프로세스에만 적용
+SCENARIOS = [
+    {'name': 'phase1_sync', 'phase': 1, 'requires_postgres': True,
+     'generator': {'TPS': '100'}},
+    {'name': 'phase2_async', 'phase': 2, 'requires_postgres': True,
+     'generator': {'TPS': '1000'}},
+    {'name': 'phase22_concurrent', 'phase': 22, 'requires_postgres': True,
+     'generator': {'TPS': '5000'}},
+    {'name': 'phase23_batch', 'phase': 23, 'requires_postgres': True,
+     'generator': {'TPS': '20000'}},
+    {'name': 'phase24_max', 'phase': 24, 'requires_postgres': True,
+     'generator': {'TPS': '20000'}},
+    {'name': 'phase3_list_json', 'phase': 3, 'consumer': {},
+     'generator': {'TPS': '5000'}},
+    {'name': 'phase3_msgpack_frame100', 'phase': 3, 'consumer': {},
+     'env': {'CODEC': 'msgpack', 'FRAME_SIZE': '100'},
+     'generator': {'TPS': '5000'}},
+    {'name': 'phase3_stream', 'phase': 3, 'consumer': {},
+     'env': {'TRANSPORT': 'stream'},
+     'generator': {'TPS': '5000'}},
+    {'name': 'phase3_pipeline', 'phase': 3, 'consumer': {'PIPELINE_WRITERS': '4'},
+     'generator': {'TPS': '5000'}},
+    {'name': 'phase3_open_loop', 'phase': 3, 'consumer': {},
+     'generator': {'TPS': '5000', 'LOAD_MODE': 'open'}},
+]
+
+PERCENTILES = [50, 95, 99, 99.9]
+STOP_TIMEOUT = 15  # SIGINT 후 종료 대기 (초), 넘으면 kill
+
+def start_fake_redis():
+    """fakeredis TCP 서버를 빈 포트에 띄움 → (host, port)"""
+    from fakeredis import TcpFakeServer
+    server = TcpFakeServer(('127.0.0.1', 0), server_type='redis')
+    thread = threading.Thread(target=server.serve_forever, name='fake-redis', daemon=True)
+    thread.start()
+    host, port = server.server_address[:2]
+    return server, host, port
+
+def wait_for_port(host: str, port: int, timeout: float = 5):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with socket.create_connection((host, port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"Redis not reachable at {host}:{port}")
+
+def read_windows(output_dir: str, phase: int, role: str) -> list:
+    """flush 구간별 (timestamp, success, errors, histogram snapshot)"""
+    csv_path = os.path.join(output_dir, f"phase{phase}_{role}_metrics.csv")
+    histogram_path = os.path.join(output_dir, f"phase{phase}_{role}_latency.jsonl")
+    if not os.path.exists(csv_path) or not os.path.exists(histogram_path):
+        return []
+    
+    with open(histogram_path) as f:
+        histograms = {row['timestamp']: row['histogram'] for row in map(json.loads, f) if row}
+    windows = []
+    with open(csv_path, newline='') as f:
+        for row in csv.DictReader(f):
+            windows.append({
+                'timestamp': datetime.fromisoformat(row['timestamp']).timestamp(),
+                'success': int(row['success_count']),
+                'errors': int(row['error_count']),
+                'histogram': histograms.get(row['timestamp']),
+            })
+    return windows
+
+def summarize(windows: list, started_at: float, warmup: float) -> dict:
+    """
+    warmup 이후 구간 합산
+    - 구간 길이는 이전 flush 시각부터 계산하므로 첫 flush 구간(시작 시점 불명확)은 항상 제외
+    """
+    selected = [(prev, cur) for prev, cur in zip(windows, windows[1:])
+                if prev['timestamp'] >= started_at + warmup]
+    if not selected:
+        return None
+    
+    histogram = LatencyHistogram()
+    success = errors = 0
+    for _, window in selected:
+        success += window['success']
+        errors += window['errors']
+        if window['histogram']:
+            histogram.merge(window['histogram'])
+    elapsed = selected[-1][1]['timestamp'] - selected[0][0]['timestamp']
+    
+    summary = {
+        'windows': len(selected),
+        'seconds': round(elapsed, 2),
+        'success': success,
+        'errors': errors,
+        'tps': round(success / elapsed, 1) if elapsed > 0 else 0,
+        'latency_mean_ms': round(histogram.mean() * 1000, 3),
+    }
+    for q, value in zip(PERCENTILES, histogram.percentiles(PERCENTILES)):
+        summary[f"latency_p{q:g}_ms".replace('.', '')] = round(value * 1000, 3)
+    return summary
+
+def start_process(name: str, cwd: str, env: dict, log_dir: str):
+    log = open(os.path.join(log_dir, f"{name}.log"), 'w')
+    process = subprocess.Popen(
+        [sys.executable, 'main.py'], cwd=cwd, env=env,
+        stdout=log, stderr=subprocess.STDOUT
+    )
+    return process, log
+
+def stop_process(process, log):
+    if process.poll() is None:
+        process.send_signal(signal.SIGINT)
+        try:
+            process.wait(timeout=STOP_TIMEOUT)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+    log.close()
+    return process.returncode
+
+def run_scenario(scenario: dict, args, redis_host: str, redis_port: int, run_id: str) -> dict:
+    name = scenario['name']
+    output_dir = os.path.join(args.output_dir, 'runs', run_id, name)
+    os.makedirs(output_dir, exist_ok=True)
+    
+    base_env = {
+        **os.environ,
+        **scenario.get('env', {}),
+        'PYTHONUNBUFFERED': '1',
+        'REDIS_HOST': redis_host,
+        'REDIS_PORT': str(redis_port),
+        # 실행마다 새 큐 → 이전 실행의 잔여 메시지/consumer group 영향 없음
+        'QUEUE_NAME': f"bench:{run_id}:{name}",
+        'METRICS_OUTPUT_PATH': output_dir,
+        'METRICS_INTERVAL': str(args.interval),
+        'METRICS_PORT': '0',
+        'ALERT_STREAM': '',
+        'STATE_SNAPSHOT_PATH': '',
+        'STATE_BOOTSTRAP': '0',
+    }
+    consumer_env = {**base_env, **scenario.get('consumer', {})}
+    if not args.postgres:
+        consumer_env['SINK_MODE'] = 'null'
+    generator_env = {**base_env, **scenario.get('generator', {}), 'PHASE': str(scenario['phase'])}
+    
+    processes = []
+    started_at = time.time()
+    try:
+        # consumer 먼저 (stream consumer group 생성, 초기 적체 방지)
+        if 'consumer' in scenario:
+            processes.append(('consumer', *start_process('consumer', CONSUMER_DIR, consumer_env, output_dir)))
+            time.sleep(1)
+        processes.append(('generator', *start_process('generator', GENERATOR_DIR, generator_env, output_dir)))
+        
+        deadline = started_at + args.duration
+        while time.time() < deadline:
+            if any(process.poll() is not None for _, process, _ in processes):
+                break
+            time.sleep(0.2)
+    finally:
+        # generator부터 멈춰야 consumer 마지막 구간이 생성 중단 영향을 덜 받음
+        exit_codes = {role: stop_process(process, log) for role, process, log in reversed(processes)}
+    
+    result = {
+        'name': name,
+        'phase': scenario['phase'],
+        'config': {
+            'env': scenario.get('env', {}),
+            'generator': scenario.get('generator', {}),
+            'consumer': scenario.get('consumer', {}) if 'consumer' in scenario else None,
+            'sink': consumer_env.get('SINK_MODE', 'insert') if 'consumer' in scenario else None,
+        },
+        'duration': round(time.time() - started_at, 1),
+        'exit_codes': exit_codes,
+        'output_dir': output_dir,
+    }
+    for role, _, _ in processes:
+        phase = 3 if role == 'consumer' else scenario['phase']
+        result[role] = summarize(read_windows(output_dir, phase, role), started_at, args.warmup)
+    return result
+
+def compare(results: dict, baseline: dict, tolerance: float, latency_floor_ms: float) -> list:
+    """
+    baseline 대비 회귀 목록
+    - 처리량: (1 - tolerance)배 미만
+    - p99 지연: (1 + tolerance)배 초과 + latency_floor_ms 이상 증가 (sub-ms 구간의 노이즈 무시)
+    """
+    baseline_runs = {run['name']: run for run in baseline.get('runs', [])}
+    regressions = []
+    print(f"\n{'scenario':26} {'role':9} {'TPS':>10} {'base':>10} {'Δ':>7} {'p99 ms':>9} {'base':>9} {'Δ':>7}")
+    for run in results['runs']:
+        base_run = baseline_runs.get(run['name'])
+        if base_run is None:
+            continue
+        for role in ('generator', 'consumer'):
+            current, base = run.get(role), base_run.get(role)
+            if not current or not base:
+                continue
+            tps_change = current['tps'] / base['tps'] - 1 if base['tps'] else 0
+            p99, base_p99 = current['latency_p99_ms'], base['latency_p99_ms']
+            p99_change = p99 / base_p99 - 1 if base_p99 else 0
+            
+            flags = []
+            if tps_change < -tolerance:
+                flags.append(f"TPS {tps_change:+.1%}")
+            if p99_change > tolerance and p99 - base_p99 >= latency_floor_ms:
+                flags.append(f"p99 {p99_change:+.1%}")
+            if flags:
+                regressions.append(f"{run['name']} {role}: {', '.join(flags)}")
+            
+            print(f"{run['name']:26} {role:9} {current['tps']:>10,.0f} {base['tps']:>10,.0f} {tps_change:>+7.1%} "
+                  f"{p99:>9.2f} {base_p99:>9.2f} {p99_change:>+7.1%}{'  REGRESSION' if flags else ''}")
+    return regressions
+
+def select_scenarios(names: str, postgres: bool) -> list:
+    if names:
+        wanted = names.split(',')
+        unknown = set(wanted) - {scenario['name'] for scenario in SCENARIOS}
+        if unknown:
+            raise SystemExit(f"Unknown scenarios: {', '.join(sorted(unknown))} "
+                             f"(available: {', '.join(s['name'] for s in SCENARIOS)})")
+        scenarios = [scenario for scenario in SCENARIOS if scenario['name'] in wanted]
+    else:
+        scenarios = SCENARIOS
+    
+    selected = []
+    for scenario in scenarios:
+        if scenario.get('requires_postgres') and not postgres:
+            print(f"[Bench] Skipping {scenario['name']} (requires --postgres)")
+            continue
+        selected.append(scenario)
+    return selected
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end pipeline benchmark")
+    parser.add_argument('--scenarios', default='', help="comma-separated (default: all runnable)")
+    parser.add_argument('--duration', type=float, default=20, help="seconds per scenario")
+    parser.add_argument('--warmup', type=float, default=5, help="seconds excluded from each run")
+    parser.add_argument('--interval', type=int, default=1, help="METRICS_INTERVAL for both processes")
+    parser.add_argument('--redis-url', default=None, help="default: in-process fakeredis server")
+    parser.add_argument('--postgres', action='store_true', help="use POSTGRES_* and the real sink")
+    parser.add_argument('--output-dir', default=os.path.join(ROOT, 'benchmarks', 'results'))
+    parser.add_argument('--baseline', default=None, help="results file to compare against")
+    parser.add_argument('--save-baseline', default=None, help="also write results to this path")
+    parser.add_argument('--tolerance', type=float, default=0.10)
+    parser.add_argument('--latency-floor-ms', type=float, default=1.0)
+    args = parser.parse_args()
+    
+    scenarios = select_scenarios(args.scenarios, args.postgres)
+    if not scenarios:
+        raise SystemExit("No scenarios to run")
+    
+    server = None
+    if args.redis_url:
+        url = urlparse(args.redis_url)
+        redis_host, redis_port = url.hostname or 'localhost', url.port or 6379
+    else:
+        server, redis_host, redis_port = start_fake_redis()
+    wait_for_port(redis_host, redis_port)
+    print(f"[Bench] Redis: {redis_host}:{redis_port} ({'fakeredis' if server else 'external'}), "
+          f"sink: {'postgres' if args.postgres else 'null'}")
+    
+    run_id = datetime.now().strftime('%Y%m%d_%H%M%S')
+    results = {
+        'run_id': run_id,
+        'git_commit': git_commit(),
+        'host': {'python': platform.python_version(), 'platform': platform.platform(), 'cpus': os.cpu_count()},
+        'redis': 'fakeredis' if server else 'external',
+        'postgres': args.postgres,
+        'duration': args.duration,
+        'warmup': args.warmup,
+        'runs': [],
+    }
+    try:
+        for scenario in scenarios:
+            print(f"[Bench] {scenario['name']}: {args.duration:.0f}s (warmup {args.warmup:.0f}s)", flush=True)
+            run = run_scenario(scenario, args, redis_host, redis_port, run_id)
+            results['runs'].append(run)
+            for role in ('generator', 'consumer'):
+                summary = run.get(role)
+                if summary:
+                    print(f"  {role:9} TPS {summary['tps']:>10,.1f}  errors {summary['errors']:>6}  "
+                          f"p50 {summary['latency_p50_ms']:.2f}ms  p99 {summary['latency_p99_ms']:.2f}ms  "
+                          f"p99.9 {summary['latency_p999_ms']:.2f}ms")
+                elif role in run:
+                    print(f"  {role:9} no metrics after warmup (see {run['output_dir']})")
+    finally:
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+    
+    os.makedirs(args.output_dir, exist_ok=True)
+    output_path = os.path.join(args.output_dir, f"e2e_{run_id}.json")
+    for path in filter(None, [output_path, args.save_baseline]):
+        with open(path, 'w') as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        print(f"[Bench] Results → {path}")
+    
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance, args.latency_floor_ms)
+        if regressions:
+            print(f"\n[Bench] {len(regressions)} regression(s) vs {args.baseline} (tolerance {args.tolerance:.0%}):")
+            for regression in regressions:
+                print(f"  - {regression}")
+            sys.exit(1)
+        print(f"\n[Bench] No regressions vs {args.baseline}")
+
+if __name__ == "__main__":
+    main()
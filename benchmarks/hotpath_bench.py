@@ -0,0 +1,335 @@
+"""
+파이프라인 CPU hot path 마이크로벤치마크
+- generator: generate_amount, generate_transaction, generate_transactions (배치 크기별)
+- codec: 트랜잭션 1건 json.dumps / json.loads
+- consumer: FDSRuleEngine.check / check_batch (사용자 수 × 분포 × 유입 속도), MetricsCollector.record_success / flush
+- 입력 데이터는 sample_data_generator.generate_transaction 결과(카테고리/금액/시간 분포)를 고정 시드로 재사용,
+  사용자만 --users 규모로 다시 배정 (uniform 또는 Zipf 분포)
+- rate는 created_at 간격 (초당 건수) → 높을수록 사용자별 velocity 윈도우가 길어짐 (velocity-heavy)
+
+측정 (pyperf 방식, 케이스마다 새로 준비한 입력으로 1회 warmup + --repeat회)
+- ns/op: 반복별 ns/op의 중앙값 (±: 최소~최대 편차)
+- alloc B/op, blocks/op: 연산 결과를 유지한 채 tracemalloc / sys.getallocatedblocks()로 잰 순증가분
+  (반환값 + 엔진 상태 증가분, 바로 해제되는 임시 객체는 제외)
+
+사용법:
+    python benchmarks/hotpath_bench.py
+    python benchmarks/hotpath_bench.py --filter fds.check --users 1000,100000 --ops 50000
+    python benchmarks/hotpath_bench.py --save benchmarks/hotpath_baseline.json
+    python benchmarks/hotpath_bench.py --baseline benchmarks/hotpath_baseline.json --tolerance 0.2
+"""
+
+import io
+import gc
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import tempfile
+import importlib
+import statistics
+import tracemalloc
+import contextlib
+from datetime import datetime, timedelta
+
+import numpy as np
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+GENERATOR_DIR = os.path.join(ROOT, 'part-a-pipeline', 'generator')
+CONSUMER_DIR = os.path.join(ROOT, 'part-a-pipeline', 'consumer')
+COMMON_DIR = os.path.join(ROOT, 'part-a-pipeline', 'common')
+
+# codec, histogram, exporter는 두 서비스가 공유 → 한 번만 import
+sys.path.append(COMMON_DIR)
+
+def load_component(directory: str, names: list) -> dict:
+    """
+    generator/consumer 모듈 로드
+    두 디렉터리에 같은 이름의 모듈(config, metrics...)이 있으므로
+    로드 후 해당 디렉터리 모듈을 sys.modules에서 치워 다음 component가 새로 import하게 함
+    """
+    sys.path.insert(0, directory)
+    try:
+        modules = {name: importlib.import_module(name) for name in names}
+    finally:
+        sys.path.remove(directory)
+        for name, module in list(sys.modules.items()):
+            if (getattr(module, '__file__', None) or '').startswith(directory + os.sep):
+                del sys.modules[name]
+    return modules
+
+# ============================================
+# 입력 데이터
+# ============================================
+
+def make_dataset(sample, count: int, users: int, skew: str, rate: float, seed: int) -> list:
+    """
+    sample_data_generator 분포의 consumer 입력 트랜잭션 count건
+    - skew: uniform | zipf (순위^-1.1, 소수 사용자에 거래 집중)
+    - rate: 초당 건수 (created_at 간격)
+    """
+    random.seed(seed)
+    np_rng = np.random.default_rng(seed)
+    base_date = datetime(2026, 2, 5)
+    templates = [
+        sample.generate_transaction(base_date - timedelta(days=random.randint(0, 6)))
+        for _ in range(min(count, 20000))
+    ]
+    
+    if skew == 'zipf':
+        weights = 1.0 / np.arange(1, users + 1) ** 1.1
+        user_indices = np_rng.choice(users, size=count, p=weights / weights.sum())
+    else:
+        user_indices = np_rng.integers(0, users, size=count)
+    tier_by_sample_user = [sample.USER_TIERS[u] for u in sample.USER_IDS]
+    
+    start = datetime(2026, 2, 5).timestamp()
+    transactions = []
+    for i, u in enumerate(user_indices.tolist()):
+        tx = dict(templates[i % len(templates)])
+        tx['tx_id'] = f"{seed:04d}-{i:012d}"
+        tx['user_id'] = f"user_{u:06d}"
+        tx['user_tier'] = tier_by_sample_user[u % len(tier_by_sample_user)]
+        tx['created_at'] = start + i / rate
+        transactions.append(tx)
+    return transactions
+
+# ============================================
+# 측정
+# ============================================
+
+def measure(prepare, repeat: int) -> dict:
+    """prepare() → (run, ops). run()은 ops건 처리, 반복마다 새로 준비 (엔진 상태 등 초기화)"""
+    samples = []
+    for i in range(repeat + 1):
+        run, ops = prepare()
+        gc.collect()
+        start = time.perf_counter_ns()
+        run()
+        elapsed = time.perf_counter_ns() - start
+        if i > 0:  # 첫 회는 warmup
+            samples.append(elapsed / ops)
+    
+    run, ops = prepare()
+    gc.collect()
+    blocks_before = sys.getallocatedblocks()
+    run()
+    blocks = sys.getallocatedblocks() - blocks_before
+    
+    run, ops = prepare()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        run()
+        after, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    
+    median = statistics.median(samples)
+    return {
+        'ops': ops,
+        'ns_per_op': round(median, 1),
+        'ns_min': round(min(samples), 1),
+        'ns_max': round(max(samples), 1),
+        'alloc_bytes_per_op': round((after - before) / ops, 1),
+        'alloc_blocks_per_op': round(blocks / ops, 2),
+        'peak_bytes': peak - before,
+    }
+
+def loop(fn, inputs: list):
+    """inputs 각각에 fn 호출, 결과는 유지 (할당 측정에 포함)"""
+    def prepare():
+        out = []
+        def run():
+            append = out.append
+            for item in inputs:
+                append(fn(item))
+        return run, len(inputs)
+    return prepare
+
+# ============================================
+# 벤치마크 케이스
+# ============================================
+
+def generator_cases(gen, sample, args) -> list:
+    rng = random.Random(args.seed)
+    pairs = [(gen.USER_SAMPLER.sample(rng), gen.CATEGORY_SAMPLER.sample(rng)) for _ in range(args.ops)]
+    cases = [
+        ('gen.generate_amount', loop(lambda pair: gen.generate_amount(*pair), pairs)),
+        ('gen.generate_transaction', loop(lambda _: gen.generate_transaction(), range(args.ops))),
+    ]
+    for batch in args.batch_sizes:
+        def prepare(batch=batch):
+            out = []
+            batches = max(args.ops // batch, 1)
+            def run():
+                for _ in range(batches):
+                    out.append(gen.generate_transactions_bulk(batch))
+            return run, batches * batch
+        cases.append((f"gen.generate_transactions_bulk[batch={batch}]", prepare))
+    
+    sample_dates = [datetime(2026, 2, 5) - timedelta(days=rng.randint(0, 6)) for _ in range(args.ops // 10)]
+    cases.append(('sample.generate_transaction', loop(sample.generate_transaction, sample_dates)))
+    return cases
+
+def codec_cases(gen, args) -> list:
+    transactions = gen.generate_transactions_bulk(args.ops)
+    payloads = [json.dumps(tx) for tx in transactions]
+    return [
+        ('json.dumps[tx]', loop(json.dumps, transactions)),
+        ('json.loads[tx]', loop(json.loads, payloads)),
+    ]
+
+def engine_cases(fds_rules, sample, args) -> list:
+    cases = []
+    for users in args.users:
+        for skew in ('uniform', 'zipf'):
+            for rate in args.rates:
+                dataset = make_dataset(sample, args.ops, users, skew, rate, args.seed)
+                
+                def prepare(dataset=dataset):
+                    engine = fds_rules.FDSRuleEngine()
+                    out = []
+                    def run():
+                        check = engine.check
+                        append = out.append
+                        for tx in dataset:
+                            append(check(tx))
+                    return run, len(dataset)
+                cases.append((f"fds.check[users={users},skew={skew},rate={rate:g}]", prepare))
+        
+        dataset = make_dataset(sample, args.ops, users, 'zipf', args.rates[-1], args.seed)
+        for batch in args.batch_sizes:
+            def prepare(dataset=dataset, batch=batch):
+                engine = fds_rules.FDSRuleEngine()
+                batches = [dataset[i:i + batch] for i in range(0, len(dataset), batch)]
+                out = []
+                def run():
+                    for transactions in batches:
+                        out.append(engine.check_batch(transactions))
+                return run, len(dataset)
+            cases.append((f"fds.check_batch[users={users},skew=zipf,batch={batch}]", prepare))
+    return cases
+
+def metrics_cases(metrics_module, args, output_dir: str) -> list:
+    rng = random.Random(args.seed)
+    latencies = [rng.lognormvariate(-3, 1) for _ in range(args.ops)]
+    
+    def prepare_record():
+        metrics = metrics_module.MetricsCollector(output_dir, phase=0, role='bench')
+        def run():
+            record = metrics.record_success
+            for latency in latencies:
+                record(latency)
+        return run, len(latencies)
+    
+    def prepare_flush():
+        collectors = []
+        for _ in range(10):
+            metrics = metrics_module.MetricsCollector(output_dir, phase=0, role='bench')
+            for latency in latencies[:1000]:
+                metrics.record_success(latency)
+            collectors.append(metrics)
+        def run():
+            with contextlib.redirect_stdout(io.StringIO()):
+                for metrics in collectors:
+                    metrics.flush(state_stats={'state_users': 0})
+        return run, len(collectors)
+    
+    return [
+        ('metrics.record_success', prepare_record),
+        ('metrics.flush[window=1000]', prepare_flush),
+    ]
+
+# ============================================
+# 결과
+# ============================================
+
+def compare(results: list, baseline: dict, tolerance: float) -> list:
+    """baseline 대비 ns/op가 (1 + tolerance)배를 넘는 케이스"""
+    base_cases = {r['name']: r for r in baseline.get('results', [])}
+    regressions = []
+    print(f"\n{'case':58} {'ns/op':>10} {'base':>10} {'Δ':>8}")
+    for r in results:
+        base = base_cases.get(r['name'])
+        if base is None:
+            continue
+        change = r['ns_per_op'] / base['ns_per_op'] - 1
+        regressed = change > tolerance
+        if regressed:
+            regressions.append(f"{r['name']}: {change:+.1%}")
+        print(f"{r['name']:58} {r['ns_per_op']:>10,.0f} {base['ns_per_op']:>10,.0f} {change:>+8.1%}"
+              f"{'  REGRESSION' if regressed else ''}")
+    return regressions
+
+def run(args) -> list:
+    random.seed(args.seed)
+    generator = load_component(GENERATOR_DIR, ['main', 'sample_data_generator'])
+    consumer = load_component(CONSUMER_DIR, ['fds_rules', 'metrics'])
+    gen, sample = generator['main'], generator['sample_data_generator']
+    # generator main은 import 시 시드를 풀어두므로 측정 입력이 같도록 다시 고정
+    random.seed(args.seed)
+    gen.NP_RNG = np.random.default_rng(args.seed)
+    
+    with tempfile.TemporaryDirectory() as output_dir:
+        cases = (generator_cases(gen, sample, args) + codec_cases(gen, args) +
+                 engine_cases(consumer['fds_rules'], sample, args) +
+                 metrics_cases(consumer['metrics'], args, output_dir))
+        results = []
+        for name, prepare in cases:
+            if args.filter and args.filter not in name:
+                continue
+            random.seed(args.seed)
+            gen.NP_RNG = np.random.default_rng(args.seed)
+            result = {'name': name, **measure(prepare, args.repeat)}
+            results.append(result)
+            spread = max(result['ns_per_op'] - result['ns_min'], result['ns_max'] - result['ns_per_op'])
+            print(f"{name:58} {result['ns_per_op']:>10,.0f} ±{spread / result['ns_per_op']:>5.1%} "
+                  f"{result['alloc_bytes_per_op']:>10,.1f} {result['alloc_blocks_per_op']:>9.2f}", flush=True)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Pipeline hot path microbenchmarks")
+    parser.add_argument('--ops', type=int, default=20000, help="operations per repeat")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--users', default='1000,100000')
+    parser.add_argument('--rates', default='100,20000', help="tx/s in created_at (velocity-heavy when high)")
+    parser.add_argument('--batch-sizes', default='100,1000')
+    parser.add_argument('--filter', default='', help="run cases whose name contains this")
+    parser.add_argument('--save', default=None, help="write results JSON")
+    parser.add_argument('--baseline', default=None, help="results JSON to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.2)
+    args = parser.parse_args()
+    args.users = [int(x) for x in args.users.split(',')]
+    args.rates = [float(x) for x in args.rates.split(',')]
+    args.batch_sizes = [int(x) for x in args.batch_sizes.split(',')]
+    
+    print(f"{'case':58} {'ns/op':>10} {'spread':>7} {'alloc B/op':>10} {'blocks/op':>9}")
+    results = run(args)
+    
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump({
+                'created_at': datetime.now().isoformat(),
+                'host': {'python': platform.python_version(), 'platform': platform.platform()},
+                'args': {k: v for k, v in vars(args).items() if k not in ('save', 'baseline')},
+                'results': results,
+            }, f, indent=2)
+        print(f"\nResults → {args.save}")
+    
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) (tolerance {args.tolerance:.0%}):")
+            for regression in regressions:
+                print(f"  - {regression}")
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -15,13 +15,41 @@ CREATE TABLE IF NOT EXISTS fds.transactions (
     amount BIGINT NOT NULL,
     merchant VARCHAR(100),
     is_fraud BOOLEAN DEFAULT false,
-    fraud_rules TEXT[],
+    fraud_rules TEXT,  -- 탐지된 룰 메시지 (', '로 연결, init_schema_partitioned.sql과 동일)
     created_at TIMESTAMP DEFAULT NOW(),
     processed_at TIMESTAMP
 );
 
-CREATE INDEX IF NOT EXISTS idx_fds_transactions_created_at 
-ON fds.transactions(created_at);
+-- Phase 3 consumer가 적재하는 컬럼 (기존 DB에도 적용되도록 ADD COLUMN IF NOT EXISTS)
+ALTER TABLE fds.transactions
+    ADD COLUMN IF NOT EXISTS user_id VARCHAR(20),
+    ADD COLUMN IF NOT EXISTS user_tier VARCHAR(10),
+    ADD COLUMN IF NOT EXISTS merchant_category VARCHAR(30),
+    ADD COLUMN IF NOT EXISTS region VARCHAR(20),
+    ADD COLUMN IF NOT EXISTS hour SMALLINT,
+    ADD COLUMN IF NOT EXISTS day_of_week SMALLINT,
+    ADD COLUMN IF NOT EXISTS is_weekend BOOLEAN,
+    ADD COLUMN IF NOT EXISTS time_slot VARCHAR(10);
+
+-- 이전 스키마(fraud_rules TEXT[])로 만든 DB는 consumer가 쓰는 TEXT로 변환
+DO $$
+BEGIN
+    IF EXISTS (
+        SELECT 1 FROM information_schema.columns
+        WHERE table_schema = 'fds' AND table_name = 'transactions'
+          AND column_name = 'fraud_rules' AND data_type = 'ARRAY'
+    ) THEN
+        ALTER TABLE fds.transactions
+            ALTER COLUMN fraud_rules TYPE TEXT USING array_to_string(fraud_rules, ', ');
+    END IF;
+END $$;
+
+-- created_at 범위 조회 + consumer 워밍업 집계(user_id, amount)를 index-only scan으로 처리
+-- (created_at 단일 인덱스를 대체)
+CREATE INDEX IF NOT EXISTS idx_fds_transactions_created_at_user
+ON fds.transactions(created_at) INCLUDE (user_id, amount);
+
+DROP INDEX IF EXISTS fds.idx_fds_transactions_created_at;
 
 CREATE INDEX IF NOT EXISTS idx_fds_transactions_card_number 
 ON fds.transactions(card_number);
@@ -44,6 +72,32 @@ CREATE TABLE IF NOT EXISTS fds.daily_transaction_summary (
     UNIQUE(summary_date)
 );
 
+-- ============================================
+-- Part A: 분 단위 사전 집계 (consumer가 배치 INSERT와 같은 트랜잭션에서 UPSERT)
+-- bucket = date_trunc('minute', processed_at)
+-- ============================================
+
+CREATE TABLE IF NOT EXISTS fds.tx_rollup_minute (
+    bucket TIMESTAMP NOT NULL,
+    merchant_category VARCHAR(30) NOT NULL,
+    user_tier VARCHAR(10) NOT NULL,
+    tx_count BIGINT NOT NULL DEFAULT 0,
+    amount_sum BIGINT NOT NULL DEFAULT 0,
+    fraud_count BIGINT NOT NULL DEFAULT 0,
+    fraud_amount BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (bucket, merchant_category, user_tier)
+);
+
+CREATE TABLE IF NOT EXISTS fds.rule_hits_minute (
+    bucket TIMESTAMP NOT NULL,
+    rule TEXT NOT NULL,
+    hit_count BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (bucket, rule)
+);
+
+-- 이전 스키마(rule VARCHAR(30))로 만든 DB도 TEXT로 (VARCHAR → TEXT는 테이블 재작성 없음)
+ALTER TABLE fds.rule_hits_minute ALTER COLUMN rule TYPE TEXT;
+
 -- ============================================
 -- Part B: 파이프라인 완료 기록
 -- ============================================
@@ -0,0 +1,137 @@
+-- ============================================
+-- fds.transactions 파티션 테이블 버전 (init_schema.sql의 transactions 대체)
+--
+-- 사용법: 이 파일을 먼저 실행한 뒤 init_schema.sql 실행
+--   (init_schema.sql은 IF NOT EXISTS라 transactions는 건너뛰고 나머지 테이블만 생성)
+-- consumer 설정: TX_CONFLICT_TARGET=tx_id,created_at
+--   (파티션 테이블의 UNIQUE 제약에는 파티션 키가 포함되어야 함)
+--
+-- - created_at 기준 RANGE 파티션 (일 단위 기본, 시간 단위 선택 가능)
+-- - 인덱스는 부모에 선언 → 파티션마다 로컬 인덱스로 생성
+--   → 테이블이 커져도 인덱스 크기/INSERT 비용이 파티션 크기에 비례
+-- - 보존 기간 지난 데이터는 DELETE + VACUUM 대신 파티션 DETACH + DROP
+-- - 파티션 생성/삭제는 fds.ensure_partitions() (Airflow DAG fds_partition_maintenance가 매시간 호출)
+-- ============================================
+
+CREATE SCHEMA IF NOT EXISTS fds;
+
+-- SERIAL id 제거: tx_id + created_at이 기본키 (B-tree 하나 절약)
+CREATE TABLE IF NOT EXISTS fds.transactions (
+    tx_id VARCHAR(50) NOT NULL,
+    card_number VARCHAR(20) NOT NULL,
+    amount BIGINT NOT NULL,
+    merchant VARCHAR(100),
+    user_id VARCHAR(20),
+    user_tier VARCHAR(10),
+    merchant_category VARCHAR(30),
+    region VARCHAR(20),
+    hour SMALLINT,
+    day_of_week SMALLINT,
+    is_weekend BOOLEAN,
+    time_slot VARCHAR(10),
+    is_fraud BOOLEAN DEFAULT false,
+    fraud_rules TEXT,
+    created_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    processed_at TIMESTAMP,
+    PRIMARY KEY (tx_id, created_at)
+) PARTITION BY RANGE (created_at);
+
+-- 범위 밖 데이터(과거 샘플 데이터, 시계가 틀어진 generator 등) 수용
+-- 주의: DEFAULT에 들어간 범위와 겹치는 파티션은 새로 만들 수 없으므로 미리 생성해 둘 것
+CREATE TABLE IF NOT EXISTS fds.transactions_default
+PARTITION OF fds.transactions DEFAULT;
+
+-- created_at 범위 조회 + consumer 워밍업 집계(user_id, amount)를 index-only scan으로 처리
+CREATE INDEX IF NOT EXISTS idx_fds_transactions_created_at_user
+ON fds.transactions(created_at) INCLUDE (user_id, amount);
+
+-- n8n 모니터링 쿼리 (processed_at >= NOW() - INTERVAL '1 minute')
+CREATE INDEX IF NOT EXISTS idx_fds_transactions_processed_at
+ON fds.transactions(processed_at);
+
+CREATE INDEX IF NOT EXISTS idx_fds_transactions_card_number
+ON fds.transactions(card_number);
+
+CREATE INDEX IF NOT EXISTS idx_fds_transactions_is_fraud
+ON fds.transactions(is_fraud) WHERE is_fraud = true;
+
+-- ============================================
+-- 파티션 유지보수
+-- p_ahead:       현재 구간부터 미리 만들어 둘 파티션 수
+-- p_retention:   이보다 오래된 파티션(상한 기준)은 DETACH
+-- p_granularity: day (transactions_pYYYYMMDD) | hour (transactions_pYYYYMMDDHH)
+-- p_drop:        false면 DETACH만 하고 테이블은 남김 (아카이브용)
+-- ============================================
+
+CREATE OR REPLACE FUNCTION fds.ensure_partitions(
+    p_ahead INT DEFAULT 7,
+    p_retention INTERVAL DEFAULT '30 days',
+    p_granularity TEXT DEFAULT 'day',
+    p_drop BOOLEAN DEFAULT true
+) RETURNS TABLE(action TEXT, partition_name TEXT) AS $$
+DECLARE
+    v_step INTERVAL;
+    v_format TEXT;
+    v_start TIMESTAMP;
+    v_lower TIMESTAMP;
+    v_upper TIMESTAMP;
+    v_digits TEXT;
+    v_part RECORD;
+BEGIN
+    IF p_granularity NOT IN ('day', 'hour') THEN
+        RAISE EXCEPTION 'p_granularity must be day or hour: %', p_granularity;
+    END IF;
+    v_step := ('1 ' || p_granularity)::INTERVAL;
+    v_format := CASE p_granularity WHEN 'day' THEN 'YYYYMMDD' ELSE 'YYYYMMDDHH24' END;
+    v_start := date_trunc(p_granularity, LOCALTIMESTAMP);
+
+    -- 1. 다가올 파티션 미리 생성
+    FOR i IN 0..p_ahead LOOP
+        v_lower := v_start + v_step * i;
+        partition_name := 'transactions_p' || to_char(v_lower, v_format);
+        IF to_regclass(format('fds.%I', partition_name)) IS NULL THEN
+            EXECUTE format(
+                'CREATE TABLE fds.%I PARTITION OF fds.transactions FOR VALUES FROM (%L) TO (%L)',
+                partition_name, v_lower, v_lower + v_step
+            );
+            action := 'created';
+            RETURN NEXT;
+        END IF;
+    END LOOP;
+
+    -- 2. 보존 기간 지난 파티션 제거 (이름에서 구간 계산, 일/시간 단위 혼재 허용)
+    IF p_retention IS NULL THEN
+        RETURN;
+    END IF;
+    FOR v_part IN
+        SELECT c.relname
+        FROM pg_inherits inh
+        JOIN pg_class c ON c.oid = inh.inhrelid
+        JOIN pg_class p ON p.oid = inh.inhparent
+        JOIN pg_namespace n ON n.oid = p.relnamespace
+        WHERE n.nspname = 'fds'
+          AND p.relname = 'transactions'
+          AND c.relname ~ '^transactions_p([0-9]{8}|[0-9]{10})$'
+    LOOP
+        v_digits := substring(v_part.relname FROM '[0-9]+$');
+        IF length(v_digits) = 8 THEN
+            v_upper := to_timestamp(v_digits, 'YYYYMMDD')::TIMESTAMP + INTERVAL '1 day';
+        ELSE
+            v_upper := to_timestamp(v_digits, 'YYYYMMDDHH24')::TIMESTAMP + INTERVAL '1 hour';
+        END IF;
+        IF v_upper <= LOCALTIMESTAMP - p_retention THEN
+            EXECUTE format('ALTER TABLE fds.transactions DETACH PARTITION fds.%I', v_part.relname);
+            partition_name := v_part.relname;
+            action := 'detached';
+            IF p_drop THEN
+                EXECUTE format('DROP TABLE fds.%I', v_part.relname);
+                action := 'dropped';
+            END IF;
+            RETURN NEXT;
+        END IF;
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+-- 초기 파티션 (오늘 + 7일)
+SELECT * FROM fds.ensure_partitions();
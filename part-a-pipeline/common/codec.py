@@ -0,0 +1,199 @@
+"""
+Redis 큐 직렬화 코덱 (generator / consumer 공용, part-a-pipeline/common)
+- json:    기존 방식 (tx dict → JSON 문자열)
+- msgpack: 스키마 버전 + 필드 순서 고정 배열, 카테고리/가맹점/지역/등급/시간대는 정수 코드
+- 프레이밍: FRAME_SIZE건을 Redis 값 하나로 묶음 (1이면 건별)
+decode는 payload 첫 바이트로 형식을 판별하므로 consumer는 코덱 설정이 필요 없음
+"""
+
+import json
+import uuid
+import msgpack
+
+SCHEMA_VERSION = 1
+FRAME_TAG = 0  # msgpack 프레임 헤더 (스키마 버전은 1부터)
+
+# 사전 코드 테이블: 순서 변경 금지 (추가는 맨 뒤에만, 바꾸면 SCHEMA_VERSION 올릴 것)
+TIERS = ['normal', 'premium', 'vip']
+CATEGORIES = [
+    'convenience', 'coffee', 'restaurant', 'delivery', 'online_shopping',
+    'supermarket', 'fashion', 'electronics', 'luxury', 'travel'
+]
+MERCHANT_NAMES = [
+    'CU', 'GS25', '세븐일레븐', '이마트24', '미니스톱',
+    '스타벅스', '투썸플레이스', '이디야', '메가커피', '빽다방',
+    '맥도날드', '버거킹', '교촌치킨', '피자헛', '본죽', '한신포차', '새마을식당',
+    '배달의민족', '쿠팡이츠', '요기요',
+    '쿠팡', '네이버쇼핑', 'SSG닷컴', '11번가', '무신사',
+    '이마트', '홈플러스', '롯데마트', '코스트코', '트레이더스',
+    '자라', 'H&M', '유니클로', '나이키', '아디다스',
+    '삼성스토어', '애플스토어', '하이마트', '롯데하이마트',
+    '루이비통', '샤넬', '구찌', '에르메스', '롤렉스',
+    '대한항공', '아시아나항공', '야놀자', '여기어때', '마이리얼트립'
+]
+REGIONS = ['서울', '경기', '인천', '부산', '대구', '광주', '대전', '울산', '세종', '제주']
+TIME_SLOTS = ['dawn', 'morning', 'lunch', 'afternoon', 'evening', 'night']
+
+USER_PREFIX = 'user_'
+CARD_PREFIX = '4532-****-****-'
+
+# msgpack 레코드 필드 순서 (SCHEMA_VERSION 1)
+FIELDS = (
+    'tx_id', 'user_id', 'user_tier', 'card_number', 'amount', 'merchant',
+    'merchant_category', 'region', 'hour', 'day_of_week', 'is_weekend',
+    'time_slot', 'created_at'
+)
+FIELD_SET = frozenset(FIELDS)
+
+def _index(values: list) -> dict:
+    return {value: code for code, value in enumerate(values)}
+
+TIER_CODES = _index(TIERS)
+CATEGORY_CODES = _index(CATEGORIES)
+MERCHANT_CODES = _index(MERCHANT_NAMES)
+REGION_CODES = _index(REGIONS)
+TIME_SLOT_CODES = _index(TIME_SLOTS)
+
+def _encode_user(user_id: str):
+    # user_00042 → 42 (되돌렸을 때 같은 문자열일 때만)
+    if user_id.startswith(USER_PREFIX):
+        digits = user_id[len(USER_PREFIX):]
+        if digits.isdigit() and f"{USER_PREFIX}{int(digits):05d}" == user_id:
+            return int(digits)
+    return user_id
+
+def _decode_user(value) -> str:
+    return f"{USER_PREFIX}{value:05d}" if isinstance(value, int) else value
+
+def _encode_card(card_number: str):
+    # 4532-****-****-1234 → 1234
+    if card_number.startswith(CARD_PREFIX):
+        digits = card_number[len(CARD_PREFIX):]
+        if len(digits) == 4 and digits.isdigit() and digits[0] != '0':
+            return int(digits)
+    return card_number
+
+def _decode_card(value) -> str:
+    return f"{CARD_PREFIX}{value}" if isinstance(value, int) else value
+
+def _encode_tx_id(tx_id: str):
+    # UUID 문자열(36바이트) → 16바이트
+    try:
+        parsed = uuid.UUID(tx_id)
+    except ValueError:
+        return tx_id
+    return parsed.bytes if str(parsed) == tx_id else tx_id
+
+def _decode_tx_id(value) -> str:
+    return str(uuid.UUID(bytes=value)) if isinstance(value, bytes) else value
+
+def _encode_code(codes: dict, value):
+    # 사전에 없는 값은 문자열 그대로
+    return codes.get(value, value)
+
+def _decode_code(values: list, value):
+    return values[value] if isinstance(value, int) else value
+
+class JsonCodec:
+    name = 'json'
+    
+    def encode(self, tx: dict) -> str:
+        return json.dumps(tx)
+    
+    def encode_frame(self, transactions: list) -> str:
+        return json.dumps(transactions)
+
+class MsgpackCodec:
+    name = 'msgpack'
+    
+    def _record(self, tx: dict) -> list:
+        record = [
+            _encode_tx_id(tx['tx_id']),
+            _encode_user(tx['user_id']),
+            _encode_code(TIER_CODES, tx['user_tier']),
+            _encode_card(tx['card_number']),
+            tx['amount'],
+            _encode_code(MERCHANT_CODES, tx['merchant']),
+            _encode_code(CATEGORY_CODES, tx['merchant_category']),
+            _encode_code(REGION_CODES, tx['region']),
+            tx['hour'],
+            tx['day_of_week'],
+            tx['is_weekend'],
+            _encode_code(TIME_SLOT_CODES, tx['time_slot']),
+            tx['created_at']
+        ]
+        # 스키마 밖 필드는 맨 뒤 dict로 보존
+        if len(tx) != len(FIELDS):
+            extras = {k: v for k, v in tx.items() if k not in FIELD_SET}
+            if extras:
+                record.append(extras)
+        return record
+    
+    def encode(self, tx: dict) -> bytes:
+        return msgpack.packb([SCHEMA_VERSION] + self._record(tx))
+    
+    def encode_frame(self, transactions: list) -> bytes:
+        return msgpack.packb([FRAME_TAG, SCHEMA_VERSION, [self._record(tx) for tx in transactions]])
+
+def _decode_record(record: list) -> dict:
+    tx = {
+        'tx_id': _decode_tx_id(record[0]),
+        'user_id': _decode_user(record[1]),
+        'user_tier': _decode_code(TIERS, record[2]),
+        'card_number': _decode_card(record[3]),
+        'amount': record[4],
+        'merchant': _decode_code(MERCHANT_NAMES, record[5]),
+        'merchant_category': _decode_code(CATEGORIES, record[6]),
+        'region': _decode_code(REGIONS, record[7]),
+        'hour': record[8],
+        'day_of_week': record[9],
+        'is_weekend': record[10],
+        'time_slot': _decode_code(TIME_SLOTS, record[11]),
+        'created_at': record[12]
+    }
+    if len(record) > len(FIELDS):
+        tx.update(record[len(FIELDS)])
+    return tx
+
+def _decode_msgpack(payload: bytes) -> list:
+    data = msgpack.unpackb(payload, raw=False)
+    if data[0] == FRAME_TAG:
+        version, records = data[1], data[2]
+        if version != SCHEMA_VERSION:
+            raise ValueError(f"Unsupported schema version: {version}")
+        return [_decode_record(record) for record in records]
+    if data[0] != SCHEMA_VERSION:
+        raise ValueError(f"Unsupported schema version: {data[0]}")
+    return [_decode_record(data[1:])]
+
+def decode_payload(payload) -> list:
+    """Redis 값 1개 → 트랜잭션 리스트 (JSON/msgpack, 단건/프레임 자동 판별)"""
+    if isinstance(payload, str) or payload[:1] in (b'{', b'['):
+        data = json.loads(payload)
+        return data if isinstance(data, list) else [data]
+    return _decode_msgpack(payload)
+
+def decode_payloads(payloads: list) -> list:
+    transactions = []
+    for payload in payloads:
+        transactions.extend(decode_payload(payload))
+    return transactions
+
+def encode_batch(codec, transactions: list, frame_size: int = 1) -> list:
+    """트랜잭션 리스트 → Redis 값 리스트 (frame_size건씩 묶음)"""
+    if frame_size <= 1:
+        return [codec.encode(tx) for tx in transactions]
+    return [
+        codec.encode_frame(transactions[i:i + frame_size])
+        for i in range(0, len(transactions), frame_size)
+    ]
+
+CODECS = {
+    JsonCodec.name: JsonCodec,
+    MsgpackCodec.name: MsgpackCodec,
+}
+
+def get_codec(name: str):
+    if name not in CODECS:
+        raise ValueError(f"Unknown CODEC: {name} (available: {', '.join(CODECS)})")
+    return CODECS[name]()
@@ -0,0 +1,77 @@
+"""
+Prometheus 텍스트 포맷 exposition (generator / consumer 공용, part-a-pipeline/common)
+- HTTP 서버는 별도 daemon 스레드에서 동작 → asyncio 이벤트 루프를 막지 않음
+- scrape 시점에 render()를 호출해 현재 값을 텍스트로 변환 (DB/Redis 조회 없음)
+- 히스토그램은 LatencyHistogram 버킷을 고정 le 경계로 누적 변환
+"""
+
+import threading
+import numpy as np
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from histogram import HIGHEST_US, _index
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# 지연시간 버킷 경계 (초)
+LATENCY_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60
+)
+
+LATENCY_BUCKET_INDEXES = [_index(min(int(bound * 1000000), HIGHEST_US)) for bound in LATENCY_BUCKETS]
+
+def _labels(labels: dict) -> str:
+    if not labels:
+        return ''
+    pairs = ','.join(f'{key}="{value}"' for key, value in labels.items())
+    return '{' + pairs + '}'
+
+def _header(name: str, kind: str, help_text: str) -> list:
+    return [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+
+def format_counter(name: str, help_text: str, samples: list) -> list:
+    """samples: [(labels, value)]"""
+    lines = _header(name, 'counter', help_text)
+    lines.extend(f"{name}{_labels(labels)} {value}" for labels, value in samples)
+    return lines
+
+def format_gauge(name: str, help_text: str, samples: list) -> list:
+    lines = _header(name, 'gauge', help_text)
+    lines.extend(f"{name}{_labels(labels)} {value}" for labels, value in samples)
+    return lines
+
+def format_histogram(name: str, help_text: str, samples: list) -> list:
+    """samples: [(labels, counts, total, sum_seconds)] (counts: LatencyHistogram 버킷 배열)"""
+    lines = _header(name, 'histogram', help_text)
+    for labels, counts, total, sum_seconds in samples:
+        cumulative = np.cumsum(counts)
+        for bound, index in zip(LATENCY_BUCKETS, LATENCY_BUCKET_INDEXES):
+            lines.append(f"{name}_bucket{_labels({**labels, 'le': bound})} {int(cumulative[index])}")
+        lines.append(f"{name}_bucket{_labels({**labels, 'le': '+Inf'})} {total}")
+        lines.append(f"{name}_sum{_labels(labels)} {sum_seconds}")
+        lines.append(f"{name}_count{_labels(labels)} {total}")
+    return lines
+
+def start_http_server(port: int, render, host: str = '0.0.0.0'):
+    """GET /metrics → render() 결과, daemon 스레드에서 서비스"""
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] not in ('/metrics', '/'):
+                self.send_error(404)
+                return
+            body = render().encode()
+            self.send_response(200)
+            self.send_header('Content-Type', CONTENT_TYPE)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        
+        def log_message(self, format, *args):
+            pass
+    
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, name=f"metrics-http-{port}", daemon=True)
+    thread.start()
+    print(f"[Metrics] Prometheus endpoint: http://{host}:{port}/metrics")
+    return server
@@ -0,0 +1,159 @@
+"""
+고정 메모리 지연시간 히스토그램 (HDR 방식 log-linear 버킷, generator / consumer 공용)
+- 값은 마이크로초 정수로 기록, 2의 거듭제곱 구간마다 SUB_BUCKETS개 선형 버킷
+  → 상대 오차 1/SUB_BUCKETS 이하 (128 → 0.8%)
+- record / record_many: 버킷 인덱스 계산 + 카운트 증가, O(1)
+- record_array: 배열 단위 기록 (배치 내 건별 값을 numpy로 한 번에)
+- snapshot / merge: 버킷 카운트를 dict로 내보내 다른 프로세스(샤드) 결과와 합산
+- 메모리는 처리량과 무관하게 버킷 수(HIGHEST_US까지 약 3.3k개)로 고정
+"""
+
+import numpy as np
+
+SUB_BUCKET_BITS = 7
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+HIGHEST_US = 3600 * 1000000  # 1시간, 이보다 큰 값은 마지막 버킷에 기록
+
+def _index(value_us: int) -> int:
+    if value_us < SUB_BUCKETS:
+        return value_us
+    shift = value_us.bit_length() - SUB_BUCKET_BITS - 1
+    return (shift << SUB_BUCKET_BITS) + (value_us >> shift)
+
+def _bucket_bounds(index: int) -> tuple:
+    """버킷 index가 담는 값 범위 [low, high] (마이크로초)"""
+    if index < SUB_BUCKETS:
+        return index, index
+    shift, sub = divmod(index - SUB_BUCKETS, SUB_BUCKETS)
+    low = (SUB_BUCKETS + sub) << shift
+    return low, low + (1 << shift) - 1
+
+BUCKET_COUNT = _index(HIGHEST_US) + 1
+
+class LatencyHistogram:
+    def __init__(self):
+        self.counts = [0] * BUCKET_COUNT
+        self.total = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = None
+    
+    def record(self, seconds: float):
+        # record_many(seconds, 1)과 같음 (호출 빈도가 높아 인라인)
+        value_us = int(seconds * 1000000) if seconds > 0 else 0
+        if value_us < SUB_BUCKETS:
+            index = value_us
+        else:
+            if value_us > HIGHEST_US:
+                value_us = HIGHEST_US
+            shift = value_us.bit_length() - SUB_BUCKET_BITS - 1
+            index = (shift << SUB_BUCKET_BITS) + (value_us >> shift)
+        self.counts[index] += 1
+        self.total += 1
+        self.sum += seconds
+        if self.max is None:
+            self.min = self.max = seconds
+        elif seconds > self.max:
+            self.max = seconds
+        elif seconds < self.min:
+            self.min = seconds
+    
+    def record_many(self, seconds: float, count: int):
+        """같은 값 count건을 한 번에 기록"""
+        if count <= 0:
+            return
+        value_us = int(seconds * 1000000) if seconds > 0 else 0
+        self.counts[_index(min(value_us, HIGHEST_US))] += count
+        self.total += count
+        self.sum += seconds * count
+        if self.min is None or seconds < self.min:
+            self.min = seconds
+        if self.max is None or seconds > self.max:
+            self.max = seconds
+    
+    def record_array(self, seconds: np.ndarray):
+        """값 배열을 한 번에 기록 (record를 원소마다 호출한 것과 같은 버킷)"""
+        if not len(seconds):
+            return
+        values_us = np.minimum((np.maximum(seconds, 0) * 1000000).astype(np.int64), HIGHEST_US)
+        # 정수 → float64 변환은 HIGHEST_US 범위에서 정확하므로 frexp 지수가 곧 bit_length
+        shifts = np.maximum(np.frexp(values_us)[1] - SUB_BUCKET_BITS - 1, 0)
+        indices = np.where(
+            values_us < SUB_BUCKETS, values_us,
+            (shifts << SUB_BUCKET_BITS) + (values_us >> shifts)
+        )
+        counts = self.counts
+        for index, count in zip(*np.unique(indices, return_counts=True)):
+            counts[index] += int(count)
+        self.total += len(seconds)
+        self.sum += float(np.sum(seconds))
+        low, high = float(np.min(seconds)), float(np.max(seconds))
+        if self.min is None or low < self.min:
+            self.min = low
+        if self.max is None or high > self.max:
+            self.max = high
+    
+    def mean(self) -> float:
+        return self.sum / self.total if self.total else 0
+    
+    def percentiles(self, quantiles: list) -> list:
+        """quantiles(0~100) → 초 단위 값 리스트 (버킷 중간값, 실제 min/max로 클램프)"""
+        if not self.total:
+            return [0] * len(quantiles)
+        cumulative = np.cumsum(self.counts)
+        values = []
+        for q in quantiles:
+            rank = max(int(np.ceil(q / 100 * self.total)), 1)
+            index = int(np.searchsorted(cumulative, rank))
+            low, high = _bucket_bounds(index)
+            value = (low + high) / 2 / 1000000
+            values.append(min(max(value, self.min), self.max))
+        return values
+    
+    def percentile(self, q: float) -> float:
+        return self.percentiles([q])[0]
+    
+    def snapshot(self) -> dict:
+        """프로세스 간 전달/병합용 (0이 아닌 버킷만)"""
+        return {
+            'sub_bucket_bits': SUB_BUCKET_BITS,
+            'counts': {index: count for index, count in enumerate(self.counts) if count},
+            'total': self.total,
+            'sum': self.sum,
+            'min': self.min,
+            'max': self.max,
+        }
+    
+    @classmethod
+    def from_snapshot(cls, snapshot: dict):
+        histogram = cls()
+        histogram.merge(snapshot)
+        return histogram
+    
+    def merge(self, other):
+        """다른 히스토그램 또는 snapshot() 결과를 합산"""
+        snapshot = other.snapshot() if isinstance(other, LatencyHistogram) else other
+        if snapshot['sub_bucket_bits'] != SUB_BUCKET_BITS:
+            raise ValueError(f"Incompatible histogram layout: {snapshot['sub_bucket_bits']} sub-bucket bits")
+        counts = self.counts
+        for index, count in snapshot['counts'].items():
+            counts[int(index)] += count
+        self.total += snapshot['total']
+        self.sum += snapshot['sum']
+        for value in (snapshot['min'], snapshot['max']):
+            if value is None:
+                continue
+            if self.min is None or value < self.min:
+                self.min = value
+            if self.max is None or value > self.max:
+                self.max = value
+    
+    def reset(self):
+        self.counts = [0] * BUCKET_COUNT
+        self.total = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = None
+    
+    def __len__(self) -> int:
+        return self.total
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# 공용 모듈은 common 디렉터리 기준 import (서비스 main.py의 sys.path와 동일)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
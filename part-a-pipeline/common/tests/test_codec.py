@@ -0,0 +1,88 @@
+import json
+import uuid
+import random
+import msgpack
+import pytest
+import codec
+
+def make_tx(rng: random.Random, i: int) -> dict:
+    return {
+        'tx_id': str(uuid.UUID(int=rng.getrandbits(128))),
+        'user_id': f"user_{rng.randint(1, 99999):05d}",
+        'user_tier': rng.choice(codec.TIERS),
+        'card_number': f"4532-****-****-{rng.randint(1000, 9999)}",
+        'amount': rng.randint(1000, 5_000_000),
+        'merchant': rng.choice(codec.MERCHANT_NAMES),
+        'merchant_category': rng.choice(codec.CATEGORIES),
+        'region': rng.choice(codec.REGIONS),
+        'hour': rng.randint(0, 23),
+        'day_of_week': rng.randint(0, 6),
+        'is_weekend': rng.random() < 0.3,
+        'time_slot': rng.choice(codec.TIME_SLOTS),
+        'created_at': 1_770_000_000 + i * 0.001 + rng.random()
+    }
+
+@pytest.fixture
+def transactions():
+    rng = random.Random(11)
+    return [make_tx(rng, i) for i in range(200)]
+
+@pytest.mark.parametrize('name', list(codec.CODECS))
+@pytest.mark.parametrize('frame_size', [1, 7, 200, 500])
+def test_round_trip(name, frame_size, transactions):
+    payloads = codec.encode_batch(codec.get_codec(name), transactions, frame_size)
+    assert len(payloads) == -(-len(transactions) // frame_size)
+    assert codec.decode_payloads(payloads) == transactions
+
+def test_msgpack_round_trip_keeps_values_outside_dictionaries():
+    # 사전 밖 값 / 형식이 다른 id는 문자열 그대로 보존
+    tx = make_tx(random.Random(3), 0)
+    tx.update({
+        'tx_id': 'not-a-uuid',
+        'user_id': 'user_7',  # user_00007로 되돌아가면 안 됨
+        'card_number': '4532-****-****-0123',  # 앞자리 0은 int로 바꾸면 손실
+        'merchant': '동네마트',
+        'merchant_category': 'pharmacy',
+        'region': '강원',
+        'fraud_hint': {'source': 'test'}  # 스키마 밖 필드
+    })
+    msgpack_codec = codec.get_codec('msgpack')
+    assert codec.decode_payload(msgpack_codec.encode(tx)) == [tx]
+    assert codec.decode_payload(msgpack_codec.encode_frame([tx, tx])) == [tx, tx]
+
+def test_msgpack_uses_dictionary_codes():
+    tx = make_tx(random.Random(5), 0)
+    record = msgpack.unpackb(codec.get_codec('msgpack').encode(tx), raw=False)
+    assert record[0] == codec.SCHEMA_VERSION
+    assert record[1] == uuid.UUID(tx['tx_id']).bytes
+    assert record[2] == int(tx['user_id'][len(codec.USER_PREFIX):])
+    assert record[6] == codec.MERCHANT_NAMES.index(tx['merchant'])
+    assert len(record) == 1 + len(codec.FIELDS)
+
+def test_decode_detects_format_per_payload(transactions):
+    # 코덱이 바뀌는 중에도 consumer는 payload마다 형식을 판별
+    json_codec = codec.get_codec('json')
+    msgpack_codec = codec.get_codec('msgpack')
+    payloads = [
+        json_codec.encode(transactions[0]),
+        json_codec.encode(transactions[1]).encode(),  # decode_responses=False면 bytes
+        json_codec.encode_frame(transactions[2:5]).encode(),
+        msgpack_codec.encode(transactions[5]),
+        msgpack_codec.encode_frame(transactions[6:9]),
+    ]
+    assert codec.decode_payloads(payloads) == transactions[:9]
+
+def test_json_payload_matches_baseline_format(transactions):
+    # 기존 consumer(json.loads)와 호환
+    assert json.loads(codec.get_codec('json').encode(transactions[0])) == transactions[0]
+
+def test_unsupported_schema_version_is_rejected(transactions):
+    record = msgpack.unpackb(codec.get_codec('msgpack').encode(transactions[0]), raw=False)
+    with pytest.raises(ValueError, match='schema version'):
+        codec.decode_payload(msgpack.packb([codec.SCHEMA_VERSION + 1] + record[1:]))
+    with pytest.raises(ValueError, match='schema version'):
+        codec.decode_payload(msgpack.packb([codec.FRAME_TAG, codec.SCHEMA_VERSION + 1, [record[1:]]]))
+
+def test_unknown_codec():
+    with pytest.raises(ValueError, match='Unknown CODEC'):
+        codec.get_codec('protobuf')
@@ -0,0 +1,122 @@
+import json
+import numpy as np
+import pytest
+from histogram import (
+    LatencyHistogram, SUB_BUCKETS, HIGHEST_US, BUCKET_COUNT, _index, _bucket_bounds
+)
+
+def test_bucket_bounds_are_contiguous():
+    expected_low = 0
+    for index in range(BUCKET_COUNT):
+        low, high = _bucket_bounds(index)
+        assert low == expected_low and high >= low
+        assert _index(low) == index and _index(high) == index
+        expected_low = high + 1
+    assert _bucket_bounds(BUCKET_COUNT - 1)[0] <= HIGHEST_US <= _bucket_bounds(BUCKET_COUNT - 1)[1]
+
+def test_bucket_relative_width():
+    # 선형 구간(SUB_BUCKETS 미만)은 정확, 이후 버킷 폭은 하한의 1/SUB_BUCKETS 이하
+    for index in range(SUB_BUCKETS):
+        assert _bucket_bounds(index) == (index, index)
+    for index in range(SUB_BUCKETS, BUCKET_COUNT):
+        low, high = _bucket_bounds(index)
+        assert (high - low + 1) / low <= 1 / SUB_BUCKETS
+
+def test_percentiles_match_numpy_within_bucket_error():
+    rng = np.random.default_rng(1)
+    samples = rng.lognormal(mean=np.log(0.005), sigma=1.0, size=100000)
+    histogram = LatencyHistogram()
+    for value in samples:
+        histogram.record(float(value))
+    
+    quantiles = [1, 50, 90, 95, 99, 99.9]
+    values = histogram.percentiles(quantiles)
+    # 기존 metrics의 np.percentile(latencies, q) 대비 버킷 상대 오차 이내
+    for q, value in zip(quantiles, values):
+        assert value == pytest.approx(np.percentile(samples, q), rel=1 / SUB_BUCKETS)
+    assert histogram.mean() == pytest.approx(samples.mean())
+    assert histogram.min == samples.min() and histogram.max == samples.max()
+    assert histogram.percentile(100) == samples.max()
+    assert histogram.percentile(0) == samples.min()
+
+def test_small_values_are_exact():
+    histogram = LatencyHistogram()
+    for us in (3, 1, 2, 4, 5):
+        histogram.record(us / 1000000)
+    assert histogram.percentiles([20, 60, 100]) == pytest.approx([1e-6, 3e-6, 5e-6])
+
+def test_empty_histogram():
+    histogram = LatencyHistogram()
+    assert histogram.percentiles([50, 99]) == [0, 0]
+    assert histogram.mean() == 0 and len(histogram) == 0
+
+def test_record_many_matches_record():
+    single = LatencyHistogram()
+    many = LatencyHistogram()
+    for seconds, count in ((0.0, 3), (0.000042, 5), (0.0123, 7), (1.5, 2), (HIGHEST_US, 1)):
+        for _ in range(count):
+            single.record(seconds)
+        many.record_many(seconds, count)
+    many.record_many(0.5, 0)
+    assert single.counts == many.counts
+    assert (single.total, single.min, single.max) == (many.total, many.min, many.max)
+    assert single.sum == pytest.approx(many.sum)
+
+def test_values_above_highest_go_to_last_bucket():
+    histogram = LatencyHistogram()
+    histogram.record(HIGHEST_US / 1000000 * 10)
+    histogram.record(-1.0)  # 시계 역행 등 음수는 0 버킷
+    assert histogram.counts[-1] == 1 and histogram.counts[0] == 1
+
+def test_merge_snapshot_round_trip_through_json():
+    rng = np.random.default_rng(2)
+    shards = [LatencyHistogram() for _ in range(4)]
+    combined = LatencyHistogram()
+    for shard in shards:
+        for value in rng.exponential(0.01, size=2000):
+            shard.record(float(value))
+            combined.record(float(value))
+    
+    merged = LatencyHistogram()
+    for shard in shards:
+        # latency.jsonl에 기록된 snapshot은 버킷 index 키가 문자열
+        merged.merge(json.loads(json.dumps(shard.snapshot())))
+    assert merged.counts == combined.counts
+    assert merged.total == combined.total
+    assert (merged.min, merged.max) == (combined.min, combined.max)
+    assert merged.percentiles([50, 99]) == combined.percentiles([50, 99])
+    assert LatencyHistogram.from_snapshot(combined.snapshot()).counts == combined.counts
+    
+    merged.merge(LatencyHistogram())
+    assert merged.total == combined.total
+
+def test_merge_rejects_other_layout():
+    snapshot = LatencyHistogram().snapshot()
+    snapshot['sub_bucket_bits'] += 1
+    with pytest.raises(ValueError, match='layout'):
+        LatencyHistogram().merge(snapshot)
+
+def test_reset():
+    histogram = LatencyHistogram()
+    histogram.record(0.1)
+    histogram.reset()
+    assert len(histogram) == 0 and histogram.min is None and not any(histogram.counts)
+
+def test_record_array_matches_record():
+    rng = np.random.default_rng(3)
+    samples = np.concatenate([
+        rng.lognormal(mean=-5, sigma=3, size=50000),
+        [-1.0, 0.0, 1e-7, 127e-6, 128e-6, 255e-6, 256e-6, HIGHEST_US / 1000000 * 5]
+    ])
+    single = LatencyHistogram()
+    for value in samples:
+        single.record(float(value))
+    array = LatencyHistogram()
+    array.record_array(samples[:10])
+    array.record_array(samples[10:])
+    array.record_array(np.array([]))
+    assert array.counts == single.counts
+    assert (array.total, array.min, array.max) == (single.total, single.min, single.max)
+    assert array.sum == pytest.approx(single.sum)
+    # snapshot은 JSON으로 저장되므로 numpy 정수가 섞이면 안 됨
+    json.dumps(array.snapshot())
@@ -0,0 +1,107 @@
+"""
+FDS 이상거래 알림 dispatcher
+- consumer가 발행한 알림 stream(ALERT_STREAM)을 consumer group으로 읽음
+- tx_id 기준 중복 제거 (재전달된 배치) + 사용자별 rate limit
+- 남은 알림을 배치 단위로 webhook 전송 (ALERT_WEBHOOK_URL 미지정 시 stdout)
+- 전송 성공 후 XACK → 실패 시 미ACK 엔트리는 XAUTOCLAIM으로 재시도
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import asyncio
+import redis.asyncio as aioredis
+from config import Config
+from transport import StreamTransport
+from alerts import AlertDeduper, UserRateLimiter, WebhookNotifier
+
+PURGE_INTERVAL = 60  # rate limiter에서 빈 사용자 정리 주기 (초)
+
+async def run_dispatcher():
+    print(f"[Dispatcher] Starting... (stream: {Config.ALERT_STREAM}, group: {Config.ALERT_GROUP})")
+    print(f"[Dispatcher] Webhook: {Config.ALERT_WEBHOOK_URL or 'stdout'}")
+    print(f"[Dispatcher] Rate limit: {Config.ALERT_RATE_LIMIT}/{Config.ALERT_RATE_WINDOW:g}s per user")
+    sys.stdout.flush()
+    
+    redis_client = await aioredis.from_url(
+        f"redis://{Config.REDIS_HOST}:{Config.REDIS_PORT}",
+        decode_responses=False
+    )
+    transport = StreamTransport(
+        redis_client,
+        Config.ALERT_STREAM,
+        group=Config.ALERT_GROUP,
+        consumer=Config.STREAM_CONSUMER or f"{socket.gethostname()}-{os.getpid()}",
+        block_ms=Config.ALERT_BLOCK_MS,
+        claim_idle_ms=Config.STREAM_CLAIM_IDLE_MS,
+        claim_interval=Config.STREAM_CLAIM_INTERVAL
+    )
+    await transport.setup()
+    
+    deduper = AlertDeduper(Config.ALERT_DEDUP_SIZE)
+    limiter = UserRateLimiter(Config.ALERT_RATE_LIMIT, Config.ALERT_RATE_WINDOW)
+    notifier = WebhookNotifier(Config.ALERT_WEBHOOK_URL, Config.ALERT_WEBHOOK_TIMEOUT)
+    next_purge_at = time.time() + PURGE_INTERVAL
+    
+    try:
+        while True:
+            # 쌓여 있는 알림은 한 번에 최대 ALERT_BATCH_SIZE건, 비어 있으면 ALERT_BLOCK_MS 대기
+            payloads, ack_ids = await transport.fetch(Config.ALERT_BATCH_SIZE)
+            now = time.time()
+            if now >= next_purge_at:
+                limiter.purge(now)
+                next_purge_at = now + PURGE_INTERVAL
+            if not payloads:
+                continue
+            
+            batch = []
+            duplicates = 0
+            suppressed = 0
+            for payload in payloads:
+                alert = json.loads(payload)
+                if not deduper.is_new(alert['tx_id']):
+                    duplicates += 1
+                elif not limiter.allow(alert['user_id'], now):
+                    suppressed += 1
+                else:
+                    batch.append(alert)
+            
+            if batch:
+                try:
+                    await notifier.send(batch, suppressed)
+                except Exception as e:
+                    # ACK하지 않음 → STREAM_CLAIM_IDLE_MS 후 재전송 (중복 제거/rate limit 기록도 되돌림)
+                    deduper.forget([alert['tx_id'] for alert in batch])
+                    for alert in batch:
+                        limiter.refund(alert['user_id'], now)
+                    print(f"[Dispatcher] Webhook failed ({len(batch)} alerts): {e}")
+                    sys.stdout.flush()
+                    continue
+            await transport.ack(ack_ids)
+            if not batch:
+                continue
+            
+            # 탐지(processed_at) → 알림 전송까지 지연
+            delay = time.time() - min(alert['detected_at'] for alert in batch)
+            print(f"[Dispatcher] Sent {len(batch)} alerts "
+                  f"(duplicates: {duplicates}, rate-limited: {suppressed}, delay max {delay * 1000:.1f}ms)")
+            sys.stdout.flush()
+    
+    finally:
+        await redis_client.aclose()
+
+def main():
+    print("=" * 60)
+    print("FDS Alert Dispatcher")
+    print("=" * 60)
+    sys.stdout.flush()
+    
+    if not Config.ALERT_STREAM:
+        print("[Dispatcher] ALERT_STREAM is empty, nothing to dispatch")
+        return
+    asyncio.run(run_dispatcher())
+
+if __name__ == "__main__":
+    main()
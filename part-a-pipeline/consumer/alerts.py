@@ -0,0 +1,136 @@
+"""
+이상거래 알림 fast path
+- AlertPublisher: consumer가 룰 평가 직후 탐지 건을 Redis Stream에 XADD (DB 조회 없음, 배치 쓰기와 병렬)
+- AlertDeduper / UserRateLimiter / WebhookNotifier: alert_dispatcher.py에서 사용
+재전달된 배치는 같은 tx_id로 다시 발행될 수 있으므로 dispatcher에서 중복 제거
+"""
+
+import json
+import time
+import asyncio
+import urllib.request
+from bisect import bisect_left
+from collections import OrderedDict
+from velocity import SlidingWindowCounter
+
+def make_alert(tx: dict, fraud_rules: list) -> dict:
+    return {
+        'tx_id': tx['tx_id'],
+        'user_id': tx['user_id'],
+        'amount': tx['amount'],
+        'merchant': tx.get('merchant'),
+        'merchant_category': tx.get('merchant_category'),
+        'fraud_rules': fraud_rules,
+        'created_at': tx['created_at'],
+        'detected_at': tx['processed_at'],
+    }
+
+class AlertPublisher:
+    field = 'data'
+    
+    def __init__(self, redis_client, stream_name: str, maxlen: int):
+        self.redis = redis_client
+        self.stream_name = stream_name
+        self.maxlen = maxlen
+        self._pending = set()
+    
+    def publish(self, alerts: list):
+        """기다리지 않고 발행 (배치 처리 경로를 막지 않음)"""
+        if not alerts:
+            return
+        task = asyncio.create_task(self._send(alerts))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+    
+    async def _send(self, alerts: list):
+        pipe = self.redis.pipeline(transaction=False)
+        for alert in alerts:
+            pipe.xadd(self.stream_name, {self.field: json.dumps(alert, ensure_ascii=False)},
+                      maxlen=self.maxlen, approximate=True)
+        try:
+            await pipe.execute()
+        except Exception as e:
+            print(f"[Alert] Publish failed ({len(alerts)} alerts): {e}")
+    
+    async def close(self):
+        if self._pending:
+            await asyncio.gather(*self._pending, return_exceptions=True)
+
+class AlertDeduper:
+    """최근 본 tx_id (최대 max_size개, 오래된 것부터 제거)"""
+    
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._seen = OrderedDict()
+    
+    def is_new(self, tx_id: str) -> bool:
+        if tx_id in self._seen:
+            return False
+        self._seen[tx_id] = None
+        if len(self._seen) > self.max_size:
+            self._seen.popitem(last=False)
+        return True
+    
+    def forget(self, tx_ids: list):
+        """전송 실패한 알림은 재전달 시 다시 보낼 수 있도록 제거"""
+        for tx_id in tx_ids:
+            self._seen.pop(tx_id, None)
+
+class UserRateLimiter:
+    """사용자별 window초 동안 최대 limit건"""
+    
+    def __init__(self, limit: int, window: float):
+        self.limit = limit
+        self.window = window
+        self._users = {}
+    
+    def allow(self, user_id: str, now: float) -> bool:
+        counter = self._users.get(user_id)
+        if counter is None:
+            counter = self._users[user_id] = SlidingWindowCounter(self.window)
+        if counter.count(now) >= self.limit:
+            return False
+        counter.add(now)
+        return True
+    
+    def refund(self, user_id: str, now: float):
+        """allow(user_id, now)로 쓴 1건을 되돌림 (전송 실패 후 재전달 시 한도에 다시 걸리지 않도록)"""
+        counter = self._users.get(user_id)
+        if counter is None:
+            return
+        # allow가 add(now)로 넣은 시각 1건만 정렬 위치에서 제거
+        events = counter.events
+        index = bisect_left(events, now)
+        if index < len(events) and events[index] == now:
+            del events[index]
+    
+    def purge(self, now: float) -> int:
+        """윈도우가 빈 사용자 제거"""
+        idle = [user_id for user_id, counter in self._users.items() if counter.count(now) == 0]
+        for user_id in idle:
+            del self._users[user_id]
+        return len(idle)
+
+class WebhookNotifier:
+    """webhook URL로 JSON POST (URL이 없으면 stdout 출력으로 대체)"""
+    
+    def __init__(self, url: str, timeout: float):
+        self.url = url
+        self.timeout = timeout
+    
+    def _post(self, body: bytes):
+        request = urllib.request.Request(
+            self.url, data=body, headers={'Content-Type': 'application/json'}, method='POST'
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            response.read()
+    
+    async def send(self, alerts: list, suppressed: int):
+        payload = {'alerts': alerts, 'suppressed': suppressed, 'sent_at': time.time()}
+        if not self.url:
+            for alert in alerts:
+                print(f"[Alert] {alert['user_id']} {alert['amount']:,}원 "
+                      f"{', '.join(alert['fraud_rules'])} (tx: {alert['tx_id']})")
+            return
+        # urllib은 blocking → 스레드에서 실행해 이벤트 루프를 막지 않음
+        await asyncio.to_thread(self._post, json.dumps(payload, ensure_ascii=False).encode())
@@ -0,0 +1,558 @@
+"""
+FDS 룰 오프라인 백테스트 (저장된 거래 데이터를 event-time 순으로 replay)
+- 입력: sample_data_generator 출력 (CSV / .npy 컬럼 디렉터리 / Parquet)
+        또는 fds.transactions COPY export (\\copy fds.transactions TO 'tx.csv' CSV HEADER)
+- 임계값 조합 여러 개를 한 번에 평가: 컬럼 파싱 1회, 상태 피처(velocity 건수, 이동평균 금액)는
+  state 설정(velocity_window, amount_avg_window)별 1회, 조건 마스크는 조합 간 공유
+- 피처는 FDSRuleEngine.check를 created_at 순으로 호출한 결과와 같음 (--verify N으로 앞 N건 대조)
+- 결과: 조합별 precision / recall (is_suspected_fraud, fraud_type별), 룰별 탐지 수/비율, 처리량
+
+사용법:
+    python backtest.py ../../analysis/data/sample_transactions.csv
+    python backtest.py /data/corpus_100m --grid VELOCITY.threshold=3,5,8 --grid AMOUNT_SPIKE.ratio=5,10
+    python backtest.py /data/corpus_100m --grid 'DAWN_HIGH_AMOUNT.when.amount.>=3000000,5000000' --grid state.velocity_window=30,60
+    python backtest.py tx_export.csv --start 2026-02-01 --end 2026-02-02 --output backtest.json --verify 100000
+"""
+
+import os
+import sys
+import csv
+import json
+import time
+import copy
+import argparse
+import itertools
+import numpy as np
+from datetime import datetime
+from rule_dsl import RulePlan, RuleError, FIELDS, FIELD_DEFAULTS
+from fds_rules import FDSRuleEngine, DEFAULT_RULES_PATH
+
+TRUE_VALUES = frozenset(['true', 't', '1', 'yes'])
+
+# ============================================
+# 코퍼스 (공유 컬럼)
+# ============================================
+
+class Column:
+    """코드 + 사전(문자열 필드) 또는 값 배열(숫자/bool 필드)"""
+    __slots__ = ('values', 'vocab')
+    
+    def __init__(self, values: np.ndarray, vocab: list = None):
+        self.values = values
+        self.vocab = vocab
+    
+    @classmethod
+    def encode(cls, items: list):
+        index = {}
+        codes = np.fromiter((index.setdefault(item, len(index)) for item in items), dtype=np.int32, count=len(items))
+        return cls(codes, list(index))
+    
+    def decoded(self) -> np.ndarray:
+        if self.vocab is None:
+            return self.values
+        vocab = np.empty(len(self.vocab), dtype=object)
+        vocab[:] = self.vocab
+        return vocab[self.values]
+    
+    def isin(self, values) -> np.ndarray:
+        if self.vocab is None:
+            return np.isin(self.values, list(values))
+        codes = [code for code, item in enumerate(self.vocab) if item in values]
+        return np.isin(self.values, codes)
+    
+    def take(self, order: np.ndarray):
+        return Column(self.values[order], self.vocab)
+
+class Corpus:
+    """
+    created_at 순 정렬된 컬럼
+    - user: 사용자 코드 (그룹핑용), amount: float64
+    - fields: 룰 조건 필드 (rule_dsl.FIELDS 중 데이터에 있는 것)
+    - label: is_suspected_fraud (없으면 is_fraud), fraud_type: Column 또는 None
+    """
+    
+    def __init__(self, created_at, user, amount, fields: dict, label, fraud_type, source: str, label_name: str):
+        order = np.argsort(created_at, kind='stable')
+        self.created_at = np.asarray(created_at, dtype=np.float64)[order]
+        self.user = np.asarray(user)[order]
+        self.amount = np.asarray(amount, dtype=np.float64)[order]
+        self.fields = {name: column.take(order) for name, column in fields.items()}
+        self.label = np.asarray(label, dtype=bool)[order]
+        self.fraud_type = fraud_type.take(order) if fraud_type is not None else None
+        self.source = source
+        self.label_name = label_name
+        self.n = len(order)
+    
+    def slice(self, start_ts: float = None, end_ts: float = None):
+        low = 0 if start_ts is None else int(np.searchsorted(self.created_at, start_ts, side='left'))
+        high = self.n if end_ts is None else int(np.searchsorted(self.created_at, end_ts, side='left'))
+        if low == 0 and high == self.n:
+            return self
+        sliced = copy.copy(self)
+        window = slice(low, high)
+        sliced.created_at = self.created_at[window]
+        sliced.user = self.user[window]
+        sliced.amount = self.amount[window]
+        sliced.fields = {name: Column(column.values[window], column.vocab) for name, column in self.fields.items()}
+        sliced.label = self.label[window]
+        sliced.fraud_type = Column(self.fraud_type.values[window], self.fraud_type.vocab) if self.fraud_type else None
+        sliced.n = high - low
+        return sliced
+    
+    def column(self, field: str) -> Column:
+        """조건 필드 (데이터에 없으면 FIELD_DEFAULTS 값으로 채움, FDSRuleEngine의 tx.get 기본값과 동일)"""
+        column = self.fields.get(field)
+        if column is None:
+            default = FIELD_DEFAULTS[field]
+            if FIELDS[field][0] == 'num':
+                column = Column(np.full(self.n, default, dtype=np.float64))
+            else:
+                column = Column(np.zeros(self.n, dtype=np.int32), [default])
+            self.fields[field] = column
+        return column
+    
+    def transactions(self, limit: int) -> list:
+        """앞 limit건을 FDSRuleEngine 입력 dict로 (--verify용)"""
+        n = min(limit, self.n)
+        decoded = {name: column.decoded()[:n].tolist() for name, column in self.fields.items()}
+        rows = []
+        for i in range(n):
+            tx = {name: values[i] for name, values in decoded.items()}
+            tx['user_id'] = int(self.user[i])
+            tx['amount'] = self.amount[i]
+            tx['created_at'] = float(self.created_at[i])
+            rows.append(tx)
+        return rows
+
+def _parse_bool(value) -> bool:
+    return str(value).strip().lower() in TRUE_VALUES
+
+def _parse_timestamp(value: str) -> float:
+    try:
+        return float(value)
+    except ValueError:
+        # COPY export: '2026-02-05 12:34:56.789' (timestamp, 세션 타임존 기준 로컬 시각)
+        return datetime.fromisoformat(value).timestamp()
+
+def load_csv(path: str) -> Corpus:
+    with open(path, newline='', encoding='utf-8') as f:
+        reader = csv.DictReader(f)
+        header = reader.fieldnames or []
+        time_field = 'created_at' if 'created_at' in header else 'datetime'
+        label_field = 'is_suspected_fraud' if 'is_suspected_fraud' in header else 'is_fraud'
+        if time_field not in header or label_field not in header:
+            raise ValueError(f"{path}: needs created_at/datetime and is_suspected_fraud/is_fraud columns")
+        field_names = [name for name in FIELDS if name in header and name != 'amount']
+        
+        created_at, users, amounts, labels, fraud_types = [], [], [], [], []
+        values = {name: [] for name in field_names}
+        for row in reader:
+            created_at.append(_parse_timestamp(row[time_field]))
+            users.append(row['user_id'])
+            amounts.append(float(row['amount']))
+            labels.append(_parse_bool(row[label_field]))
+            fraud_types.append(row.get('fraud_type') or '')
+            for name in field_names:
+                values[name].append(row[name])
+    
+    fields = {}
+    for name in field_names:
+        if FIELDS[name][0] == 'num':
+            # COPY export의 NULL은 빈 문자열 → 엔진과 같은 기본값
+            default = FIELD_DEFAULTS[name]
+            fields[name] = Column(np.array([float(v) if v else default for v in values[name]], dtype=np.float64))
+        elif name == 'is_weekend':
+            fields[name] = Column(np.array([_parse_bool(v) for v in values[name]]))
+        else:
+            fields[name] = Column.encode(values[name])
+    fraud_type = Column.encode(fraud_types) if 'fraud_type' in header else None
+    return Corpus(np.array(created_at), Column.encode(users).values, np.array(amounts), fields,
+                  np.array(labels), fraud_type, path, label_field)
+
+def load_npy(path: str) -> Corpus:
+    """sample_data_generator --format npy 디렉터리 (코드 컬럼 + meta.json 코드표)"""
+    with open(os.path.join(path, 'meta.json'), encoding='utf-8') as f:
+        meta = json.load(f)
+    codes = meta['codes']
+    load = lambda name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode='r')
+    fields = {}
+    for name in FIELDS:
+        if name == 'amount' or name not in meta['columns']:
+            continue
+        if name in codes:
+            fields[name] = Column(np.asarray(load(name), dtype=np.int32), codes[name])
+        elif FIELDS[name][0] == 'num':
+            fields[name] = Column(np.asarray(load(name), dtype=np.float64))
+        else:
+            fields[name] = Column(np.asarray(load(name)))
+    return Corpus(load('created_at'), load('user'), load('amount'), fields,
+                  load('is_suspected_fraud'), Column(np.asarray(load('fraud_type'), dtype=np.int32), codes['fraud_type']),
+                  path, 'is_suspected_fraud')
+
+def load_parquet(path: str) -> Corpus:
+    try:
+        import pyarrow.parquet as pq
+        import pyarrow.types as pa_types
+    except ImportError:
+        raise RuntimeError("Parquet input requires pyarrow (pip install pyarrow)")
+    table = pq.read_table(path).unify_dictionaries()
+    names = table.column_names
+    
+    def column(name: str) -> Column:
+        chunks = table.column(name).chunks
+        if chunks and pa_types.is_dictionary(chunks[0].type):
+            values = np.concatenate([chunk.indices.to_numpy(zero_copy_only=False) for chunk in chunks])
+            return Column(values.astype(np.int32), chunks[0].dictionary.to_pylist())
+        values = table.column(name).to_numpy()
+        if values.dtype == object:
+            return Column.encode(values.tolist())
+        return Column(values)
+    
+    label_name = 'is_suspected_fraud' if 'is_suspected_fraud' in names else 'is_fraud'
+    created_at = table.column('created_at')
+    if pa_types.is_timestamp(created_at.type):
+        created_at = created_at.cast('int64').to_numpy() / {'s': 1, 'ms': 1e3, 'us': 1e6, 'ns': 1e9}[created_at.type.unit]
+    else:
+        created_at = created_at.to_numpy()
+    fields = {}
+    for name in FIELDS:
+        if name == 'amount' or name not in names:
+            continue
+        fields[name] = column(name)
+        if FIELDS[name][0] == 'num' and fields[name].vocab is None:
+            fields[name] = Column(fields[name].values.astype(np.float64))
+    return Corpus(created_at, column('user_id').values, table.column('amount').to_numpy(), fields,
+                  table.column(label_name).to_numpy(), column('fraud_type') if 'fraud_type' in names else None,
+                  path, label_name)
+
+def load_corpus(path: str) -> Corpus:
+    if os.path.isdir(path):
+        return load_npy(path)
+    if path.endswith('.parquet'):
+        return load_parquet(path)
+    return load_csv(path)
+
+# ============================================
+# 상태 피처 (FDSRuleEngine.check를 event-time 순으로 호출한 것과 동일)
+# ============================================
+
+def velocity_counts(created_at: np.ndarray, user: np.ndarray, window: float) -> np.ndarray:
+    """행별 같은 사용자의 (t - window, t] 구간 거래 수 (자기 자신과 앞선 동시각 거래 포함)"""
+    n = len(created_at)
+    if n == 0:
+        return np.zeros(0, dtype=np.int64)
+    order = np.argsort(user, kind='stable')  # 사용자 내에서는 created_at 순 유지
+    t = created_at[order]
+    u = user[order].astype(np.int64)
+    # (사용자, 시각)을 정수 키 하나로 → 전체 배열에서 한 번의 이진 탐색 (사용자 경계를 넘지 않음)
+    t0 = t.min()
+    span = t.max() - t0 + window + 1
+    scale = 1e6
+    while (int(u.max()) + 1) * span * scale >= 2 ** 62 and scale > 1:
+        scale /= 1000
+    stride = np.int64(np.ceil(span * scale))
+    keys = u * stride + np.round((t - t0) * scale).astype(np.int64)
+    cutoffs = u * stride + np.round((t - window - t0) * scale).astype(np.int64)
+    counts = np.arange(n) - np.searchsorted(keys, cutoffs, side='right') + 1
+    result = np.empty(n, dtype=np.int64)
+    result[order] = counts
+    return result
+
+def average_amounts(amount: np.ndarray, user: np.ndarray, window: int, decay: float = 0.99) -> np.ndarray:
+    """
+    행별 갱신 전 사용자 평균 금액 (FDSRuleEngine._get_avg_amount / _update_avg_amount)
+    - window건까지: 누적합 / 건수
+    - 이후: sum = (sum + amount) * decay, count = window → 선형 점화식을 사용자 구간별 prefix scan으로 계산
+    """
+    n = len(amount)
+    if n == 0:
+        return np.zeros(0)
+    order = np.argsort(user, kind='stable')
+    a = amount[order]
+    u = user[order]
+    starts = np.flatnonzero(np.r_[True, u[1:] != u[:-1]])
+    lengths = np.diff(np.r_[starts, n])
+    position = np.arange(n) - np.repeat(starts, lengths)  # 사용자 내 순번 (0부터)
+    
+    # 갱신 후 sum: window건째(순번 window-1)까지는 누적합
+    cumsum = np.cumsum(a)
+    sums = cumsum - np.repeat(cumsum[starts] - a[starts], lengths)
+    # 순번 window-1부터: x[window-1] = 누적합, x[j] = decay * x[j-1] + decay * a[j]
+    recurrent = position >= window - 1
+    if np.any(position >= window):
+        x = np.where(position == window - 1, sums, decay * a)
+        offset_in_run = position - (window - 1)
+        step = 1
+        while step <= offset_in_run.max():
+            shifted = np.zeros(n)
+            shifted[step:] = x[:-step]
+            x = np.where(offset_in_run >= step, x + decay ** step * shifted, x)
+            step *= 2
+        sums = np.where(recurrent, x, sums)
+    
+    counts = np.minimum(position + 1, window)
+    # 갱신 전 평균 = 직전 행의 (sum / count), 사용자 첫 거래는 0
+    before = np.zeros(n)
+    previous = position > 0
+    before[previous] = sums[np.flatnonzero(previous) - 1] / counts[np.flatnonzero(previous) - 1]
+    result = np.empty(n)
+    result[order] = before
+    return result
+
+class FeatureCache:
+    """state 설정별 피처 1회 계산 + 조건 마스크 공유"""
+    
+    def __init__(self, corpus: Corpus):
+        self.corpus = corpus
+        self._velocity = {}
+        self._averages = {}
+        self._conditions = {}
+        self.seconds = 0.0
+    
+    def velocity(self, window: float) -> np.ndarray:
+        if window not in self._velocity:
+            start = time.perf_counter()
+            self._velocity[window] = velocity_counts(self.corpus.created_at, self.corpus.user, window)
+            self.seconds += time.perf_counter() - start
+        return self._velocity[window]
+    
+    def averages(self, window: int) -> np.ndarray:
+        if window not in self._averages:
+            start = time.perf_counter()
+            self._averages[window] = average_amounts(self.corpus.amount, self.corpus.user, window)
+            self.seconds += time.perf_counter() - start
+        return self._averages[window]
+    
+    def condition(self, condition) -> np.ndarray:
+        value = condition.value
+        key = (condition.field, condition.op, tuple(sorted(map(repr, value))) if isinstance(value, frozenset) else value)
+        mask = self._conditions.get(key)
+        if mask is None:
+            column = self.corpus.column(condition.field)
+            if condition.op in ('==', '!=', 'in', 'not_in') and column.vocab is not None:
+                values = value if isinstance(value, frozenset) else frozenset([value])
+                mask = column.isin(values)
+                if condition.op in ('!=', 'not_in'):
+                    mask = ~mask
+            elif condition.field == 'amount':
+                mask = condition.mask(self.corpus.amount)
+            else:
+                mask = condition.mask(column.decoded())
+            self._conditions[key] = mask
+        return mask
+
+# ============================================
+# 평가
+# ============================================
+
+def rule_mask(rule, plan: RulePlan, features: FeatureCache) -> np.ndarray:
+    corpus = features.corpus
+    mask = np.ones(corpus.n, dtype=bool)
+    for field, allowed in rule.index.items():
+        mask &= corpus.column(field).isin(allowed)
+    if rule.type == 'velocity':
+        mask &= features.velocity(plan.state['velocity_window']) >= rule.threshold
+    elif rule.type == 'amount_spike':
+        avg = features.averages(plan.state['amount_avg_window'])
+        mask &= (avg > 0) & (corpus.amount > avg * rule.ratio)
+    for condition in rule.conditions:
+        mask &= features.condition(condition)
+    return mask
+
+def score(predicted: np.ndarray, corpus: Corpus) -> dict:
+    label = corpus.label
+    tp = int(np.count_nonzero(predicted & label))
+    flagged = int(np.count_nonzero(predicted))
+    positives = int(np.count_nonzero(label))
+    precision = tp / flagged if flagged else 0.0
+    recall = tp / positives if positives else 0.0
+    result = {
+        'flagged': flagged,
+        'flag_rate': flagged / corpus.n if corpus.n else 0.0,
+        'tp': tp,
+        'fp': flagged - tp,
+        'fn': positives - tp,
+        'precision': precision,
+        'recall': recall,
+        'f1': 2 * precision * recall / (precision + recall) if precision + recall else 0.0,
+    }
+    if corpus.fraud_type is not None:
+        by_type = {}
+        for code, name in enumerate(corpus.fraud_type.vocab):
+            if not name:
+                continue
+            rows = corpus.fraud_type.values == code
+            total = int(np.count_nonzero(rows))
+            by_type[name] = {'count': total, 'recall': int(np.count_nonzero(predicted & rows)) / total if total else 0.0}
+        result['recall_by_type'] = by_type
+    return result
+
+def evaluate(name: str, plan: RulePlan, features: FeatureCache, rule_cache: dict) -> dict:
+    """룰 마스크는 (state, 룰 정의)가 같으면 조합 간 재사용"""
+    corpus = features.corpus
+    start = time.perf_counter()
+    predicted = np.zeros(corpus.n, dtype=bool)
+    rules = []
+    for rule, spec in zip(plan.rules, plan.specs):
+        key = json.dumps([plan.state, spec], sort_keys=True, ensure_ascii=False)
+        mask = rule_cache.get(key)
+        if mask is None:
+            mask = rule_cache[key] = rule_mask(rule, plan, features)
+        predicted |= mask
+        hits = int(np.count_nonzero(mask))
+        rules.append({
+            'rule': rule.name,
+            'hits': hits,
+            'hit_rate': hits / corpus.n if corpus.n else 0.0,
+            'precision': int(np.count_nonzero(mask & corpus.label)) / hits if hits else 0.0,
+        })
+    return {'name': name, 'state': plan.state, **score(predicted, corpus), 'rules': rules,
+            'seconds': time.perf_counter() - start}
+
+# ============================================
+# 임계값 조합
+# ============================================
+
+def parse_grid(items: list) -> list:
+    """['VELOCITY.threshold=3,5', 'DAWN_HIGH_AMOUNT.when.amount.>=3000000'] → [(경로, [값...]), ...]"""
+    grid = []
+    for item in items:
+        path, separator, values = item.rpartition('=')
+        if not separator or not path:
+            raise SystemExit(f"--grid needs PATH=v1,v2,... (got {item!r})")
+        parsed = []
+        for value in values.split(','):
+            try:
+                parsed.append(json.loads(value))
+            except json.JSONDecodeError:
+                parsed.append(value)
+        grid.append((path, parsed))
+    return grid
+
+def apply_override(spec: dict, path: str, value):
+    """'RULE.key.sub' 또는 'state.key' 경로에 값 설정 (룰 이름으로 rules 항목 선택)"""
+    head, _, rest = path.partition('.')
+    if head == 'state':
+        target = spec.setdefault('state', {})
+    else:
+        target = next((rule for rule in spec['rules'] if rule.get('name') == head), None)
+        if target is None:
+            raise SystemExit(f"--grid {path}: no rule named {head}")
+    keys = rest.split('.')
+    for key in keys[:-1]:
+        target = target.setdefault(key, {})
+    target[keys[-1]] = value
+
+def build_configs(rule_paths: list, grid: list) -> list:
+    """룰 파일 × 그리드 조합 → [(이름, RulePlan), ...]"""
+    configs = []
+    for path in rule_paths:
+        with open(path, encoding='utf-8') as f:
+            base = json.load(f)
+        label = os.path.basename(path)
+        for values in itertools.product(*(values for _, values in grid)):
+            spec = copy.deepcopy(base)
+            overrides = []
+            for (key, _), value in zip(grid, values):
+                apply_override(spec, key, value)
+                overrides.append(f"{key}={value}")
+            try:
+                plan = RulePlan(spec, source=path)
+            except RuleError as e:
+                raise SystemExit(f"{label} {', '.join(overrides)}: {e}")
+            plan.specs = spec['rules']
+            name = ', '.join(overrides) if overrides else label
+            configs.append((f"{label}: {name}" if len(rule_paths) > 1 and overrides else name, plan))
+    return configs
+
+def verify(corpus: Corpus, plan: RulePlan, rules_path: str, features: FeatureCache, limit: int) -> int:
+    """앞 limit건을 FDSRuleEngine.check로 돌려 룰별 탐지 결과가 같은지 확인 (다른 행 수 반환)"""
+    engine = FDSRuleEngine(rules_path=rules_path)
+    engine.rules.plan = plan
+    engine.state.velocity_window = engine.velocity_window = plan.state['velocity_window']
+    engine.amount_avg_window = plan.state['amount_avg_window']
+    transactions = corpus.transactions(limit)
+    masks = [rule_mask(rule, plan, features)[:len(transactions)] for rule in plan.rules]
+    mismatches = 0
+    for i, tx in enumerate(transactions):
+        _, fraud_rules = engine.check(tx)
+        fired = {message.rule for message in fraud_rules}
+        expected = {rule.name for rule, mask in zip(plan.rules, masks) if mask[i]}
+        if fired != expected:
+            if mismatches < 5:
+                print(f"[Verify] row {i}: engine {sorted(fired)} vs backtest {sorted(expected)}")
+            mismatches += 1
+    return mismatches
+
+def parse_date(value: str) -> float:
+    return datetime.fromisoformat(value).timestamp() if value else None
+
+def main():
+    parser = argparse.ArgumentParser(description="FDS rule backtest over a stored corpus")
+    parser.add_argument('corpus', help="CSV / .parquet / npy directory")
+    parser.add_argument('--rules', action='append', default=None, help=f"rule file(s) (default: {DEFAULT_RULES_PATH})")
+    parser.add_argument('--grid', action='append', default=[], help="PATH=v1,v2 (e.g. VELOCITY.threshold=3,5,8)")
+    parser.add_argument('--start', default=None, help="created_at >= (ISO date/time)")
+    parser.add_argument('--end', default=None, help="created_at < (ISO date/time)")
+    parser.add_argument('--verify', type=int, default=0, help="check first N rows against FDSRuleEngine")
+    parser.add_argument('--top', type=int, default=20, help="configs to print (by F1)")
+    parser.add_argument('--output', default=None, help="results JSON")
+    args = parser.parse_args()
+    rule_paths = args.rules or [DEFAULT_RULES_PATH]
+    configs = build_configs(rule_paths, parse_grid(args.grid))
+    
+    load_start = time.perf_counter()
+    corpus = load_corpus(args.corpus).slice(parse_date(args.start), parse_date(args.end))
+    load_seconds = time.perf_counter() - load_start
+    if corpus.n == 0:
+        raise SystemExit("[Backtest] No rows in range")
+    print(f"[Backtest] {corpus.n:,} rows from {corpus.source} ({load_seconds:.1f}s), "
+          f"{datetime.fromtimestamp(corpus.created_at[0])} ~ {datetime.fromtimestamp(corpus.created_at[-1])}")
+    print(f"[Backtest] Labels: {corpus.label_name} ({int(corpus.label.sum()):,} positive)")
+    if corpus.label_name == 'is_fraud':
+        print("[Backtest] Warning: no is_suspected_fraud column, scoring against the pipeline's own is_fraud")
+    sys.stdout.flush()
+    
+    features = FeatureCache(corpus)
+    if args.verify:
+        mismatches = verify(corpus, configs[0][1], rule_paths[0], features, args.verify)
+        print(f"[Verify] {min(args.verify, corpus.n):,} rows vs FDSRuleEngine.check: "
+              f"{'OK' if mismatches == 0 else f'{mismatches} mismatches'}")
+    
+    eval_start = time.perf_counter()
+    rule_cache = {}
+    results = [evaluate(name, plan, features, rule_cache) for name, plan in configs]
+    eval_seconds = time.perf_counter() - eval_start
+    
+    ranked = sorted(results, key=lambda r: -r['f1'])[:args.top]
+    width = max(len('config'), *(len(result['name']) for result in ranked))
+    print(f"\n{'config':{width}} {'flagged':>9} {'prec':>6} {'recall':>6} {'f1':>6}  recall by type")
+    for result in ranked:
+        by_type = ', '.join(f"{name} {item['recall']:.0%}" for name, item in result.get('recall_by_type', {}).items())
+        print(f"{result['name']:{width}} {result['flagged']:>9,} {result['precision']:>6.1%} "
+              f"{result['recall']:>6.1%} {result['f1']:>6.3f}  {by_type}")
+    
+    best = max(results, key=lambda r: r['f1'])
+    print(f"\n[Rules] {best['name']}")
+    for rule in best['rules']:
+        print(f"  {rule['rule']:20} hits {rule['hits']:>9,} ({rule['hit_rate']:.3%}), precision {rule['precision']:.1%}")
+    
+    throughput = corpus.n * len(configs) / (eval_seconds or 1e-9)
+    print(f"\n[Backtest] {len(configs)} configs × {corpus.n:,} rows: features {features.seconds:.2f}s, "
+          f"evaluation {eval_seconds:.2f}s ({throughput:,.0f} row-configs/s)")
+    
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({
+                'corpus': corpus.source,
+                'rows': corpus.n,
+                'label': corpus.label_name,
+                'load_seconds': load_seconds,
+                'feature_seconds': features.seconds,
+                'eval_seconds': eval_seconds,
+                'results': results,
+            }, f, ensure_ascii=False, indent=2)
+        print(f"[Backtest] Results → {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,5 @@
 import os
+import zlib
 
 class Config:
     # PostgreSQL
@@ -12,14 +13,111 @@ class Config:
     # Redis
     REDIS_HOST = os.getenv('REDIS_HOST', 'localhost')
     REDIS_PORT = int(os.getenv('REDIS_PORT', 6379))
+    QUEUE_NAME = os.getenv('QUEUE_NAME', 'tx_queue')
+    # user_id 해시 기준 샤드 수 (generator/consumer 동일 값 사용)
+    NUM_SHARDS = int(os.getenv('NUM_SHARDS', 1))
+    
+    # 큐 전송 방식: list (LPUSH/RPOP) | stream (XADD/XREADGROUP/XACK)
+    TRANSPORT = os.getenv('TRANSPORT', 'list')
+    LIST_BLOCK_TIMEOUT = float(os.getenv('LIST_BLOCK_TIMEOUT', 1))  # 빈 큐 대기 시간 (초)
+    STREAM_GROUP = os.getenv('STREAM_GROUP', 'fds-consumers')
+    STREAM_CONSUMER = os.getenv('STREAM_CONSUMER', '')  # 비우면 hostname-pid
+    STREAM_BLOCK_MS = int(os.getenv('STREAM_BLOCK_MS', 1000))
+    STREAM_CLAIM_IDLE_MS = int(os.getenv('STREAM_CLAIM_IDLE_MS', 30000))  # 이 시간 넘게 ACK 안 된 엔트리 회수
+    STREAM_CLAIM_INTERVAL = float(os.getenv('STREAM_CLAIM_INTERVAL', 5))
     
     # Consumer 설정
     BATCH_SIZE = int(os.getenv('BATCH_SIZE', 500))
+    MAX_BATCH_SIZE = int(os.getenv('MAX_BATCH_SIZE', BATCH_SIZE * 4))  # 큐 적체 시 배치 상한
+    # 프로세스 전체 DB 커넥션 풀 크기 (샤드 모드에서는 워커 수로 나눠 사용)
+    DB_POOL_MIN_SIZE = int(os.getenv('DB_POOL_MIN_SIZE', 10))
+    DB_POOL_MAX_SIZE = int(os.getenv('DB_POOL_MAX_SIZE', 50))
+    SINK_MODE = os.getenv('SINK_MODE', 'insert')  # insert | copy | null (벤치마크용, DB 쓰기 없음)
+    # ON CONFLICT 대상 (database/init_schema_partitioned.sql 사용 시 tx_id,created_at)
+    TX_CONFLICT_TARGET = os.getenv('TX_CONFLICT_TARGET', 'tx_id')
+    # 분 단위 집계(fds.tx_rollup_minute, fds.rule_hits_minute)를 배치와 같은 트랜잭션에서 갱신
+    ROLLUP_ENABLED = os.getenv('ROLLUP_ENABLED', '1') == '1'
+    # 파이프라인 모드: fetch / evaluate / write를 겹쳐 실행 (0이면 배치 하나씩 순차 처리)
+    PIPELINE_WRITERS = int(os.getenv('PIPELINE_WRITERS', 0))  # 동시 DB writer 수
+    PIPELINE_DEPTH = int(os.getenv('PIPELINE_DEPTH', 8))  # fetch~ACK 사이 최대 배치 수
+    
+    # 이상거래 알림 fast path: 탐지 즉시 Redis Stream에 발행 (비우면 비활성)
+    ALERT_STREAM = os.getenv('ALERT_STREAM', 'fraud_alerts')
+    ALERT_STREAM_MAXLEN = int(os.getenv('ALERT_STREAM_MAXLEN', 100000))  # 근사 MAXLEN (오래된 알림부터 삭제)
+    # alert_dispatcher.py
+    ALERT_GROUP = os.getenv('ALERT_GROUP', 'alert-dispatchers')
+    ALERT_WEBHOOK_URL = os.getenv('ALERT_WEBHOOK_URL', '')  # 비우면 stdout 출력
+    ALERT_WEBHOOK_TIMEOUT = float(os.getenv('ALERT_WEBHOOK_TIMEOUT', 5))
+    ALERT_BATCH_SIZE = int(os.getenv('ALERT_BATCH_SIZE', 100))
+    ALERT_BLOCK_MS = int(os.getenv('ALERT_BLOCK_MS', 200))
+    ALERT_DEDUP_SIZE = int(os.getenv('ALERT_DEDUP_SIZE', 100000))  # 중복 제거용으로 기억할 최근 tx_id 수
+    ALERT_RATE_LIMIT = int(os.getenv('ALERT_RATE_LIMIT', 3))  # 사용자별 ALERT_RATE_WINDOW초당 최대 알림 수
+    ALERT_RATE_WINDOW = float(os.getenv('ALERT_RATE_WINDOW', 60))
+    
+    # FDS 룰 정의 파일 (비우면 consumer/rules.json, 변경 시 METRICS_INTERVAL마다 확인 후 다시 로드)
+    RULES_PATH = os.getenv('RULES_PATH', '')
+    
+    # FDS 룰 엔진 사용자 상태 (0이면 제한 없음)
+    STATE_MAX_USERS = int(os.getenv('STATE_MAX_USERS', 0))
+    STATE_MAX_MEMORY_MB = int(os.getenv('STATE_MAX_MEMORY_MB', 0))
+    STATE_TTL_SECONDS = int(os.getenv('STATE_TTL_SECONDS', 86400))
+    # velocity 윈도우 event-time 허용 지연 (초): 사용자 최신 거래보다 이만큼 이전 시각으로 늦게 도착해도 정확히 셈
+    # (producer/consumer 여러 개로 도착 순서가 섞일 때, 클수록 윈도우 밖 기록을 오래 보관)
+    ALLOWED_LATENESS = float(os.getenv('ALLOWED_LATENESS', 5))
+    # 상태 스냅샷 파일 (비우면 비활성, 샤드 모드는 파일명에 _shard{n} 추가)
+    STATE_SNAPSHOT_PATH = os.getenv('STATE_SNAPSHOT_PATH', '')
+    STATE_SNAPSHOT_INTERVAL = float(os.getenv('STATE_SNAPSHOT_INTERVAL', 60))  # 초
+    # 복원 후 스냅샷 offset 이후 이미 처리된 stream 엔트리로 상태 재구성 (stream transport만)
+    # group당 consumer 1개 전제: 스냅샷 이후 같은 group의 다른 consumer가 읽었으면 재생하지 않음
+    STATE_SNAPSHOT_REPLAY = os.getenv('STATE_SNAPSHOT_REPLAY', '1') == '1'
+    # 스냅샷이 없을 때 fds.transactions 이력으로 사용자 상태 워밍업
+    STATE_BOOTSTRAP = os.getenv('STATE_BOOTSTRAP', '0') == '1'
+    STATE_BOOTSTRAP_LOOKBACK = int(os.getenv('STATE_BOOTSTRAP_LOOKBACK', STATE_TTL_SECONDS or 86400))  # 초
+    STATE_BOOTSTRAP_FETCH_SIZE = int(os.getenv('STATE_BOOTSTRAP_FETCH_SIZE', 50000))
     
     # Metrics
     METRICS_OUTPUT_PATH = os.getenv('METRICS_OUTPUT_PATH', '/app/metrics')
     METRICS_INTERVAL = int(os.getenv('METRICS_INTERVAL', 10))
+    # Prometheus exposition 포트 (0이면 비활성, 샤드 모드는 METRICS_PORT + shard)
+    METRICS_PORT = int(os.getenv('METRICS_PORT', 9101))
+    METRICS_GAUGE_INTERVAL = float(os.getenv('METRICS_GAUGE_INTERVAL', 1))  # 큐 길이/풀 게이지 갱신 주기 (초)
+    
+    # 샘플링 프로파일러: N 배치마다 1배치를 cProfile로 덤프 (0이면 비활성)
+    PROFILE_EVERY_N_BATCHES = int(os.getenv('PROFILE_EVERY_N_BATCHES', 0))
+    PROFILE_OUTPUT_PATH = os.getenv('PROFILE_OUTPUT_PATH', '')  # 미지정 시 METRICS_OUTPUT_PATH
     
     @classmethod
     def get_postgres_dsn(cls):
         return f"postgresql://{cls.POSTGRES_USER}:{cls.POSTGRES_PASSWORD}@{cls.POSTGRES_HOST}:{cls.POSTGRES_PORT}/{cls.POSTGRES_DB}"
+    
+    @classmethod
+    def get_pool_min_size(cls):
+        return max(cls.DB_POOL_MIN_SIZE // max(cls.NUM_SHARDS, 1), 1)
+    
+    @classmethod
+    def get_pool_max_size(cls):
+        return max(cls.DB_POOL_MAX_SIZE // max(cls.NUM_SHARDS, 1), 2)
+    
+    @classmethod
+    def get_queue_name(cls, shard: int = None):
+        if shard is None or cls.NUM_SHARDS <= 1:
+            return cls.QUEUE_NAME
+        return f"{cls.QUEUE_NAME}:{shard}"
+    
+    @classmethod
+    def get_shard(cls, user_id: str):
+        # 프로세스마다 달라지는 hash() 대신 crc32로 고정된 샤드 배정
+        return zlib.crc32(user_id.encode()) % cls.NUM_SHARDS
+    
+    @classmethod
+    def get_snapshot_path(cls, shard: int = None):
+        if not cls.STATE_SNAPSHOT_PATH or shard is None:
+            return cls.STATE_SNAPSHOT_PATH
+        root, ext = os.path.splitext(cls.STATE_SNAPSHOT_PATH)
+        return f"{root}_shard{shard}{ext}"
+    
+    @classmethod
+    def get_queue_names(cls):
+        if cls.NUM_SHARDS <= 1:
+            return [cls.QUEUE_NAME]
+        return [cls.get_queue_name(shard) for shard in range(cls.NUM_SHARDS)]
@@ -1,87 +1,152 @@
 """
 FDS (Fraud Detection System) 룰 엔진
-이상거래 탐지 규칙 정의
+이상거래 탐지 규칙은 rules.json (RULES_PATH)에 정의 → rule_dsl.RulePlan으로 컴파일
 """
 
-from collections import defaultdict
+import os
 import time
+import numpy as np
+from state_store import UserStateStore, UserState
+from rule_dsl import RuleSet, evaluate_batch
+
+DEFAULT_RULES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'rules.json')
+CHECK_TIMING_EVERY = 16  # check()는 N건마다 1건만 룰별 시간 측정 (측정 자체 비용 절감)
 
 class FDSRuleEngine:
-    def __init__(self):
-        # 사용자별 최근 거래 기록 (velocity 체크용)
-        self.user_history = defaultdict(list)
-        # 사용자별 평균 거래 금액 (amount spike 체크용)
-        self.user_avg_amount = defaultdict(lambda: {'sum': 0, 'count': 0})
+    def __init__(self, max_users: int = None, state_ttl: float = None,
+                 max_memory_mb: int = None, rules_path: str = None, allowed_lateness: float = 0):
+        # 룰 정의 (파일 변경 시 reload_rules()에서 다시 컴파일)
+        self.rules = RuleSet(rules_path or DEFAULT_RULES_PATH)
+        self._checks = 0
+        state_config = self.rules.plan.state
+        self.velocity_window = state_config['velocity_window']  # 초
+        self.amount_avg_window = state_config['amount_avg_window']  # 평균 금액 기준 최근 거래 수
+        self.allowed_lateness = allowed_lateness  # 초, 사용자 최신 거래보다 이만큼 이전 시각까지는 velocity 정확
         
-        # 설정값
-        self.velocity_window = 60  # 60초
-        self.velocity_threshold = 5  # 5회 이상
-        self.amount_spike_ratio = 10  # 평소의 10배
-        self.high_amount_threshold = 5000000  # 500만원 이상 고액
-        self.dawn_hours = (0, 1, 2, 3, 4, 5)  # 새벽 시간
+        # 사용자별 상태 (velocity 윈도우 + 평균 거래 금액), LRU/TTL로 메모리 상한 유지
+        self.state = UserStateStore(
+            self.velocity_window,
+            max_users=max_users,
+            ttl_seconds=state_ttl,
+            max_memory_mb=max_memory_mb,
+            allowed_lateness=allowed_lateness
+        )
     
     def check(self, tx: dict) -> tuple:
         """
         트랜잭션 검사
         Returns: (is_fraud: bool, fraud_rules: list)
         """
-        fraud_rules = []
-        user_id = tx['user_id']
-        amount = tx['amount']
-        hour = tx.get('hour', 12)
-        category = tx.get('merchant_category', '')
+        plan = self.rules.plan
         current_time = tx.get('created_at', time.time())
+        state = self.state.get(tx['user_id'], current_time)
         
-        # 1. Velocity Check: 1분 내 5회 이상 결제
-        self._update_history(user_id, current_time)
-        recent_count = self._get_recent_count(user_id, current_time)
-        if recent_count >= self.velocity_threshold:
-            fraud_rules.append(f"VELOCITY: {recent_count}회/분")
-        
-        # 2. Amount Spike: 평소의 10배 이상
-        avg_amount = self._get_avg_amount(user_id)
-        if avg_amount > 0 and amount > avg_amount * self.amount_spike_ratio:
-            fraud_rules.append(f"AMOUNT_SPIKE: {amount:,}원 (평균 {avg_amount:,.0f}원의 {amount/avg_amount:.1f}배)")
-        self._update_avg_amount(user_id, amount)
-        
-        # 3. High Amount at Dawn: 새벽 고액 결제
-        if hour in self.dawn_hours and amount >= self.high_amount_threshold:
-            fraud_rules.append(f"DAWN_HIGH_AMOUNT: 새벽 {hour}시 {amount:,}원")
+        # 상태 갱신은 룰 적용 여부와 무관하게 항상 (velocity 윈도우, 이동평균)
+        velocity = state.velocity
+        if velocity.events and current_time < velocity.events[-1]:
+            self._record_out_of_order(velocity, current_time)
+        recent_count = velocity.add(current_time)
+        avg_amount = self._get_avg_amount(state)
+        self._update_avg_amount(state, tx['amount'])
         
-        # 4. Unusual Category: VIP 아닌데 명품 고액
-        if category == 'luxury' and tx.get('user_tier') == 'normal' and amount >= 10000000:
-            fraud_rules.append(f"UNUSUAL_CATEGORY: 일반등급 명품 {amount:,}원")
+        fraud_rules = []
+        self._checks += 1
+        timed = self._checks % CHECK_TIMING_EVERY == 0
+        for rule in plan.for_key(tx.get('merchant_category', ''), tx.get('user_tier', '')):
+            rule.evaluations += 1
+            if timed:
+                start = time.perf_counter_ns()
+                hit = rule.match(tx, recent_count, avg_amount)
+                rule.total_ns += time.perf_counter_ns() - start
+                rule.timed += 1
+            else:
+                hit = rule.match(tx, recent_count, avg_amount)
+            if hit:
+                rule.hits += 1
+                fraud_rules.append(rule.render(tx, recent_count, avg_amount))
         
         is_fraud = len(fraud_rules) > 0
         return is_fraud, fraud_rules
     
-    def _update_history(self, user_id: str, current_time: float):
-        """사용자 거래 기록 업데이트"""
-        self.user_history[user_id].append(current_time)
-        # 오래된 기록 제거 (1분 이전)
-        cutoff = current_time - self.velocity_window
-        self.user_history[user_id] = [
-            t for t in self.user_history[user_id] if t > cutoff
-        ]
+    def check_batch(self, transactions: list) -> list:
+        """
+        배치 단위 트랜잭션 검사 (check와 동일한 결과)
+        - velocity/평균 금액은 사용자별로 묶어 한 번에 갱신 (사용자 내 순서 유지)
+        - 룰 조건은 (카테고리, 등급)별 후보 행에 대해서만 NumPy 컬럼 연산
+        - 룰 메시지는 실제로 걸린 행만 생성
+        Returns: [(is_fraud: bool, fraud_rules: list), ...] (입력 순서)
+        """
+        n = len(transactions)
+        if n == 0:
+            return []
+        
+        plan = self.rules.plan
+        now = time.time()
+        amount_list = [tx['amount'] for tx in transactions]
+        amounts = np.array(amount_list, dtype=np.float64)
+        
+        # 사용자별 그룹 (입력 순서 유지)
+        groups = {}
+        for i, tx in enumerate(transactions):
+            groups.setdefault(tx['user_id'], []).append(i)
+        
+        # 상태 갱신: 사용자별로 velocity 윈도우/이동평균을 순서대로 갱신
+        recent_counts = np.zeros(n, dtype=np.int64)
+        avg_amounts = np.zeros(n, dtype=np.float64)
+        for user_id, indices in groups.items():
+            times = [transactions[i].get('created_at', now) for i in indices]
+            state = self.state.get(user_id, times[0])
+            velocity = state.velocity
+            for i, current_time in zip(indices, times):
+                if velocity.events and current_time < velocity.events[-1]:
+                    self._record_out_of_order(velocity, current_time)
+                recent_counts[i] = velocity.add(current_time)
+                avg_amounts[i] = self._get_avg_amount(state)
+                self._update_avg_amount(state, amount_list[i])
+            state.last_seen = max(state.last_seen, max(times))
+        
+        keys = [(tx.get('merchant_category', ''), tx.get('user_tier', '')) for tx in transactions]
+        hits = evaluate_batch(plan, transactions, keys, recent_counts, avg_amounts, amounts)
+        
+        results = [(False, []) for _ in range(n)]
+        for rule, indices in hits:
+            for i in indices.tolist():
+                fraud_rules = results[i][1]
+                if not fraud_rules:
+                    results[i] = (True, fraud_rules)
+                fraud_rules.append(rule.render(transactions[i], recent_counts[i], avg_amounts[i]))
+        
+        return results
+    
+    def reload_rules(self) -> bool:
+        """룰 파일이 바뀌었으면 다시 컴파일 (실패 시 기존 룰 유지)"""
+        return self.rules.maybe_reload()
+    
+    def rule_stats(self) -> list:
+        """룰별 누적 평가 수 / 탐지 수 / 평균 평가 시간(ns) / 추정 총 평가 시간(초)"""
+        return self.rules.plan.stats()
+    
+    def evict_idle(self, now: float = None) -> int:
+        """TTL이 지난 사용자 상태 정리"""
+        return self.state.evict_idle(now)
     
-    def _get_recent_count(self, user_id: str, current_time: float) -> int:
-        """최근 1분간 거래 횟수"""
-        cutoff = current_time - self.velocity_window
-        return sum(1 for t in self.user_history[user_id] if t > cutoff)
+    def _record_out_of_order(self, velocity, ts: float):
+        """사용자 최신 거래보다 이전 시각 도착 (velocity는 정렬 삽입으로 처리, 여기서는 집계만)"""
+        self.state.out_of_order += 1
+        if velocity.is_late(ts):
+            self.state.late += 1
     
-    def _get_avg_amount(self, user_id: str) -> float:
+    def _get_avg_amount(self, state: UserState) -> float:
         """사용자 평균 거래 금액"""
-        data = self.user_avg_amount[user_id]
-        if data['count'] == 0:
+        if state.amount_count == 0:
             return 0
-        return data['sum'] / data['count']
+        return state.amount_sum / state.amount_count
     
-    def _update_avg_amount(self, user_id: str, amount: int):
+    def _update_avg_amount(self, state: UserState, amount: int):
         """평균 금액 업데이트 (최근 100건 기준)"""
-        data = self.user_avg_amount[user_id]
-        data['sum'] += amount
-        data['count'] += 1
+        state.amount_sum += amount
+        state.amount_count += 1
         # 100건 넘으면 오래된 것 제거 (이동평균)
-        if data['count'] > 100:
-            data['sum'] = data['sum'] * 0.99
-            data['count'] = 100
+        if state.amount_count > self.amount_avg_window:
+            state.amount_sum = state.amount_sum * 0.99
+            state.amount_count = self.amount_avg_window
@@ -2,131 +2,411 @@ import sys
 sys.stdout.reconfigure(line_buffering=True)
 
 import os
+# 공용 모듈(codec, histogram, exporter)은 part-a-pipeline/common
+# 로컬 실행은 ../common에서 import, 컨테이너는 Dockerfile이 /app에 함께 복사
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'common'))
+
 import time
-import json
+import signal
 import asyncio
+import multiprocessing
+import numpy as np
 import asyncpg
 import redis.asyncio as aioredis
 from config import Config
 from metrics import MetricsCollector
+from exporter import start_http_server
 from fds_rules import FDSRuleEngine
+from sink import create_sink, NullSink, NullPool
+from transport import create_transport
+from codec import decode_payloads
+from profiling import BatchProfiler
+from rollup import BatchRollup, RollupSink
+from alerts import AlertPublisher, make_alert
+from state_snapshot import StateSnapshot, SnapshotWriter
+from bootstrap import bootstrap_state
 
-async def run_consumer(metrics: MetricsCollector):
-    print(f"[Consumer] Starting...")
-    print(f"[Consumer] Redis: {Config.REDIS_HOST}:{Config.REDIS_PORT}")
-    print(f"[Consumer] PostgreSQL: {Config.POSTGRES_HOST}:{Config.POSTGRES_PORT}/{Config.POSTGRES_DB}")
-    print(f"[Consumer] Batch Size: {Config.BATCH_SIZE}")
+async def run_consumer(metrics: MetricsCollector, shard: int = None):
+    queue_name = Config.get_queue_name(shard)
+    tag = "Consumer" if shard is None else f"Consumer-{shard}"
+    print(f"[{tag}] Starting... (queue: {queue_name})")
+    print(f"[{tag}] Redis: {Config.REDIS_HOST}:{Config.REDIS_PORT}")
+    print(f"[{tag}] PostgreSQL: {Config.POSTGRES_HOST}:{Config.POSTGRES_PORT}/{Config.POSTGRES_DB}")
+    print(f"[{tag}] Batch Size: {Config.BATCH_SIZE}")
+    print(f"[{tag}] Sink: {Config.SINK_MODE}")
+    print(f"[{tag}] Transport: {Config.TRANSPORT}")
+    print(f"[{tag}] Rollup: {'on' if Config.ROLLUP_ENABLED else 'off'}")
+    print(f"[{tag}] Alert stream: {Config.ALERT_STREAM or 'off'}")
+    if Config.PIPELINE_WRITERS > 0:
+        print(f"[{tag}] Pipeline: {Config.PIPELINE_WRITERS} writers, depth {Config.PIPELINE_DEPTH}")
     sys.stdout.flush()
     
+    sink = create_sink(Config.SINK_MODE)
+    rollup_sink = RollupSink(Config.POSTGRES_SCHEMA) if Config.ROLLUP_ENABLED else None
+    
     redis_client = await aioredis.from_url(
         f"redis://{Config.REDIS_HOST}:{Config.REDIS_PORT}",
-        encoding="utf-8",
-        decode_responses=True
-    )
-    print(f"[Consumer] Redis connected")
-    
-    pool = await asyncpg.create_pool(
-        host=Config.POSTGRES_HOST,
-        port=Config.POSTGRES_PORT,
-        user=Config.POSTGRES_USER,
-        password=Config.POSTGRES_PASSWORD,
-        database=Config.POSTGRES_DB,
-        min_size=10,
-        max_size=50
+        decode_responses=False  # msgpack 등 바이너리 payload 그대로 수신
     )
-    print(f"[Consumer] PostgreSQL connected")
+    print(f"[{tag}] Redis connected")
+    
+    alerts = AlertPublisher(redis_client, Config.ALERT_STREAM, Config.ALERT_STREAM_MAXLEN) if Config.ALERT_STREAM else None
+    
+    transport = create_transport(redis_client, queue_name, Config.TRANSPORT)
+    await transport.setup()
+    
+    if sink.name == NullSink.name:
+        pool = NullPool()
+    else:
+        pool = await asyncpg.create_pool(
+            host=Config.POSTGRES_HOST,
+            port=Config.POSTGRES_PORT,
+            user=Config.POSTGRES_USER,
+            password=Config.POSTGRES_PASSWORD,
+            database=Config.POSTGRES_DB,
+            min_size=Config.get_pool_min_size(),
+            max_size=Config.get_pool_max_size(),
+            init=sink.init_connection
+        )
+        print(f"[{tag}] PostgreSQL connected")
+        if rollup_sink is not None:
+            async with pool.acquire() as conn:
+                await rollup_sink.verify(conn)
     sys.stdout.flush()
     
-    fds_engine = FDSRuleEngine()
+    fds_engine = FDSRuleEngine(
+        max_users=Config.STATE_MAX_USERS or None,
+        state_ttl=Config.STATE_TTL_SECONDS or None,
+        max_memory_mb=Config.STATE_MAX_MEMORY_MB or None,
+        rules_path=Config.RULES_PATH or None,
+        allowed_lateness=Config.ALLOWED_LATENESS
+    )
+    print(f"[{tag}] Rules: {', '.join(rule.name for rule in fds_engine.rules.plan.rules)} "
+          f"({fds_engine.rules.path})")
+    
+    # 스냅샷에서 사용자 상태 복원 (memmap만 열고 레코드는 사용자 첫 조회 시 변환)
+    snapshot_path = Config.get_snapshot_path(shard)
+    snapshots = SnapshotWriter(snapshot_path, Config.STATE_SNAPSHOT_INTERVAL) if snapshot_path else None
+    last_offset = None
+    if snapshots is not None:
+        restore_start = time.perf_counter()
+        snapshot = StateSnapshot.open(snapshot_path)
+        if snapshot is not None:
+            fds_engine.state.attach_snapshot(snapshot)
+            last_offset = snapshot.offset
+            print(f"[{tag}] State snapshot: {snapshot.count:,} users, offset {snapshot.offset}, "
+                  f"age {time.time() - snapshot.created_at:.0f}s "
+                  f"({(time.perf_counter() - restore_start) * 1000:.1f}ms)")
+            replay = snapshot.offset and Config.STATE_SNAPSHOT_REPLAY and hasattr(transport, 'read_after')
+            others = await transport.other_readers_since(snapshot.offset) if replay else []
+            if others:
+                # group 전체 엔트리를 재생하면 다른 consumer가 처리한 거래까지 이 상태에 더해짐
+                print(f"[{tag}] State replay skipped: {', '.join(others)} also read {queue_name} after the snapshot "
+                      f"(replay needs one consumer per group and a stable STREAM_CONSUMER)")
+            elif replay:
+                # 스냅샷 이후 ACK까지 끝난 엔트리는 다시 오지 않으므로 상태만 재구성
+                # (장애 시점에 처리 중이던 미ACK 엔트리는 재전달되어 한 번 더 반영될 수 있음)
+                replayed = 0
+                async for payloads, entry_ids in transport.read_after(snapshot.offset, Config.MAX_BATCH_SIZE):
+                    fds_engine.check_batch(decode_payloads(payloads))
+                    last_offset = transport.advance_offset(last_offset, entry_ids)
+                    replayed += len(payloads)
+                print(f"[{tag}] State replayed from stream: {replayed:,} entries "
+                      f"({time.perf_counter() - restore_start:.2f}s)")
+        sys.stdout.flush()
+    
+    # 스냅샷이 없으면 DB 이력 집계로 워밍업 (null sink는 DB 연결이 없으므로 건너뜀)
+    if Config.STATE_BOOTSTRAP and fds_engine.state.snapshot is None and sink.name == NullSink.name:
+        print(f"[{tag}] State bootstrap skipped (SINK_MODE=null, no database)")
+    elif Config.STATE_BOOTSTRAP and fds_engine.state.snapshot is None:
+        await bootstrap_state(
+            pool, fds_engine, Config.POSTGRES_SCHEMA,
+            Config.STATE_BOOTSTRAP_LOOKBACK, Config.STATE_BOOTSTRAP_FETCH_SIZE,
+            keep_user=None if shard is None else (lambda user_id: Config.get_shard(user_id) == shard)
+        )
+        sys.stdout.flush()
     
     last_metrics_time = time.time()
     batch_size = Config.BATCH_SIZE
     
-    try:
+    async def update_gauges():
+        # scrape는 HTTP 스레드에서 캐시된 값만 읽으므로 Redis/풀 조회는 여기서
         while True:
-            pipe = redis_client.pipeline()
-            for _ in range(batch_size):
-                pipe.rpop("tx_queue")
-            results = await pipe.execute()
+            try:
+                metrics.set_gauge('queue_length', await transport.length())
+            except Exception as e:
+                print(f"[{tag}] Queue length check failed: {e}")
+            metrics.set_gauge('pool_size', pool.get_size())
+            metrics.set_gauge('pool_in_use', pool.get_size() - pool.get_idle_size())
+            metrics.set_gauge('batch_size', batch_size)
+            metrics.set_gauge('state_users', len(fds_engine.state))
+            await asyncio.sleep(Config.METRICS_GAUGE_INTERVAL)
+    
+    gauge_task = asyncio.create_task(update_gauges()) if Config.METRICS_PORT else None
+    profiler = BatchProfiler(
+        Config.PROFILE_EVERY_N_BATCHES,
+        Config.PROFILE_OUTPUT_PATH or Config.METRICS_OUTPUT_PATH,
+        tag="consumer" if shard is None else f"consumer_shard{shard}"
+    )
+    
+    def evaluate_batch(payloads: list, fetched_at: float, ack_ids: list) -> tuple:
+        """decode → 룰 평가 → 결과 컬럼 채움 + 분 단위 집계. Returns: (processed_txs, fraud_count, rollup)"""
+        nonlocal last_offset
+        decode_start = time.perf_counter()
+        transactions = decode_payloads(payloads)
+        if not transactions:
+            return [], 0, None
+        
+        evaluate_start = time.perf_counter()
+        metrics.record_stage('decode', evaluate_start - decode_start)
+        created_at = np.fromiter((tx['created_at'] for tx in transactions), dtype=np.float64, count=len(transactions))
+        metrics.record_stage_array('queue_wait', fetched_at - created_at)
+        
+        processed_txs = []
+        fraud_count = 0
+        rollup = BatchRollup() if rollup_sink is not None else None
+        fraud_alerts = []
+        results = fds_engine.check_batch(transactions)
+        # 룰 엔진 상태에 반영된 마지막 큐 위치 (스냅샷에 함께 저장)
+        last_offset = transport.advance_offset(last_offset, ack_ids)
+        processed_at = time.time()
+        for tx, (is_fraud, fraud_rules) in zip(transactions, results):
+            tx['is_fraud'] = is_fraud
+            # fraud_rules를 문자열로 변환
+            tx['fraud_rules'] = ', '.join(fraud_rules) if fraud_rules else None
+            tx['processed_at'] = processed_at
+            processed_txs.append(tx)
+            fraud_count += is_fraud
+            if rollup is not None:
+                rollup.add(tx, fraud_rules)
+            if is_fraud and alerts is not None:
+                fraud_alerts.append(make_alert(tx, fraud_rules))
+        
+        # DB 쓰기를 기다리지 않고 바로 알림 발행 (DB 실패 후 재전달되면 dispatcher에서 중복 제거)
+        if fraud_alerts:
+            alerts.publish(fraud_alerts)
+        metrics.record_stage('evaluate', time.perf_counter() - evaluate_start)
+        return processed_txs, fraud_count, rollup
+    
+    async def write_batch(processed_txs: list, fraud_count: int, rollup: BatchRollup, ack_ids: list):
+        """커넥션 획득 → sink 쓰기 (+ rollup, 같은 트랜잭션) → ACK. 실패 시 에러로 집계 (stream이면 미ACK 엔트리는 재전달)"""
+        acquire_start = time.perf_counter()
+        try:
+            async with pool.acquire() as conn:
+                write_start = time.perf_counter()
+                metrics.record_stage('pool_acquire', write_start - acquire_start)
+                if rollup is None:
+                    await sink.write(conn, processed_txs)
+                else:
+                    # rollup 행 잠금을 짧게 유지하도록 마지막에 갱신
+                    async with conn.transaction():
+                        await sink.write(conn, processed_txs)
+                        await rollup_sink.write(conn, rollup)
             
-            transactions = [json.loads(r) for r in results if r is not None]
+            # DB 커밋 이후에만 ACK (stream) → 실패 시 재전달
+            ack_start = time.perf_counter()
+            metrics.record_stage('write', ack_start - write_start)
+            await transport.ack(ack_ids)
+            metrics.record_stage('ack', time.perf_counter() - ack_start)
+            metrics.record_fraud(fraud_count)
             
-            if not transactions:
-                await asyncio.sleep(0.1)
+            for tx in processed_txs:
+                e2e_latency = tx['processed_at'] - tx['created_at']
+                metrics.record_success(e2e_latency)
+        
+        except Exception as e:
+            print(f"[Error] DB Insert failed: {e}")
+            sys.stdout.flush()
+            metrics.record_error(len(processed_txs))
+    
+    async def maybe_flush(fraud_count: int):
+        nonlocal last_metrics_time
+        if time.time() - last_metrics_time < Config.METRICS_INTERVAL:
+            return
+        # 파이프라인 모드에서 writer 여러 개가 동시에 flush하지 않도록 먼저 갱신
+        last_metrics_time = time.time()
+        queue_len = await transport.length()
+        fds_engine.evict_idle()
+        fds_engine.reload_rules()
+        metrics.set_rule_stats(fds_engine.rule_stats())
+        if snapshots is not None:
+            snapshots.maybe_save(fds_engine.state.users(), last_offset)
+        await metrics.flush_async(
+            queue_length=queue_len,
+            fraud_count=fraud_count,
+            state_stats=fds_engine.state.stats()
+        )
+    
+    async def fetch_batch() -> tuple:
+        """Returns: (payloads, ack_ids, fetched_at)"""
+        nonlocal batch_size
+        fetch_start = time.perf_counter()
+        payloads, ack_ids = await transport.fetch(batch_size)
+        fetched_at = time.time()
+        
+        # 꽉 찬 배치 = 큐가 밀려 있음 → 배치 확대, 덜 찼으면 기본 크기로 복귀
+        if len(payloads) >= batch_size:
+            batch_size = min(batch_size * 2, Config.MAX_BATCH_SIZE)
+        else:
+            batch_size = Config.BATCH_SIZE
+        
+        if payloads:
+            # 빈 큐 대기 포함
+            metrics.record_stage('fetch', time.perf_counter() - fetch_start)
+        return payloads, ack_ids, fetched_at
+    
+    async def run_serial():
+        # fetch → evaluate → write를 배치 하나씩 순서대로
+        while True:
+            payloads, ack_ids, fetched_at = await fetch_batch()
+            if not payloads:
                 continue
             
-            processed_txs = []
-            for tx in transactions:
-                is_fraud, fraud_rules = fds_engine.check(tx)
-                tx['is_fraud'] = is_fraud
-                # fraud_rules를 문자열로 변환
-                tx['fraud_rules'] = ', '.join(fraud_rules) if fraud_rules else None
-                tx['processed_at'] = time.time()
-                processed_txs.append(tx)
+            with profiler.batch():
+                processed_txs, fraud_count, rollup = evaluate_batch(payloads, fetched_at, ack_ids)
+                if not processed_txs:
+                    continue
+                await write_batch(processed_txs, fraud_count, rollup, ack_ids)
             
-            try:
-                async with pool.acquire() as conn:
-                    await conn.executemany(f"""
-                        INSERT INTO {Config.POSTGRES_SCHEMA}.transactions 
-                        (tx_id, card_number, amount, merchant, user_id, user_tier,
-                         merchant_category, region, hour, day_of_week, is_weekend,
-                         time_slot, is_fraud, fraud_rules, created_at, processed_at)
-                        VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13, $14, 
-                                to_timestamp($15), to_timestamp($16))
-                    """, [
-                        (
-                            tx['tx_id'],
-                            tx['card_number'],
-                            tx['amount'],
-                            tx['merchant'],
-                            tx['user_id'],
-                            tx['user_tier'],
-                            tx['merchant_category'],
-                            tx['region'],
-                            tx['hour'],
-                            tx['day_of_week'],
-                            tx['is_weekend'],
-                            tx['time_slot'],
-                            tx['is_fraud'],
-                            tx['fraud_rules'],
-                            tx['created_at'],
-                            tx['processed_at']
-                        )
-                        for tx in processed_txs
-                    ])
-                
-                for tx in processed_txs:
-                    e2e_latency = tx['processed_at'] - tx['created_at']
-                    metrics.record_success(e2e_latency)
-                
-            except Exception as e:
-                print(f"[Error] DB Insert failed: {e}")
-                sys.stdout.flush()
-                for _ in processed_txs:
-                    metrics.record_error()
-            
-            if time.time() - last_metrics_time >= Config.METRICS_INTERVAL:
-                queue_len = await redis_client.llen("tx_queue")
-                fraud_count = sum(1 for tx in processed_txs if tx['is_fraud'])
-                metrics.flush(queue_length=queue_len, fraud_count=fraud_count)
-                last_metrics_time = time.time()
+            await maybe_flush(fraud_count)
+    
+    async def run_pipeline():
+        """
+        fetcher 1 → evaluator 1 → writer K (bounded queue로 연결)
+        - in_flight 세마포어: fetch 시작부터 ACK까지 동시에 진행 중인 배치 수 상한
+        - evaluator는 하나라서 사용자별 룰 상태 갱신 순서는 큐 순서 그대로
+        - writer끼리는 완료 순서가 바뀔 수 있음 (ON CONFLICT + ACK는 배치 단위라 무관)
+        """
+        depth = Config.PIPELINE_DEPTH
+        in_flight = asyncio.Semaphore(depth)
+        fetched = asyncio.Queue(maxsize=depth)
+        evaluated = asyncio.Queue(maxsize=depth)
+        
+        async def fetcher():
+            while True:
+                await in_flight.acquire()
+                payloads, ack_ids, fetched_at = await fetch_batch()
+                if not payloads:
+                    in_flight.release()
+                    continue
+                await fetched.put((payloads, ack_ids, fetched_at))
+        
+        async def evaluator():
+            while True:
+                payloads, ack_ids, fetched_at = await fetched.get()
+                with profiler.batch():
+                    processed_txs, fraud_count, rollup = evaluate_batch(payloads, fetched_at, ack_ids)
+                if not processed_txs:
+                    in_flight.release()
+                    continue
+                await evaluated.put((processed_txs, fraud_count, rollup, ack_ids))
+        
+        async def writer():
+            while True:
+                processed_txs, fraud_count, rollup, ack_ids = await evaluated.get()
+                try:
+                    await write_batch(processed_txs, fraud_count, rollup, ack_ids)
+                finally:
+                    in_flight.release()
+                await maybe_flush(fraud_count)
+        
+        tasks = [asyncio.create_task(fetcher()), asyncio.create_task(evaluator())]
+        tasks.extend(asyncio.create_task(writer()) for _ in range(Config.PIPELINE_WRITERS))
+        try:
+            # 하나라도 예외로 끝나면 전체 중단
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+            for task in done:
+                task.result()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+    
+    try:
+        if Config.PIPELINE_WRITERS > 0:
+            await run_pipeline()
+        else:
+            await run_serial()
     
     finally:
+        if gauge_task is not None:
+            gauge_task.cancel()
+        if snapshots is not None:
+            await snapshots.wait()
+            snapshots.save(fds_engine.state.users(), last_offset)
+        if alerts is not None:
+            await alerts.close()
         await redis_client.aclose()
         await pool.close()
 
+def run_shard(shard: int):
+    """샤드 워커 프로세스: 자기 샤드 큐와 해당 유저들의 룰 엔진 상태만 담당"""
+    metrics = MetricsCollector(
+        output_dir=Config.METRICS_OUTPUT_PATH,
+        phase=3,
+        role=f"consumer_shard{shard}",
+        labels={'shard': str(shard)}
+    )
+    if Config.METRICS_PORT:
+        start_http_server(Config.METRICS_PORT + shard, metrics.render)
+    asyncio.run(run_consumer(metrics, shard=shard))
+
+def run_supervisor(num_shards: int):
+    """샤드별 워커 프로세스 실행 및 종료 시 재시작"""
+    workers = {}
+    
+    def start_worker(shard: int):
+        process = multiprocessing.Process(
+            target=run_shard, args=(shard,), name=f"consumer-shard-{shard}", daemon=True
+        )
+        process.start()
+        workers[shard] = process
+        print(f"[Supervisor] Shard {shard} started (pid={process.pid})")
+    
+    def shutdown(signum, frame):
+        raise KeyboardInterrupt
+    
+    signal.signal(signal.SIGTERM, shutdown)
+    
+    for shard in range(num_shards):
+        start_worker(shard)
+    
+    try:
+        while True:
+            time.sleep(1)
+            for shard, process in list(workers.items()):
+                if not process.is_alive():
+                    print(f"[Supervisor] Shard {shard} exited (code={process.exitcode}), restarting")
+                    start_worker(shard)
+    except KeyboardInterrupt:
+        print("[Supervisor] Stopping workers...")
+    finally:
+        for process in workers.values():
+            process.terminate()
+        for process in workers.values():
+            process.join(timeout=10)
+
 def main():
     print("=" * 60)
     print("FDS Pipeline Consumer")
     print(f"Batch Size: {Config.BATCH_SIZE}")
+    print(f"Sink: {Config.SINK_MODE}")
+    print(f"Transport: {Config.TRANSPORT}")
+    print(f"Shards: {Config.NUM_SHARDS}")
     print("=" * 60)
     sys.stdout.flush()
     
+    if Config.NUM_SHARDS > 1:
+        run_supervisor(Config.NUM_SHARDS)
+        return
+    
     metrics = MetricsCollector(
         output_dir=Config.METRICS_OUTPUT_PATH,
         phase=3,
         role="consumer"
     )
+    if Config.METRICS_PORT:
+        start_http_server(Config.METRICS_PORT, metrics.render)
     
     asyncio.run(run_consumer(metrics))
 
@@ -1,12 +1,40 @@
 import time
 import csv
 import os
+import json
+import asyncio
 import psutil
+import threading
 import numpy as np
 from datetime import datetime
+from histogram import LatencyHistogram
+from exporter import format_counter, format_gauge, format_histogram
+
+GAUGE_HELP = {
+    'queue_length': 'Redis queue length',
+    'pool_in_use': 'PostgreSQL pool connections in use',
+    'pool_size': 'PostgreSQL pool connections open',
+    'batch_size': 'Current adaptive fetch batch size',
+    'state_users': 'Users held in rule engine state',
+}
+
+# 처리 단계 (queue_wait는 건별, 나머지는 배치 1회당 소요시간)
+STAGES = ('queue_wait', 'fetch', 'decode', 'evaluate', 'pool_acquire', 'write', 'ack')
+
+# phase*_metrics.csv 컬럼은 기존 분석(노트북, docs)과 호환되도록 고정
+# 이후 추가한 항목은 같은 timestamp로 phase*_metrics_ext.csv에 따로 기록
+METRICS_COLUMNS = (
+    'timestamp', 'tps', 'success_count', 'error_count',
+    'latency_avg_ms', 'latency_p50_ms', 'latency_p95_ms', 'latency_p99_ms',
+    'cpu_percent', 'memory_percent', 'queue_length', 'fraud_count'
+)
+EXTENDED_COLUMNS = (
+    'timestamp', 'latency_p999_ms',
+    'state_users', 'state_hits', 'state_misses', 'state_evicted'
+)
 
 class MetricsCollector:
-    def __init__(self, output_dir: str, phase: int, role: str = "consumer"):
+    def __init__(self, output_dir: str, phase: int, role: str = "consumer", labels: dict = None):
         self.output_dir = output_dir
         self.phase = phase
         self.role = role
@@ -14,62 +42,236 @@ class MetricsCollector:
             output_dir, 
             f"phase{phase}_{role}_metrics.csv"
         )
+        self.extended_path = os.path.join(
+            output_dir,
+            f"phase{phase}_{role}_metrics_ext.csv"
+        )
+        # 구간별 히스토그램 snapshot (샤드/프로세스 간 병합용, JSON lines)
+        self.histogram_path = os.path.join(
+            output_dir,
+            f"phase{phase}_{role}_latency.jsonl"
+        )
+        self.stages_path = os.path.join(
+            output_dir,
+            f"phase{phase}_{role}_stages.csv"
+        )
         
-        self.latencies = []
+        self.histogram = LatencyHistogram()
+        self.stages = {stage: LatencyHistogram() for stage in STAGES}
         self.success_count = 0
         self.error_count = 0
         self.start_time = time.time()
         
+        # Prometheus exposition용 누적값 (flush해도 초기화하지 않음)
+        self.labels = labels or {}
+        self.lifetime = LatencyHistogram()
+        self.lifetime_stages = {stage: LatencyHistogram() for stage in STAGES}
+        self.total_success = 0
+        self.total_errors = 0
+        self.total_fraud = 0
+        self.gauges = {}
+        self.rule_stats = []
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        
         os.makedirs(output_dir, exist_ok=True)
         self._write_header()
     
     def _write_header(self):
-        if not os.path.exists(self.output_path):
-            with open(self.output_path, 'w', newline='') as f:
+        if not os.path.exists(self.stages_path):
+            with open(self.stages_path, 'w', newline='') as f:
                 writer = csv.writer(f)
                 writer.writerow([
-                    'timestamp', 'tps', 'success_count', 'error_count',
-                    'latency_avg_ms', 'latency_p50_ms', 'latency_p95_ms', 'latency_p99_ms',
-                    'cpu_percent', 'memory_percent', 'queue_length', 'fraud_count'
+                    'timestamp', 'stage', 'count', 'avg_ms', 'p50_ms',
+                    'p95_ms', 'p99_ms', 'max_ms', 'total_ms'
                 ])
+        for path, columns in ((self.output_path, METRICS_COLUMNS), (self.extended_path, EXTENDED_COLUMNS)):
+            if not os.path.exists(path):
+                with open(path, 'w', newline='') as f:
+                    csv.writer(f).writerow(columns)
     
     def record_success(self, latency: float):
-        self.latencies.append(latency)
+        self.histogram.record(latency)
         self.success_count += 1
+        self.total_success += 1
+    
+    def record_many(self, latency: float, count: int):
+        """같은 지연시간 count건 (배치 단위 기록)"""
+        self.histogram.record_many(latency, count)
+        self.success_count += count
+        self.total_success += count
+    
+    def record_error(self, count: int = 1):
+        self.error_count += count
+        self.total_errors += count
+    
+    def record_stage(self, stage: str, seconds: float, count: int = 1):
+        self.stages[stage].record_many(seconds, count)
+    
+    def record_stage_array(self, stage: str, seconds):
+        """건별 값 배열 (queue_wait처럼 배치 안에서 건마다 다른 값)"""
+        self.stages[stage].record_array(seconds)
+    
+    def record_fraud(self, count: int):
+        self.total_fraud += count
+    
+    def set_rule_stats(self, rule_stats: list):
+        """FDSRuleEngine.rule_stats() 결과 (누적값, 리스트 통째로 교체)"""
+        self.rule_stats = rule_stats
+    
+    def set_gauge(self, name: str, value):
+        """exposition 게이지 갱신 (이벤트 루프에서 호출)"""
+        self.gauges[name] = value
     
-    def record_error(self):
-        self.error_count += 1
+    def flush(self, queue_length: int = 0, fraud_count: int = 0, state_stats: dict = None) -> dict:
+        metrics, csv_rows, histogram_record = self._collect(queue_length, fraud_count, state_stats)
+        self._write(csv_rows, histogram_record)
+        return metrics
+    
+    async def flush_async(self, queue_length: int = 0, fraud_count: int = 0, state_stats: dict = None) -> dict:
+        """flush와 같음, CSV/JSON lines 파일 쓰기만 스레드에서 (이벤트 루프를 막지 않음)"""
+        metrics, csv_rows, histogram_record = self._collect(queue_length, fraud_count, state_stats)
+        await asyncio.to_thread(self._write, csv_rows, histogram_record)
+        return metrics
     
-    def flush(self, queue_length: int = 0, fraud_count: int = 0) -> dict:
+    def _collect(self, queue_length: int, fraud_count: int, state_stats: dict) -> tuple:
+        """
+        구간 값 계산 + 히스토그램 교체 (이벤트 루프에서 호출, 파일 I/O 없음)
+        Returns: (metrics, csv_rows, histogram_record) - 뒤의 둘은 _write에 넘길 파일별 행 / JSON lines 레코드
+        """
+        state_stats = state_stats or {}
         elapsed = time.time() - self.start_time
         
+        histogram = self.histogram
+        p50, p95, p99, p999 = histogram.percentiles([50, 95, 99, 99.9])
+        
         metrics = {
             'timestamp': datetime.now().isoformat(),
             'tps': round(self.success_count / elapsed, 2) if elapsed > 0 else 0,
             'success_count': self.success_count,
             'error_count': self.error_count,
-            'latency_avg_ms': round(np.mean(self.latencies) * 1000, 2) if self.latencies else 0,
-            'latency_p50_ms': round(np.percentile(self.latencies, 50) * 1000, 2) if self.latencies else 0,
-            'latency_p95_ms': round(np.percentile(self.latencies, 95) * 1000, 2) if len(self.latencies) >= 20 else 0,
-            'latency_p99_ms': round(np.percentile(self.latencies, 99) * 1000, 2) if len(self.latencies) >= 100 else 0,
+            'latency_avg_ms': round(histogram.mean() * 1000, 2),
+            'latency_p50_ms': round(p50 * 1000, 2),
+            'latency_p95_ms': round(p95 * 1000, 2) if len(histogram) >= 20 else 0,
+            'latency_p99_ms': round(p99 * 1000, 2) if len(histogram) >= 100 else 0,
             'cpu_percent': psutil.cpu_percent(),
             'memory_percent': round(psutil.virtual_memory().percent, 1),
             'queue_length': queue_length,
-            'fraud_count': fraud_count
+            'fraud_count': fraud_count,
+            'state_users': state_stats.get('state_users', 0),
+            'state_hits': state_stats.get('state_hits', 0),
+            'state_misses': state_stats.get('state_misses', 0),
+            'state_evicted': state_stats.get('state_evicted_ttl', 0) + state_stats.get('state_evicted_lru', 0),
+            'latency_p999_ms': round(p999 * 1000, 2) if len(histogram) >= 1000 else 0
         }
         
-        with open(self.output_path, 'a', newline='') as f:
-            writer = csv.writer(f)
-            writer.writerow(metrics.values())
-        
+        # 도착 순서가 뒤바뀐 거래 (누적, 있을 때만 표시)
+        out_of_order = state_stats.get('state_out_of_order', 0)
+        out_of_order = f"Out-of-order: {out_of_order} (late {state_stats.get('state_late', 0)}), " if out_of_order else ''
         print(f"[{metrics['timestamp']}] TPS: {metrics['tps']}, "
-              f"E2E Latency: {metrics['latency_avg_ms']}ms, "
+              f"E2E Latency: {metrics['latency_avg_ms']}ms (p99 {metrics['latency_p99_ms']}ms), "
               f"Queue: {queue_length}, Fraud: {fraud_count}, "
+              f"Users: {metrics['state_users']}, "
+              f"{out_of_order}"
               f"CPU: {metrics['cpu_percent']}%")
         
-        self.latencies = []
+        stages = self.stages
+        stage_rows = self._stage_rows(metrics['timestamp'], stages)
+        rule_stats = self.rule_stats
+        if rule_stats:
+            print("[Rules] hits/evaluations (avg ns): " + ', '.join(
+                f"{rule['rule']} {rule['hits']}/{rule['evaluations']} ({rule['avg_ns']:.0f})"
+                for rule in rule_stats
+            ))
+        
+        csv_rows = {
+            self.output_path: [[metrics[column] for column in METRICS_COLUMNS]],
+            self.extended_path: [[metrics[column] for column in EXTENDED_COLUMNS]],
+            self.stages_path: stage_rows,
+        }
+        histogram_record = {
+            'timestamp': metrics['timestamp'],
+            'histogram': histogram.snapshot(),
+            'stages': {stage: stage_histogram.snapshot() for stage, stage_histogram in stages.items()},
+            'rules': rule_stats
+        }
+        
+        # scrape 스레드가 병합 도중 값을 읽지 않도록 잠금
+        with self._lock:
+            self.lifetime.merge(histogram)
+            for stage, stage_histogram in stages.items():
+                self.lifetime_stages[stage].merge(stage_histogram)
+            self.histogram = LatencyHistogram()
+            self.stages = {stage: LatencyHistogram() for stage in STAGES}
         self.success_count = 0
         self.error_count = 0
         self.start_time = time.time()
         
-        return metrics
+        return metrics, csv_rows, histogram_record
+    
+    def _write(self, csv_rows: dict, histogram_record: dict):
+        """_collect 결과를 파일에 추가 (스레드에서 호출될 수 있음, 구간 순서대로 쓰도록 잠금)"""
+        with self._write_lock:
+            for path, rows in csv_rows.items():
+                if rows:
+                    with open(path, 'a', newline='') as f:
+                        csv.writer(f).writerows(rows)
+            with open(self.histogram_path, 'a') as f:
+                f.write(json.dumps(histogram_record) + '\n')
+    
+    def _stage_rows(self, timestamp: str, stages: dict) -> list:
+        """단계별 지연시간 행 + 한 줄 요약 출력 (p50/p99, ms)"""
+        rows = []
+        summary = []
+        for stage, stage_histogram in stages.items():
+            if not stage_histogram.total:
+                continue
+            p50, p95, p99 = stage_histogram.percentiles([50, 95, 99])
+            rows.append([
+                timestamp, stage, stage_histogram.total,
+                round(stage_histogram.mean() * 1000, 3), round(p50 * 1000, 3),
+                round(p95 * 1000, 3), round(p99 * 1000, 3),
+                round(stage_histogram.max * 1000, 3), round(stage_histogram.sum * 1000, 1)
+            ])
+            summary.append(f"{stage} {p50 * 1000:.2f}/{p99 * 1000:.2f}")
+        if rows:
+            print(f"[Stages] p50/p99 ms: {', '.join(summary)}")
+        return rows
+    
+    def render(self) -> str:
+        """Prometheus 텍스트 포맷 (HTTP 스레드에서 호출)"""
+        prefix = f"fds_{self.role.split('_')[0]}"
+        labels = self.labels
+        with self._lock:
+            histograms = [('e2e', self.lifetime, self.histogram)]
+            histograms.extend(
+                (stage, self.lifetime_stages[stage], self.stages[stage]) for stage in STAGES
+            )
+            samples = [
+                ({**labels, 'stage': stage}, np.add(lifetime.counts, window.counts),
+                 lifetime.total + window.total, lifetime.sum + window.sum)
+                for stage, lifetime, window in histograms
+            ]
+        
+        lines = format_counter(f"{prefix}_transactions_total", "Processed transactions by result", [
+            ({**labels, 'result': 'success'}, self.total_success),
+            ({**labels, 'result': 'error'}, self.total_errors),
+        ])
+        lines.extend(format_counter(f"{prefix}_fraud_total", "Transactions flagged as fraud", [
+            (labels, self.total_fraud),
+        ]))
+        rule_stats = self.rule_stats
+        if rule_stats:
+            lines.extend(format_counter(f"{prefix}_rule_evaluations_total", "Rule evaluations", [
+                ({**labels, 'rule': rule['rule']}, rule['evaluations']) for rule in rule_stats
+            ]))
+            lines.extend(format_counter(f"{prefix}_rule_hits_total", "Rule hits", [
+                ({**labels, 'rule': rule['rule']}, rule['hits']) for rule in rule_stats
+            ]))
+            lines.extend(format_counter(f"{prefix}_rule_eval_seconds_total", "Estimated rule evaluation time", [
+                ({**labels, 'rule': rule['rule']}, rule['total_seconds']) for rule in rule_stats
+            ]))
+        for name, value in sorted(dict(self.gauges).items()):
+            lines.extend(format_gauge(f"{prefix}_{name}", GAUGE_HELP.get(name, name), [(labels, value)]))
+        lines.extend(format_histogram(f"{prefix}_latency_seconds", "Latency by stage", samples))
+        return '\n'.join(lines) + '\n'
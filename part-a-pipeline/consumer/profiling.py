@@ -0,0 +1,52 @@
+"""
+샘플링 프로파일러 (opt-in)
+- every_n 배치마다 1개 배치를 cProfile로 측정
+- .prof 파일로 저장 (snakeviz / pstats로 열람) + cumulative 상위 함수 출력
+- every_n = 0이면 아무것도 하지 않음 (오버헤드 없음)
+"""
+
+import os
+import io
+import time
+import pstats
+import cProfile
+from contextlib import contextmanager
+
+class BatchProfiler:
+    def __init__(self, every_n: int, output_dir: str, tag: str = "consumer", top: int = 15):
+        self.every_n = every_n
+        self.output_dir = output_dir
+        self.tag = tag
+        self.top = top
+        self.batches = 0
+        if every_n:
+            os.makedirs(output_dir, exist_ok=True)
+    
+    @contextmanager
+    def batch(self):
+        """배치 처리 구간을 감싸서 사용: with profiler.batch(): ..."""
+        self.batches += 1
+        if not self.every_n or self.batches % self.every_n:
+            yield
+            return
+        
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            self._dump(profile)
+    
+    def _dump(self, profile: cProfile.Profile):
+        path = os.path.join(
+            self.output_dir,
+            f"profile_{self.tag}_{time.strftime('%Y%m%d_%H%M%S')}_batch{self.batches}.prof"
+        )
+        profile.dump_stats(path)
+        
+        out = io.StringIO()
+        stats = pstats.Stats(profile, stream=out)
+        stats.sort_stats('cumulative').print_stats(self.top)
+        print(f"[Profile] batch {self.batches} → {path}")
+        print(out.getvalue())
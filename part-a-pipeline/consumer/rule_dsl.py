@@ -0,0 +1,362 @@
+"""
+FDS 룰 정의(JSON) → 평가 계획(RulePlan) 컴파일
+
+룰 파일 형식 (rules.json 참고)
+    {
+      "state": {"velocity_window": 60, "amount_avg_window": 100},
+      "rules": [
+        {"name": "VELOCITY", "type": "velocity", "threshold": 5, "message": "{count}회/분"},
+        {"name": "AMOUNT_SPIKE", "type": "amount_spike", "ratio": 10, "message": "..."},
+        {"name": "...", "when": {"merchant_category": "luxury", "amount": {">=": 10000000}}, "message": "..."}
+      ]
+    }
+- type: predicate(기본, when 조건만) | velocity (count >= threshold) | amount_spike (amount > 평균 * ratio)
+- when: {필드: 값} 은 ==, {필드: {연산자: 값}} 연산자는 == != > >= < <= in not_in
+- message: str.format 템플릿 (트랜잭션 필드 + count / avg_amount / ratio)
+
+컴파일
+- merchant_category / user_tier 의 == / in 조건은 인덱스로 사용 → (카테고리, 등급)별로 적용 가능한 룰만 평가
+- 나머지 조건은 비용 순(비교 → 집합 포함)으로 정렬, 단건은 파이썬 식으로 생성해 단락 평가
+- 배치는 후보 행 인덱스를 조건마다 좁혀 가며 NumPy로 평가
+"""
+
+import os
+import json
+import time
+import numpy as np
+
+class RuleError(ValueError):
+    pass
+
+# 조건에 쓸 수 있는 필드: (종류, tx에 없을 때 기본값)
+FIELDS = {
+    'amount': ('num', 0),
+    'hour': ('num', 12),
+    'day_of_week': ('num', 0),
+    'is_weekend': ('cat', False),
+    'merchant_category': ('cat', ''),
+    'user_tier': ('cat', ''),
+    'region': ('cat', ''),
+    'time_slot': ('cat', ''),
+    'merchant': ('cat', ''),
+}
+FIELD_DEFAULTS = {field: default for field, (_, default) in FIELDS.items()}
+INDEX_FIELDS = ('merchant_category', 'user_tier')
+
+# 연산자: (파이썬 식, 비용)
+OPS = {
+    '==': ('==', 1),
+    '!=': ('!=', 1),
+    '>': ('>', 1),
+    '>=': ('>=', 1),
+    '<': ('<', 1),
+    '<=': ('<=', 1),
+    'in': ('in', 2),
+    'not_in': ('not in', 2),
+}
+RULE_TYPES = ('predicate', 'velocity', 'amount_spike')
+# 룰 이름: 메시지 접두어("<name>: ..."), rollup rule 컬럼, Prometheus rule 라벨에 그대로 쓰임
+RULE_NAME_MAX_LENGTH = 64
+# message 템플릿 검증용 (조건 필드 외에 쓸 수 있는 값)
+MESSAGE_SAMPLE = {
+    **FIELD_DEFAULTS,
+    'tx_id': '', 'user_id': '', 'card_number': '', 'created_at': 0.0,
+    'count': 0, 'avg_amount': 1.0, 'ratio': 1.0,
+}
+STATE_DEFAULTS = {'velocity_window': 60, 'amount_avg_window': 100}
+
+class RuleMessage(str):
+    """탐지 메시지 ("VELOCITY: 6회/분") + 룰 이름 (집계/검증 시 메시지를 다시 파싱하지 않도록)"""
+    
+    def __new__(cls, rule: str, text: str):
+        message = super().__new__(cls, f"{rule}: {text}")
+        message.rule = rule
+        return message
+
+class MessageContext(dict):
+    """message 템플릿용: 계산값(count 등)은 dict에, 트랜잭션 필드는 필요할 때만 조회"""
+    __slots__ = ('tx',)
+    
+    def __init__(self, tx: dict, count, avg_amount):
+        super().__init__(count=count, avg_amount=avg_amount)
+        self.tx = tx
+    
+    def __missing__(self, key):
+        if key == 'ratio':
+            avg_amount = self['avg_amount']
+            return self.tx.get('amount', 0) / avg_amount if avg_amount else 0.0
+        if key in self.tx:
+            return self.tx[key]
+        return FIELD_DEFAULTS[key]
+
+class Condition:
+    __slots__ = ('field', 'op', 'value', 'cost')
+    
+    def __init__(self, field: str, op: str, value):
+        if field not in FIELDS:
+            raise RuleError(f"unknown field: {field} (available: {', '.join(FIELDS)})")
+        if op not in OPS:
+            raise RuleError(f"unknown operator: {op} (available: {', '.join(OPS)})")
+        if op in ('in', 'not_in'):
+            if not isinstance(value, list):
+                raise RuleError(f"{field} {op}: value must be a list")
+            value = frozenset(value)
+        elif FIELDS[field][0] == 'num' and not isinstance(value, (int, float)):
+            raise RuleError(f"{field} {op}: value must be a number")
+        self.field = field
+        self.op = op
+        self.value = value
+        self.cost = OPS[op][1]
+    
+    def mask(self, column: np.ndarray) -> np.ndarray:
+        """column(후보 행만)에 대한 bool 마스크"""
+        op = self.op
+        value = self.value
+        if op == 'in' or op == 'not_in':
+            if column.dtype == object:
+                hit = np.fromiter((item in value for item in column), dtype=bool, count=len(column))
+            else:
+                hit = np.isin(column, list(value))
+            return hit if op == 'in' else ~hit
+        if op == '==':
+            return column == value
+        if op == '!=':
+            return column != value
+        if op == '>':
+            return column > value
+        if op == '>=':
+            return column >= value
+        if op == '<':
+            return column < value
+        return column <= value
+
+class CompiledRule:
+    __slots__ = ('name', 'type', 'threshold', 'ratio', 'message', 'conditions', 'index',
+                 'match', 'evaluations', 'hits', 'timed', 'total_ns')
+    
+    def __init__(self, spec: dict):
+        name = spec.get('name')
+        if not isinstance(name, str) or not name.strip():
+            raise RuleError(f"rule without name: {spec}")
+        if ':' in name or name != name.strip():
+            raise RuleError(f"{name!r}: rule name must not contain ':' or surrounding spaces")
+        if len(name) > RULE_NAME_MAX_LENGTH:
+            raise RuleError(f"{name}: rule name longer than {RULE_NAME_MAX_LENGTH} characters")
+        rule_type = spec.get('type', 'predicate')
+        if rule_type not in RULE_TYPES:
+            raise RuleError(f"{name}: unknown type {rule_type} (available: {', '.join(RULE_TYPES)})")
+        self.name = name
+        self.type = rule_type
+        self.threshold = spec.get('threshold')
+        self.ratio = spec.get('ratio')
+        if rule_type == 'velocity' and not isinstance(self.threshold, (int, float)):
+            raise RuleError(f"{name}: velocity rule needs numeric threshold")
+        if rule_type == 'amount_spike' and not isinstance(self.ratio, (int, float)):
+            raise RuleError(f"{name}: amount_spike rule needs numeric ratio")
+        self.message = spec.get('message', '')
+        try:
+            self.message.format_map(MESSAGE_SAMPLE)
+        except (KeyError, ValueError, IndexError) as e:
+            raise RuleError(f"{name}: invalid message template {self.message!r}: {e!r}") from e
+        
+        conditions = []
+        for field, rule in (spec.get('when') or {}).items():
+            if isinstance(rule, dict):
+                conditions.extend(Condition(field, op, value) for op, value in rule.items())
+            else:
+                conditions.append(Condition(field, '==', rule))
+        if rule_type == 'predicate' and not conditions:
+            raise RuleError(f"{name}: predicate rule needs at least one condition")
+        
+        # 인덱스 필드의 == / in 조건은 계획 단계에서 처리 → 평가 대상에서 제외
+        self.index = {}
+        remaining = []
+        for condition in conditions:
+            if condition.field in INDEX_FIELDS and condition.op in ('==', 'in'):
+                allowed = condition.value if condition.op == 'in' else frozenset([condition.value])
+                previous = self.index.get(condition.field)
+                self.index[condition.field] = allowed if previous is None else previous & allowed
+            else:
+                remaining.append(condition)
+        # 싼 조건 먼저 (같은 비용이면 파일 순서)
+        self.conditions = sorted(remaining, key=lambda condition: condition.cost)
+        self.match = self._compile_scalar()
+        
+        # 누적 카운터 (total_ns는 시간을 잰 timed건 기준)
+        self.evaluations = 0
+        self.hits = 0
+        self.timed = 0
+        self.total_ns = 0
+    
+    def _compile_scalar(self):
+        """match(tx, count, avg_amount) -> bool 함수 생성 (조건값은 이름으로 바인딩)"""
+        env = {}
+        parts = []
+        amount = "tx.get('amount', 0)"
+        if self.type == 'velocity':
+            env['_threshold'] = self.threshold
+            parts.append("count >= _threshold")
+        elif self.type == 'amount_spike':
+            env['_ratio'] = self.ratio
+            parts.append(f"avg_amount > 0 and {amount} > avg_amount * _ratio")
+        for i, condition in enumerate(self.conditions):
+            name = f"_v{i}"
+            env[name] = condition.value
+            getter = f"tx.get({condition.field!r}, {FIELD_DEFAULTS[condition.field]!r})"
+            parts.append(f"{getter} {OPS[condition.op][0]} {name}")
+        source = f"lambda tx, count, avg_amount: {' and '.join(parts) or 'True'}"
+        return eval(compile(source, f"<rule {self.name}>", 'eval'), env)
+    
+    def applies_to(self, key: tuple) -> bool:
+        for field, value in zip(INDEX_FIELDS, key):
+            allowed = self.index.get(field)
+            if allowed is not None and value not in allowed:
+                return False
+        return True
+    
+    def render(self, tx: dict, count: int, avg_amount: float) -> RuleMessage:
+        return RuleMessage(self.name, self.message.format_map(MessageContext(tx, count, avg_amount)))
+    
+    def stats(self) -> dict:
+        return {
+            'rule': self.name,
+            'evaluations': self.evaluations,
+            'hits': self.hits,
+            'avg_ns': self.total_ns / self.timed if self.timed else 0.0,
+            'total_seconds': self.total_ns / 1e9 * (self.evaluations / self.timed if self.timed else 0),
+        }
+
+class RulePlan:
+    """컴파일된 룰 목록 + (카테고리, 등급)별 적용 룰 캐시"""
+    
+    def __init__(self, spec: dict, source: str = None):
+        if not isinstance(spec, dict) or not isinstance(spec.get('rules'), list):
+            raise RuleError("rule file must be an object with a 'rules' list")
+        self.source = source
+        self.state = {**STATE_DEFAULTS, **(spec.get('state') or {})}
+        self.rules = [CompiledRule(rule) for rule in spec['rules']]
+        names = [rule.name for rule in self.rules]
+        if len(set(names)) != len(names):
+            raise RuleError(f"duplicate rule names: {names}")
+        self.stateful = any(rule.type != 'predicate' for rule in self.rules)
+        self._by_key = {}
+    
+    @classmethod
+    def load(cls, path: str):
+        try:
+            with open(path, encoding='utf-8') as f:
+                spec = json.load(f)
+        except json.JSONDecodeError as e:
+            raise RuleError(f"{path}: {e}") from e
+        return cls(spec, source=path)
+    
+    def for_key(self, category, tier) -> tuple:
+        """(merchant_category, user_tier)에 적용되는 룰 (파일 순서 유지)"""
+        key = (category, tier)
+        rules = self._by_key.get(key)
+        if rules is None:
+            rules = self._by_key[key] = tuple(rule for rule in self.rules if rule.applies_to(key))
+        return rules
+    
+    def inherit_stats(self, previous):
+        """재로드 시 같은 이름 룰의 누적 카운터 유지 (Prometheus counter 단조 증가)"""
+        old = {rule.name: rule for rule in previous.rules}
+        for rule in self.rules:
+            if rule.name in old:
+                rule.evaluations = old[rule.name].evaluations
+                rule.hits = old[rule.name].hits
+                rule.timed = old[rule.name].timed
+                rule.total_ns = old[rule.name].total_ns
+    
+    def stats(self) -> list:
+        return [rule.stats() for rule in self.rules]
+
+class RuleSet:
+    """룰 파일 핫 리로드 (mtime 변경 시 다시 컴파일, 실패하면 기존 계획 유지)"""
+    
+    def __init__(self, path: str):
+        self.path = path
+        self.mtime = os.stat(path).st_mtime_ns
+        self.plan = RulePlan.load(path)
+    
+    def maybe_reload(self) -> bool:
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError as e:
+            print(f"[Rules] Cannot stat {self.path}: {e}")
+            return False
+        if mtime == self.mtime:
+            return False
+        self.mtime = mtime
+        try:
+            plan = RulePlan.load(self.path)
+        except (RuleError, OSError) as e:
+            print(f"[Rules] Reload failed, keeping previous rules: {e}")
+            return False
+        if plan.state != self.plan.state:
+            # velocity 윈도우 등은 사용자 상태에 이미 반영돼 있으므로 재시작 필요
+            print(f"[Rules] 'state' changes need a restart, keeping {self.plan.state}")
+            plan.state = self.plan.state
+        plan.inherit_stats(self.plan)
+        self.plan = plan
+        print(f"[Rules] Reloaded {len(plan.rules)} rules from {self.path}: "
+              f"{', '.join(rule.name for rule in plan.rules)}")
+        return True
+
+class BatchColumns:
+    """check_batch용 컬럼 (조건에 쓰인 필드만 필요할 때 생성)"""
+    
+    def __init__(self, transactions: list, **prepared):
+        self.transactions = transactions
+        self._columns = dict(prepared)
+    
+    def get(self, field: str) -> np.ndarray:
+        column = self._columns.get(field)
+        if column is None:
+            kind, default = FIELDS[field]
+            values = [tx.get(field, default) for tx in self.transactions]
+            if kind == 'num':
+                column = np.array(values, dtype=np.float64)
+            else:
+                column = np.empty(len(values), dtype=object)
+                column[:] = values
+            self._columns[field] = column
+        return column
+
+def evaluate_batch(plan: RulePlan, transactions: list, keys: list,
+                   recent_counts: np.ndarray, avg_amounts: np.ndarray, amounts: np.ndarray) -> list:
+    """
+    룰별로 걸린 행 인덱스 계산
+    keys: 행별 (merchant_category, user_tier)
+    Returns: [(rule, hit_indices), ...] (룰 파일 순서)
+    """
+    # (카테고리, 등급)별 행 묶음 → 룰별 후보 행
+    groups = {}
+    for i, key in enumerate(keys):
+        groups.setdefault(key, []).append(i)
+    candidates = {id(rule): [] for rule in plan.rules}
+    for key, indices in groups.items():
+        for rule in plan.for_key(*key):
+            candidates[id(rule)].extend(indices)
+    
+    columns = BatchColumns(transactions, amount=amounts)
+    hits = []
+    for rule in plan.rules:
+        start = time.perf_counter_ns()
+        idx = np.array(candidates[id(rule)], dtype=np.int64)
+        rule.evaluations += len(idx)
+        rule.timed += len(idx)
+        if len(idx) and rule.type == 'velocity':
+            idx = idx[recent_counts[idx] >= rule.threshold]
+        elif len(idx) and rule.type == 'amount_spike':
+            avg = avg_amounts[idx]
+            idx = idx[(avg > 0) & (amounts[idx] > avg * rule.ratio)]
+        for condition in rule.conditions:
+            if not len(idx):
+                break
+            idx = idx[condition.mask(columns.get(condition.field)[idx])]
+        rule.hits += len(idx)
+        rule.total_ns += time.perf_counter_ns() - start
+        if len(idx):
+            hits.append((rule, np.sort(idx)))
+    return hits
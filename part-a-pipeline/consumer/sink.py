@@ -0,0 +1,180 @@
+"""
+PostgreSQL 적재 방식 (Sink)
+- insert: executemany INSERT (기존 방식)
+- copy:   binary COPY → 임시 staging 테이블 → INSERT ... ON CONFLICT 병합
+- null:   DB 쓰기 없음 (benchmarks/e2e_bench.py에서 PostgreSQL 없이 Redis~룰 평가 구간 측정)
+중복 판정 컬럼은 TX_CONFLICT_TARGET (파티션 테이블이면 tx_id, created_at)
+"""
+
+from contextlib import nullcontext
+from datetime import datetime, timedelta, timezone
+from config import Config
+
+PG_EPOCH = datetime(2000, 1, 1, tzinfo=timezone.utc)
+PG_EPOCH_UNIX = 946684800.0
+
+TX_COLUMNS = (
+    'tx_id', 'card_number', 'amount', 'merchant', 'user_id', 'user_tier',
+    'merchant_category', 'region', 'hour', 'day_of_week', 'is_weekend',
+    'time_slot', 'is_fraud', 'fraud_rules', 'created_at', 'processed_at'
+)
+
+def to_row(tx: dict, ts_converter=None) -> tuple:
+    """트랜잭션 dict → TX_COLUMNS 순서의 튜플"""
+    created_at = tx['created_at']
+    processed_at = tx['processed_at']
+    if ts_converter is not None:
+        created_at = ts_converter(created_at)
+        processed_at = ts_converter(processed_at)
+    return (
+        tx['tx_id'],
+        tx['card_number'],
+        tx['amount'],
+        tx['merchant'],
+        tx['user_id'],
+        tx['user_tier'],
+        tx['merchant_category'],
+        tx['region'],
+        tx['hour'],
+        tx['day_of_week'],
+        tx['is_weekend'],
+        tx['time_slot'],
+        tx['is_fraud'],
+        tx['fraud_rules'],
+        created_at,
+        processed_at
+    )
+
+class InsertSink:
+    """executemany 기반 INSERT (Phase 3 기본값), 재전달된 tx_id는 무시"""
+    name = 'insert'
+    
+    def __init__(self, schema: str, conflict_target: str = 'tx_id'):
+        self.query = f"""
+            INSERT INTO {schema}.transactions
+            ({', '.join(TX_COLUMNS)})
+            VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13, $14,
+                    to_timestamp($15), to_timestamp($16))
+            ON CONFLICT ({conflict_target}) DO NOTHING
+        """
+    
+    async def init_connection(self, conn):
+        pass
+    
+    async def write(self, conn, transactions: list) -> int:
+        await conn.executemany(self.query, [to_row(tx) for tx in transactions])
+        return len(transactions)
+
+class CopySink:
+    """
+    Binary COPY 기반 적재
+    - 타임스탬프는 클라이언트에서 datetime으로 변환 (to_timestamp 미사용)
+    - staging 테이블에 COPY 후 ON CONFLICT DO NOTHING으로 병합
+      → 재전송된 트랜잭션도 중복 저장되지 않음 (멱등)
+    """
+    name = 'copy'
+    staging_table = 'tx_staging'
+    
+    def __init__(self, schema: str, conflict_target: str = 'tx_id'):
+        # created_at/processed_at은 timestamptz로 받아 to_timestamp()와 동일하게
+        # 세션 타임존 기준으로 timestamp 컬럼에 변환되도록 함
+        self.create_staging = f"""
+            CREATE TEMP TABLE IF NOT EXISTS {self.staging_table} (
+                tx_id TEXT,
+                card_number TEXT,
+                amount BIGINT,
+                merchant TEXT,
+                user_id TEXT,
+                user_tier TEXT,
+                merchant_category TEXT,
+                region TEXT,
+                hour INT,
+                day_of_week INT,
+                is_weekend BOOLEAN,
+                time_slot TEXT,
+                is_fraud BOOLEAN,
+                fraud_rules TEXT,
+                created_at TIMESTAMPTZ,
+                processed_at TIMESTAMPTZ
+            ) ON COMMIT DELETE ROWS
+        """
+        self.merge = f"""
+            INSERT INTO {schema}.transactions ({', '.join(TX_COLUMNS)})
+            SELECT {', '.join(TX_COLUMNS)} FROM {self.staging_table}
+            ON CONFLICT ({conflict_target}) DO NOTHING
+        """
+    
+    @staticmethod
+    def _to_datetime(ts: float) -> datetime:
+        # to_timestamp(float8)와 같은 반올림 (PostgreSQL epoch 기준 µs로 바꾼 뒤 rint)
+        # datetime.fromtimestamp는 소수부만 반올림해 1µs 어긋날 수 있음 → (tx_id, created_at) 중복 판정이 sink마다 달라짐
+        return PG_EPOCH + timedelta(microseconds=round((ts - PG_EPOCH_UNIX) * 1e6))
+    
+    async def init_connection(self, conn):
+        # 임시 테이블은 커넥션 단위로 유지되므로 풀 커넥션 생성 시 1회만 만듦
+        await conn.execute(self.create_staging)
+    
+    async def write(self, conn, transactions: list) -> int:
+        records = [to_row(tx, self._to_datetime) for tx in transactions]
+        async with conn.transaction():
+            await conn.copy_records_to_table(
+                self.staging_table,
+                records=records,
+                columns=TX_COLUMNS
+            )
+            status = await conn.execute(self.merge)
+        # status: "INSERT 0 <rows>"
+        return int(status.split()[-1])
+
+class NullSink:
+    """적재 없이 건수만 반환 (NullPool과 함께 사용)"""
+    name = 'null'
+    
+    def __init__(self, schema: str, conflict_target: str = 'tx_id'):
+        pass
+    
+    async def init_connection(self, conn):
+        pass
+    
+    async def write(self, conn, transactions: list) -> int:
+        return len(transactions)
+
+class NullConnection:
+    async def execute(self, query: str, *args) -> str:
+        return 'INSERT 0 0'
+    
+    async def executemany(self, query: str, args):
+        pass
+    
+    def transaction(self):
+        return nullcontext()
+
+class NullPool:
+    """NullSink용 asyncpg 풀 대체 (consumer가 쓰는 메서드만)"""
+    
+    def __init__(self):
+        self._conn = NullConnection()
+    
+    def acquire(self):
+        return nullcontext(self._conn)
+    
+    def get_size(self) -> int:
+        return 0
+    
+    def get_idle_size(self) -> int:
+        return 0
+    
+    async def close(self):
+        pass
+
+SINKS = {
+    InsertSink.name: InsertSink,
+    CopySink.name: CopySink,
+    NullSink.name: NullSink,
+}
+
+def create_sink(mode: str = None):
+    mode = mode or Config.SINK_MODE
+    if mode not in SINKS:
+        raise ValueError(f"Unknown SINK_MODE: {mode} (available: {', '.join(SINKS)})")
+    return SINKS[mode](Config.POSTGRES_SCHEMA, Config.TX_CONFLICT_TARGET)
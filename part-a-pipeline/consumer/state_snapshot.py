@@ -0,0 +1,222 @@
+"""
+룰 엔진 사용자 상태 스냅샷 (재시작 시 AMOUNT_SPIKE 평균/velocity 윈도우 복원)
+
+파일 형식: 4KB 헤더(magic + JSON 메타데이터) + 사용자별 고정 크기 레코드 배열
+- 레코드는 user_id 순 정렬 → 복원 시 파일 전체를 읽지 않고 memmap + 이진 탐색
+- 저장: 이벤트 루프에서 레코드 배열만 만들고(numpy 일괄 변환, 그 시점 상태 그대로)
+  파일 쓰기/fsync는 asyncio.to_thread로 (fork하지 않음 → asyncpg/redis 소켓, 스레드 상태 공유 문제 없음)
+- 임시 파일에 쓰고 fsync 후 os.replace → 쓰다가 죽어도 이전 스냅샷 유지
+- 복원: 사용자가 처음 조회될 때 레코드 1개만 UserState로 변환 (lazy)
+"""
+
+import os
+import json
+import time
+import asyncio
+import numpy as np
+from itertools import chain
+from state_store import UserState
+
+MAGIC = b'FDSSNAP1'
+HEADER_SIZE = 4096
+USER_ID_BYTES = 20  # fds.transactions.user_id VARCHAR(20)
+# 사용자별 보관할 최근 거래 시각 수 (VELOCITY 임계값 5보다 충분히 큼)
+# 분당 16건 넘는 사용자는 복원 후 카운트가 16에서 다시 시작 (VELOCITY 탐지 여부는 동일)
+VELOCITY_SLOTS = 16
+
+SNAPSHOT_DTYPE = np.dtype([
+    ('user_id', f'S{USER_ID_BYTES}'),
+    ('amount_sum', '<f8'),
+    ('amount_count', '<i4'),
+    ('last_seen', '<f8'),
+    ('velocity_len', 'u1'),
+    # last_seen 기준 상대 시각 (윈도우 60초 내라 float32로 충분)
+    ('velocity', '<f4', (VELOCITY_SLOTS,)),
+])
+
+def build_records(states) -> np.ndarray:
+    """{user_id: UserState} → user_id 순 정렬된 레코드 배열"""
+    n = len(states)
+    records = np.zeros(n, dtype=SNAPSHOT_DTYPE)
+    if n == 0:
+        return records
+    records['user_id'] = np.array(list(states.keys()), dtype=f'S{USER_ID_BYTES}')
+    values = list(states.values())
+    records['amount_sum'] = np.fromiter((state.amount_sum for state in values), dtype=np.float64, count=n)
+    records['amount_count'] = np.fromiter((state.amount_count for state in values), dtype=np.int32, count=n)
+    last_seen = np.fromiter((state.last_seen for state in values), dtype=np.float64, count=n)
+    records['last_seen'] = last_seen
+    
+    # 최근 VELOCITY_SLOTS건만 평탄화해서 한 번에 채움 (사용자별 numpy 호출 없음)
+    recent = [events if len(events) <= VELOCITY_SLOTS else events[-VELOCITY_SLOTS:]
+              for events in (state.velocity.events for state in values)]
+    lengths = np.fromiter((len(events) for events in recent), dtype=np.int64, count=n)
+    total = int(lengths.sum())
+    if total:
+        flat = np.fromiter(chain.from_iterable(recent), dtype=np.float64, count=total)
+        rows = np.repeat(np.arange(n), lengths)
+        cols = np.arange(total) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        records['velocity'][rows, cols] = flat - last_seen[rows]
+    records['velocity_len'] = lengths
+    
+    return records[np.argsort(records['user_id'], kind='stable')]
+
+def write_snapshot(path: str, states, offset: str = None) -> int:
+    """원자적 저장 (임시 파일 → fsync → rename). Returns: 사용자 수"""
+    return write_records(path, build_records(states), offset)
+
+def write_records(path: str, records: np.ndarray, offset: str = None) -> int:
+    """build_records 결과 저장 (상태를 읽지 않으므로 다른 스레드에서 호출 가능)"""
+    meta = {
+        'version': 1,
+        'count': len(records),
+        'created_at': time.time(),
+        'offset': offset,
+        'dtype': SNAPSHOT_DTYPE.descr,
+    }
+    header = MAGIC + json.dumps(meta).encode()
+    if len(header) > HEADER_SIZE:
+        raise ValueError("snapshot header too large")
+    
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp.{os.getpid()}"
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(header.ljust(HEADER_SIZE, b'\0'))
+            records.tofile(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    # rename 자체를 디스크에 반영
+    dir_fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(dir_fd)
+    finally:
+        os.close(dir_fd)
+    return len(records)
+
+class StateSnapshot:
+    """
+    읽기 전용 스냅샷. 사용자별 레코드는 조회 시점에만 읽음
+    - 파일(open): memmap
+    - 메모리(from_records): DB 워밍업(bootstrap.py) 결과
+    """
+    
+    def __init__(self, records: np.ndarray, meta: dict):
+        self.meta = meta
+        self.records = records
+        self.count = len(records)
+        self.offset = meta.get('offset')
+        self.created_at = meta['created_at']
+        self._user_ids = records['user_id']
+        # 이미 복원한(또는 이후 메모리에서 제거된) 사용자는 다시 복원하지 않음
+        self._consumed = np.zeros(self.count, dtype=bool)
+    
+    @classmethod
+    def load(cls, path: str):
+        with open(path, 'rb') as f:
+            header = f.read(HEADER_SIZE)
+        if not header.startswith(MAGIC):
+            raise ValueError(f"not a state snapshot: {path}")
+        meta = json.loads(header[len(MAGIC):].rstrip(b'\0'))
+        if np.dtype([tuple(field) for field in meta['dtype']]) != SNAPSHOT_DTYPE:
+            raise ValueError(f"snapshot record layout mismatch: {path}")
+        if meta['count']:
+            records = np.memmap(path, dtype=SNAPSHOT_DTYPE, mode='r',
+                                offset=HEADER_SIZE, shape=(meta['count'],))
+        else:
+            records = np.zeros(0, dtype=SNAPSHOT_DTYPE)
+        return cls(records, meta)
+    
+    @classmethod
+    def from_records(cls, records: np.ndarray, offset: str = None):
+        """정렬되지 않은 레코드 배열 → 스냅샷 (user_id 순 정렬)"""
+        records = records[np.argsort(records['user_id'], kind='stable')]
+        return cls(records, {'count': len(records), 'created_at': time.time(), 'offset': offset})
+    
+    @classmethod
+    def open(cls, path: str):
+        """파일이 없거나 손상됐으면 None (빈 상태로 시작)"""
+        if not path or not os.path.exists(path):
+            return None
+        try:
+            return cls.load(path)
+        except (ValueError, KeyError, OSError) as e:
+            print(f"[Snapshot] Ignoring {path}: {e}")
+            return None
+    
+    def restore(self, user_id: str, velocity_window: float, now: float, ttl_seconds: float = None,
+                allowed_lateness: float = 0):
+        """사용자 레코드 → UserState (없거나 TTL 지났으면 None)"""
+        key = user_id.encode()
+        index = int(np.searchsorted(self._user_ids, key))
+        if index >= self.count or self._consumed[index] or self._user_ids[index] != key:
+            return None
+        self._consumed[index] = True
+        
+        record = self.records[index]
+        last_seen = float(record['last_seen'])
+        if ttl_seconds is not None and last_seen < now - ttl_seconds:
+            return None
+        
+        state = UserState(velocity_window, last_seen, allowed_lateness)
+        state.amount_sum = float(record['amount_sum'])
+        state.amount_count = int(record['amount_count'])
+        velocity_len = int(record['velocity_len'])
+        if velocity_len:
+            # 이전 버전(도착 순 deque) 스냅샷도 정렬해서 복원
+            offsets = np.sort(record['velocity'][:velocity_len].astype(np.float64))
+            state.velocity.events.extend((offsets + last_seen).tolist())
+        return state
+
+class SnapshotWriter:
+    """주기적 스냅샷 (레코드 변환은 이벤트 루프, 파일 쓰기는 스레드)"""
+    
+    def __init__(self, path: str, interval: float):
+        self.path = path
+        self.interval = interval
+        self.next_at = time.time() + interval
+        self._task = None
+    
+    def maybe_save(self, states, offset: str = None) -> bool:
+        """주기가 됐고 이전 저장이 끝났으면 저장 시작 (이벤트 루프에서 호출, 쓰기 완료를 기다리지 않음)"""
+        now = time.time()
+        if now < self.next_at or (self._task is not None and not self._task.done()):
+            return False
+        self.next_at = now + self.interval
+        # 레코드 배열은 상태의 복사본 → 이후 상태가 바뀌어도 이 시점 그대로 저장
+        start = time.perf_counter()
+        records = build_records(states)
+        build_seconds = time.perf_counter() - start
+        self._task = asyncio.create_task(self._write(records, offset, build_seconds))
+        return True
+    
+    async def _write(self, records: np.ndarray, offset: str, build_seconds: float):
+        start = time.perf_counter()
+        try:
+            count = await asyncio.to_thread(write_records, self.path, records, offset)
+        except Exception as e:
+            print(f"[Snapshot] Save failed: {e}", flush=True)
+            return
+        print(f"[Snapshot] Saved {count:,} users → {self.path} "
+              f"(build {build_seconds * 1000:.0f}ms on loop, write {time.perf_counter() - start:.2f}s, "
+              f"offset: {offset})", flush=True)
+    
+    def save(self, states, offset: str = None) -> int:
+        """동기 저장 (종료 시 최종 스냅샷용)"""
+        start = time.perf_counter()
+        count = write_snapshot(self.path, states, offset)
+        print(f"[Snapshot] Saved {count:,} users → {self.path} "
+              f"({time.perf_counter() - start:.2f}s, offset: {offset})", flush=True)
+        return count
+    
+    async def wait(self):
+        """진행 중인 백그라운드 저장 완료 대기"""
+        if self._task is not None:
+            await self._task
+            self._task = None
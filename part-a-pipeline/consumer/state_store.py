@@ -0,0 +1,137 @@
+"""
+FDS 룰 엔진용 사용자 상태 저장소
+- 사용자별 레코드는 __slots__ 객체 (velocity 윈도우 + 이동평균 금액)
+- OrderedDict 기반 LRU: 접근 시 맨 뒤로 이동, 용량 초과 시 맨 앞부터 제거
+- idle TTL: 마지막 거래 이후 ttl초가 지난 사용자 제거
+- 스냅샷(state_snapshot.py) 연결 시 처음 보는 사용자는 스냅샷 레코드에서 복원
+- velocity 윈도우는 event-time 기준 (allowed_lateness초까지 늦게 도착한 거래도 정확히 셈)
+"""
+
+from collections import OrderedDict
+from velocity import SlidingWindowCounter
+
+# 사용자 1명당 대략적인 메모리 (velocity 리스트 + 레코드 + dict 엔트리 + 키, tracemalloc 측정치)
+APPROX_BYTES_PER_USER = 512
+
+class UserState:
+    """사용자 1명의 룰 엔진 상태"""
+    __slots__ = ('velocity', 'amount_sum', 'amount_count', 'last_seen')
+    
+    def __init__(self, velocity_window: float, now: float, allowed_lateness: float = 0):
+        self.velocity = SlidingWindowCounter(velocity_window, allowed_lateness)
+        self.amount_sum = 0
+        self.amount_count = 0
+        self.last_seen = now
+
+class UserStateStore:
+    def __init__(self, velocity_window: float, max_users: int = None,
+                 ttl_seconds: float = None, max_memory_mb: int = None, allowed_lateness: float = 0):
+        self.velocity_window = velocity_window
+        self.allowed_lateness = allowed_lateness
+        self.ttl_seconds = ttl_seconds
+        if max_memory_mb:
+            memory_cap = max_memory_mb * 1024 * 1024 // APPROX_BYTES_PER_USER
+            max_users = min(max_users, memory_cap) if max_users else memory_cap
+        self.max_users = max_users
+        
+        self._states = OrderedDict()
+        self.latest_seen = 0
+        self.snapshot = None
+        
+        # 메트릭용 카운터 (누적)
+        self.hits = 0
+        self.misses = 0
+        self.evicted_ttl = 0
+        self.evicted_lru = 0
+        self.restored = 0
+        self.out_of_order = 0  # 사용자 최신 거래보다 이전 시각으로 도착한 거래
+        self.late = 0  # 그중 allowed_lateness도 넘긴 거래 (velocity 건수가 모자랄 수 있음)
+    
+    def attach_snapshot(self, snapshot):
+        """메모리에 없는 사용자는 snapshot.restore()로 먼저 찾아봄"""
+        self.snapshot = snapshot
+    
+    def get(self, user_id: str, now: float) -> UserState:
+        """사용자 상태 조회 (없으면 생성), LRU 순서와 last_seen 갱신"""
+        states = self._states
+        state = states.get(user_id)
+        if state is None:
+            self.misses += 1
+            if self.snapshot is not None:
+                state = self.snapshot.restore(user_id, self.velocity_window, now, self.ttl_seconds,
+                                              self.allowed_lateness)
+            if state is None:
+                state = UserState(self.velocity_window, now, self.allowed_lateness)
+            else:
+                self.restored += 1
+                state.last_seen = max(state.last_seen, now)
+            states[user_id] = state
+            self._evict_on_insert(now)
+        else:
+            self.hits += 1
+            states.move_to_end(user_id)
+            # 지연 도착 거래로 last_seen(TTL, 스냅샷 기준 시각)이 뒤로 가지 않도록
+            if now > state.last_seen:
+                state.last_seen = now
+        if now > self.latest_seen:
+            self.latest_seen = now
+        return state
+    
+    def peek(self, user_id: str):
+        """LRU 순서를 바꾸지 않고 조회 (없으면 None)"""
+        return self._states.get(user_id)
+    
+    def _evict_on_insert(self, now: float):
+        # 신규 사용자 1명당 최대 2명까지 점진적으로 제거 → 별도 sweep 없이 분할상환 O(1)
+        states = self._states
+        if self.ttl_seconds is not None:
+            cutoff = now - self.ttl_seconds
+            for _ in range(2):
+                user_id, oldest = next(iter(states.items()))
+                if oldest.last_seen >= cutoff:
+                    break
+                del states[user_id]
+                self.evicted_ttl += 1
+        if self.max_users is not None:
+            while len(states) > self.max_users:
+                states.popitem(last=False)
+                self.evicted_lru += 1
+    
+    def evict_idle(self, now: float = None) -> int:
+        """TTL이 지난 사용자 전체 제거 (now 미지정 시 가장 최근 거래 시각 기준)"""
+        if self.ttl_seconds is None:
+            return 0
+        now = self.latest_seen if now is None else now
+        cutoff = now - self.ttl_seconds
+        states = self._states
+        evicted = 0
+        while states:
+            user_id, oldest = next(iter(states.items()))
+            if oldest.last_seen >= cutoff:
+                break
+            del states[user_id]
+            evicted += 1
+        self.evicted_ttl += evicted
+        return evicted
+    
+    def stats(self) -> dict:
+        return {
+            'state_users': len(self._states),
+            'state_hits': self.hits,
+            'state_misses': self.misses,
+            'state_evicted_ttl': self.evicted_ttl,
+            'state_evicted_lru': self.evicted_lru,
+            'state_restored': self.restored,
+            'state_out_of_order': self.out_of_order,
+            'state_late': self.late,
+        }
+    
+    def users(self) -> OrderedDict:
+        """user_id → UserState (LRU 순, 복사본 아님)"""
+        return self._states
+    
+    def __len__(self) -> int:
+        return len(self._states)
+    
+    def __contains__(self, user_id: str) -> bool:
+        return user_id in self._states
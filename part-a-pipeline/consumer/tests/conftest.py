@@ -0,0 +1,8 @@
+import os
+import sys
+
+# consumer 모듈은 서비스 디렉터리 기준 import (python main.py와 동일)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# codec, histogram, exporter는 part-a-pipeline/common 공용 모듈 (main.py의 sys.path와 동일)
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'common'))
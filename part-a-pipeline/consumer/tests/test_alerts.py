@@ -0,0 +1,44 @@
+from alerts import AlertDeduper, UserRateLimiter
+
+def test_rate_limiter_limits_per_user_window():
+    limiter = UserRateLimiter(limit=2, window=60)
+    assert limiter.allow('a', 0)
+    assert limiter.allow('a', 10)
+    assert not limiter.allow('a', 20)
+    assert limiter.allow('b', 20)  # 사용자별 한도
+    # (0, 60]: 0초 건은 윈도우 밖
+    assert limiter.allow('a', 60)
+    assert not limiter.allow('a', 61)
+
+def test_refund_returns_only_the_failed_send():
+    limiter = UserRateLimiter(limit=2, window=60)
+    assert limiter.allow('a', 5)
+    assert limiter.allow('a', 5)
+    assert not limiter.allow('a', 5)
+    # 전송 실패 → 1건만 되돌려 재전달 시 다시 보낼 수 있음
+    limiter.refund('a', 5)
+    assert limiter.allow('a', 5)
+    assert not limiter.allow('a', 5)
+
+def test_refund_without_matching_send_is_noop():
+    limiter = UserRateLimiter(limit=1, window=60)
+    limiter.refund('unknown', 1)
+    assert limiter.allow('a', 1)
+    limiter.refund('a', 2)  # 다른 시각
+    assert not limiter.allow('a', 3)
+
+def test_purge_drops_idle_users():
+    limiter = UserRateLimiter(limit=5, window=10)
+    limiter.allow('a', 0)
+    limiter.allow('b', 8)
+    assert limiter.purge(15) == 1
+    assert limiter.purge(30) == 1
+
+def test_deduper_forget_allows_resend():
+    deduper = AlertDeduper(max_size=2)
+    assert deduper.is_new('t1')
+    assert not deduper.is_new('t1')
+    deduper.forget(['t1'])
+    assert deduper.is_new('t1')
+    assert deduper.is_new('t2') and deduper.is_new('t3')
+    assert deduper.is_new('t1')  # 가장 오래된 항목부터 밀려남
@@ -0,0 +1,45 @@
+import random
+from fds_rules import FDSRuleEngine
+
+CATEGORIES = ['online_shopping', 'luxury', 'cafe', 'delivery']
+TIERS = ['normal', 'premium', 'vip']
+
+def make_transactions(n: int, users: int, seed: int) -> list:
+    """velocity / amount spike / 새벽 고액 / 명품 조건이 모두 나오도록 섞은 거래"""
+    rng = random.Random(seed)
+    ts = 1_700_000_000.0
+    transactions = []
+    for i in range(n):
+        ts += rng.expovariate(20)
+        hour = rng.choice([2, 3, 10, 14, 21])
+        amount = rng.choice([5000, 30000, 120000, 6_000_000, 15_000_000])
+        transactions.append({
+            'tx_id': f"tx{i}",
+            'user_id': f"user_{rng.randrange(users)}",
+            'amount': amount,
+            'merchant_category': rng.choice(CATEGORIES),
+            'user_tier': rng.choice(TIERS),
+            'hour': hour,
+            'day_of_week': rng.randrange(7),
+            'is_weekend': rng.random() < 0.3,
+            'region': '서울',
+            'time_slot': 'dawn' if hour < 6 else 'day',
+            'created_at': ts,
+        })
+    return transactions
+
+def test_check_batch_matches_check():
+    transactions = make_transactions(5000, users=30, seed=1)
+    single = FDSRuleEngine()
+    batched = FDSRuleEngine()
+    expected = [single.check(tx) for tx in transactions]
+    got = []
+    for start in range(0, len(transactions), 137):
+        got.extend(batched.check_batch(transactions[start:start + 137]))
+    assert got == expected
+    # 모든 룰이 한 번 이상 걸려야 비교 의미가 있음
+    fired = {message.split(':', 1)[0] for _, rules in expected for message in rules}
+    assert fired == {rule.name for rule in single.rules.plan.rules}
+
+def test_check_batch_empty():
+    assert FDSRuleEngine().check_batch([]) == []
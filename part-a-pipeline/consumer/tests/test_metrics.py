@@ -0,0 +1,66 @@
+import csv
+import json
+import asyncio
+import numpy as np
+from metrics import MetricsCollector
+
+# 기존 phase*_consumer_metrics.csv 컬럼 (노트북, docs 분석 스크립트가 읽는 형식)
+BASELINE_COLUMNS = [
+    'timestamp', 'tps', 'success_count', 'error_count',
+    'latency_avg_ms', 'latency_p50_ms', 'latency_p95_ms', 'latency_p99_ms',
+    'cpu_percent', 'memory_percent', 'queue_length', 'fraud_count'
+]
+
+def read_rows(path: str) -> list:
+    with open(path, newline='') as f:
+        return list(csv.reader(f))
+
+def test_metrics_csv_keeps_baseline_schema(tmp_path):
+    metrics = MetricsCollector(str(tmp_path), phase=9)
+    for i in range(1500):
+        metrics.record_success(0.001 * (i % 50 + 1))
+    metrics.record_error(2)
+    result = metrics.flush(queue_length=7, fraud_count=3, state_stats={
+        'state_users': 10, 'state_hits': 5, 'state_misses': 4,
+        'state_evicted_ttl': 1, 'state_evicted_lru': 2
+    })
+    
+    header, row = read_rows(tmp_path / 'phase9_consumer_metrics.csv')
+    assert header == BASELINE_COLUMNS
+    assert dict(zip(header, row)) == {column: str(result[column]) for column in BASELINE_COLUMNS}
+    
+    # 추가 항목은 같은 timestamp로 별도 파일
+    header, row = read_rows(tmp_path / 'phase9_consumer_metrics_ext.csv')
+    extended = dict(zip(header, row))
+    assert extended['timestamp'] == result['timestamp']
+    assert extended['state_users'] == '10'
+    assert extended['state_evicted'] == '3'
+    assert float(extended['latency_p999_ms']) >= float(result['latency_p99_ms']) > 0
+
+def test_existing_files_are_appended_without_new_header(tmp_path):
+    for _ in range(2):
+        metrics = MetricsCollector(str(tmp_path), phase=9)
+        metrics.record_success(0.01)
+        metrics.flush()
+    rows = read_rows(tmp_path / 'phase9_consumer_metrics.csv')
+    assert len(rows) == 3 and rows[0] == BASELINE_COLUMNS
+    assert len(read_rows(tmp_path / 'phase9_consumer_metrics_ext.csv')) == 3
+
+def test_flush_async_writes_same_files(tmp_path):
+    async def scenario():
+        metrics = MetricsCollector(str(tmp_path), phase=9)
+        metrics.record_success(0.02)
+        metrics.record_stage('fetch', 0.001)
+        metrics.record_stage_array('queue_wait', np.array([0.001, 0.002, 0.004]))
+        return await metrics.flush_async(queue_length=1)
+    
+    result = asyncio.run(scenario())
+    _, row = read_rows(tmp_path / 'phase9_consumer_metrics.csv')
+    assert row[0] == result['timestamp']
+    stages = {row[1]: row for row in read_rows(tmp_path / 'phase9_consumer_stages.csv')[1:]}
+    assert set(stages) == {'fetch', 'queue_wait'}
+    assert stages['queue_wait'][2] == '3'
+    with open(tmp_path / 'phase9_consumer_latency.jsonl') as f:
+        record = json.loads(f.read())
+    assert record['timestamp'] == result['timestamp']
+    assert record['stages']['queue_wait']['total'] == 3
@@ -0,0 +1,76 @@
+import json
+import asyncio
+import pytest
+from fds_rules import FDSRuleEngine
+from rollup import BatchRollup, RollupSink
+from test_check_batch import make_transactions
+from test_sink_pg import DSN, read_sql, run_with_database
+
+requires_postgres = pytest.mark.skipif(not DSN, reason="FDS_TEST_POSTGRES_DSN not set")
+
+def test_rule_hits_use_rule_name_not_message_text(tmp_path):
+    # 메시지 본문에 ':'가 있어도 룰 이름으로 집계
+    rules_path = tmp_path / 'rules.json'
+    rules_path.write_text(json.dumps({'rules': [
+        {'name': 'LATE_NIGHT', 'when': {'hour': {'<': 6}}, 'message': '{hour}:00 결제'},
+        {'name': 'BIG', 'when': {'amount': {'>=': 6_000_000}}, 'message': 'amount: {amount}'},
+    ]}))
+    engine = FDSRuleEngine(rules_path=str(rules_path))
+    transactions = make_transactions(500, users=10, seed=3)
+    rollup = BatchRollup()
+    for tx, (_, fraud_rules) in zip(transactions, engine.check_batch(transactions)):
+        tx['processed_at'] = 1_699_999_980 + 25.5  # 분 버킷 1_699_999_980
+        rollup.add(tx, fraud_rules)
+    
+    late_night = sum(1 for tx in transactions if tx['hour'] < 6)
+    big = sum(1 for tx in transactions if tx['amount'] >= 6_000_000)
+    assert late_night and big
+    assert rollup.rule_hits == {(1_699_999_980, 'LATE_NIGHT'): late_night, (1_699_999_980, 'BIG'): big}
+    totals = list(rollup.totals.values())
+    assert sum(row[0] for row in totals) == 500
+    assert sum(row[2] for row in totals) == sum(1 for tx in transactions if tx['hour'] < 6 or tx['amount'] >= 6_000_000)
+
+@requires_postgres
+def test_verify_accepts_current_schema_and_long_rule_names():
+    async def check(conn):
+        sink = RollupSink('fds')
+        await sink.verify(conn)
+        rollup = BatchRollup()
+        rollup.rule_hits[(1_700_000_040, 'CARD_TESTING_SMALL_AMOUNT_BURST_RULE')] = 2
+        rollup.totals[(1_700_000_040, 'luxury', 'vip')] = [1, 100, 1, 100]
+        await sink.write(conn, rollup)
+        assert await conn.fetchval("SELECT hit_count FROM fds.rule_hits_minute") == 2
+    
+    run_with_database([read_sql('init_schema.sql')], check)
+
+@requires_postgres
+def test_verify_fails_with_migration_hint():
+    legacy = """
+        CREATE SCHEMA fds;
+        CREATE TABLE fds.tx_rollup_minute (
+            bucket TIMESTAMP NOT NULL, merchant_category VARCHAR(30) NOT NULL, user_tier VARCHAR(10) NOT NULL,
+            tx_count BIGINT NOT NULL DEFAULT 0, amount_sum BIGINT NOT NULL DEFAULT 0,
+            fraud_count BIGINT NOT NULL DEFAULT 0, fraud_amount BIGINT NOT NULL DEFAULT 0,
+            PRIMARY KEY (bucket, merchant_category, user_tier)
+        );
+        CREATE TABLE fds.rule_hits_minute (
+            bucket TIMESTAMP NOT NULL, rule VARCHAR(30) NOT NULL, hit_count BIGINT NOT NULL DEFAULT 0,
+            PRIMARY KEY (bucket, rule)
+        );
+        INSERT INTO fds.rule_hits_minute VALUES ('2026-01-01 00:00', 'VELOCITY', 3);
+    """
+    
+    async def check(conn):
+        sink = RollupSink('fds')
+        with pytest.raises(RuntimeError, match=r'rule_hits_minute\.rule is character varying.*init_schema\.sql'):
+            await sink.verify(conn)
+        await conn.execute(read_sql('init_schema.sql'))
+        await conn.execute(read_sql('init_schema.sql'))
+        await sink.verify(conn)
+        assert await conn.fetchval("SELECT rule FROM fds.rule_hits_minute") == 'VELOCITY'
+        
+        await conn.execute("DROP TABLE fds.tx_rollup_minute")
+        with pytest.raises(RuntimeError, match=r'fds\.tx_rollup_minute missing'):
+            await sink.verify(conn)
+    
+    run_with_database([legacy], check)
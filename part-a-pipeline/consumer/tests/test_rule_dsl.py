@@ -0,0 +1,151 @@
+import os
+import json
+import time
+import pytest
+from collections import defaultdict
+from fds_rules import FDSRuleEngine
+from rule_dsl import RulePlan, RuleSet, RuleError, RuleMessage, RULE_NAME_MAX_LENGTH
+from test_check_batch import make_transactions
+
+class BaselineEngine:
+    """룰 DSL 도입 전 FDSRuleEngine.check (하드코딩 룰, 비교 기준)"""
+    
+    def __init__(self):
+        self.user_history = defaultdict(list)
+        self.user_avg_amount = defaultdict(lambda: {'sum': 0, 'count': 0})
+    
+    def check(self, tx: dict) -> tuple:
+        fraud_rules = []
+        user_id = tx['user_id']
+        amount = tx['amount']
+        hour = tx.get('hour', 12)
+        category = tx.get('merchant_category', '')
+        current_time = tx.get('created_at', time.time())
+        
+        self.user_history[user_id].append(current_time)
+        cutoff = current_time - 60
+        self.user_history[user_id] = [t for t in self.user_history[user_id] if t > cutoff]
+        recent_count = sum(1 for t in self.user_history[user_id] if t > cutoff)
+        if recent_count >= 5:
+            fraud_rules.append(f"VELOCITY: {recent_count}회/분")
+        
+        data = self.user_avg_amount[user_id]
+        avg_amount = data['sum'] / data['count'] if data['count'] else 0
+        if avg_amount > 0 and amount > avg_amount * 10:
+            fraud_rules.append(f"AMOUNT_SPIKE: {amount:,}원 (평균 {avg_amount:,.0f}원의 {amount/avg_amount:.1f}배)")
+        data['sum'] += amount
+        data['count'] += 1
+        if data['count'] > 100:
+            data['sum'] = data['sum'] * 0.99
+            data['count'] = 100
+        
+        if hour in (0, 1, 2, 3, 4, 5) and amount >= 5000000:
+            fraud_rules.append(f"DAWN_HIGH_AMOUNT: 새벽 {hour}시 {amount:,}원")
+        if category == 'luxury' and tx.get('user_tier') == 'normal' and amount >= 10000000:
+            fraud_rules.append(f"UNUSUAL_CATEGORY: 일반등급 명품 {amount:,}원")
+        return len(fraud_rules) > 0, fraud_rules
+
+def write_rules(path, rules: list, state: dict = None):
+    path.write_text(json.dumps({'state': state or {}, 'rules': rules}, ensure_ascii=False), encoding='utf-8')
+
+def test_default_rules_match_baseline_engine():
+    # 한 사용자에 100건 넘게 몰리도록 (평균 금액 감쇠 구간까지 비교)
+    transactions = make_transactions(6000, users=20, seed=5)
+    baseline = BaselineEngine()
+    expected = [baseline.check(tx) for tx in transactions]
+    
+    engine = FDSRuleEngine()
+    assert [engine.check(tx) for tx in transactions] == expected
+    batched = FDSRuleEngine()
+    got = []
+    for start in range(0, len(transactions), 250):
+        got.extend(batched.check_batch(transactions[start:start + 250]))
+    assert got == expected
+    fired = {message.split(':', 1)[0] for _, messages in expected for message in messages}
+    assert fired == {message.rule for _, messages in got for message in messages}
+    assert fired == {'VELOCITY', 'AMOUNT_SPIKE', 'DAWN_HIGH_AMOUNT', 'UNUSUAL_CATEGORY'}
+
+def test_compiled_predicates_match_direct_evaluation(tmp_path):
+    rules = [
+        {'name': 'NIGHT_ONLINE', 'when': {'hour': {'<': 6}, 'merchant_category': {'in': ['online_shopping', 'cafe']}}},
+        {'name': 'NOT_SEOUL_BIG', 'when': {'region': {'!=': '서울'}, 'amount': {'>': 100000}}},
+        {'name': 'WEEKEND_VIP', 'when': {'is_weekend': True, 'user_tier': 'vip', 'amount': {'<=': 30000}}},
+        {'name': 'MIDWEEK', 'when': {'day_of_week': {'not_in': [0, 6]}, 'amount': {'>=': 6000000}}},
+    ]
+    direct = {
+        'NIGHT_ONLINE': lambda tx: tx['hour'] < 6 and tx['merchant_category'] in ('online_shopping', 'cafe'),
+        'NOT_SEOUL_BIG': lambda tx: tx['region'] != '서울' and tx['amount'] > 100000,
+        'WEEKEND_VIP': lambda tx: tx['is_weekend'] is True and tx['user_tier'] == 'vip' and tx['amount'] <= 30000,
+        'MIDWEEK': lambda tx: tx['day_of_week'] not in (0, 6) and tx['amount'] >= 6000000,
+    }
+    path = tmp_path / 'rules.json'
+    write_rules(path, rules)
+    plan = RulePlan.load(str(path))
+    transactions = make_transactions(3000, users=50, seed=9)
+    for i, tx in enumerate(transactions):
+        tx['region'] = '부산' if i % 3 == 0 else '서울'
+    
+    single = FDSRuleEngine(rules_path=str(path))
+    batched = FDSRuleEngine(rules_path=str(path))
+    results = batched.check_batch(transactions)
+    for tx, result in zip(transactions, results):
+        expected = [name for name, match in direct.items() if match(tx)]
+        assert [message.rule for message in single.check(tx)[1]] == expected
+        assert [message.rule for message in result[1]] == expected
+    for rule in plan.rules:
+        assert any(direct[rule.name](tx) for tx in transactions)
+
+def test_render_carries_rule_name():
+    plan = RulePlan({'rules': [{'name': 'BIG', 'when': {'amount': {'>': 1}}, 'message': 'a: {amount}'}]})
+    message = plan.rules[0].render({'amount': 5}, 0, 0.0)
+    assert isinstance(message, RuleMessage)
+    assert message == 'BIG: a: 5' and message.rule == 'BIG'
+
+@pytest.mark.parametrize('name', [None, '', '   ', 'VELOCITY:FAST', ' PADDED', 'X' * (RULE_NAME_MAX_LENGTH + 1), 7])
+def test_invalid_rule_names_are_rejected(name):
+    with pytest.raises(RuleError):
+        RulePlan({'rules': [{'name': name, 'when': {'amount': {'>': 1}}}]})
+
+def test_longest_allowed_rule_name():
+    name = 'R' * RULE_NAME_MAX_LENGTH
+    assert RulePlan({'rules': [{'name': name, 'when': {'amount': {'>': 1}}}]}).rules[0].name == name
+
+@pytest.mark.parametrize('rule, match', [
+    ({'name': 'A', 'when': {'amount': {'~': 1}}}, 'unknown operator'),
+    ({'name': 'A', 'when': {'colour': 'red'}}, 'unknown field'),
+    ({'name': 'A', 'when': {'amount': {'>': '1'}}}, 'must be a number'),
+    ({'name': 'A', 'when': {'region': {'in': '서울'}}}, 'must be a list'),
+    ({'name': 'A'}, 'at least one condition'),
+    ({'name': 'A', 'type': 'velocity'}, 'threshold'),
+    ({'name': 'A', 'type': 'burst', 'when': {'amount': 1}}, 'unknown type'),
+    ({'name': 'A', 'when': {'amount': 1}, 'message': '{missing}'}, 'message template'),
+])
+def test_invalid_rules(rule, match):
+    with pytest.raises(RuleError, match=match):
+        RulePlan({'rules': [rule]})
+
+def test_duplicate_names():
+    rule = {'name': 'A', 'when': {'amount': 1}}
+    with pytest.raises(RuleError, match='duplicate'):
+        RulePlan({'rules': [rule, rule]})
+
+def test_reload_keeps_previous_plan_on_invalid_name(tmp_path):
+    path = tmp_path / 'rules.json'
+    write_rules(path, [{'name': 'BIG', 'when': {'amount': {'>=': 100}}}])
+    rule_set = RuleSet(str(path))
+    rule_set.plan.rules[0].hits = 3
+    
+    def rewrite(rules):
+        write_rules(path, rules)
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, rule_set.mtime + 1_000_000))
+    
+    rewrite([{'name': 'BIG:2', 'when': {'amount': {'>=': 100}}}])
+    assert not rule_set.maybe_reload()
+    assert [rule.name for rule in rule_set.plan.rules] == ['BIG']
+    
+    # 정상 파일로 다시 바꾸면 적용 + 같은 이름 룰의 누적 카운터 유지
+    rewrite([{'name': 'BIG', 'when': {'amount': {'>=': 200}}}, {'name': 'SMALL', 'when': {'amount': {'<': 10}}}])
+    assert rule_set.maybe_reload()
+    assert [rule.name for rule in rule_set.plan.rules] == ['BIG', 'SMALL']
+    assert rule_set.plan.rules[0].hits == 3
@@ -0,0 +1,130 @@
+"""
+CopySink / InsertSink 통합 테스트 (실제 PostgreSQL 필요)
+    FDS_TEST_POSTGRES_DSN=postgresql://user@host:port/postgres pytest tests/test_sink_pg.py
+- DSN의 DB에 임시 DB를 만들어 database/*.sql을 적용하고 끝나면 삭제
+- DSN이 없으면 skip
+"""
+
+import os
+import time
+import uuid
+import asyncio
+import pytest
+
+asyncpg = pytest.importorskip('asyncpg')
+from sink import CopySink, InsertSink
+
+DSN = os.getenv('FDS_TEST_POSTGRES_DSN')
+DATABASE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '..', 'database')
+
+pytestmark = pytest.mark.skipif(not DSN, reason="FDS_TEST_POSTGRES_DSN not set")
+
+def read_sql(name: str) -> str:
+    with open(os.path.join(DATABASE_DIR, name), encoding='utf-8') as f:
+        return f.read()
+
+def make_tx(i: int, now: float, fraud_rules: str = '') -> dict:
+    return {
+        'tx_id': f"tx-{i:06d}",
+        'card_number': '4532-****-****-0001',
+        'amount': 10000 + i,
+        'merchant': '쿠팡',
+        'user_id': f"user_{i % 7:05d}",
+        'user_tier': 'normal',
+        'merchant_category': 'online_shopping',
+        'region': '서울',
+        'hour': 10,
+        'day_of_week': 3,
+        'is_weekend': False,
+        'time_slot': 'morning',
+        'is_fraud': bool(fraud_rules),
+        'fraud_rules': fraud_rules,
+        'created_at': now - 1 + i * 0.0012345,
+        'processed_at': now,
+    }
+
+def run_with_database(scripts: list, check):
+    """임시 DB 생성 → scripts 적용 → check(conn) → DB 삭제"""
+    async def run():
+        name = f"fds_test_{uuid.uuid4().hex[:8]}"
+        admin = await asyncpg.connect(DSN)
+        await admin.execute(f"CREATE DATABASE {name}")
+        try:
+            conn = await asyncpg.connect(DSN, database=name)
+            try:
+                for script in scripts:
+                    await conn.execute(script)
+                await check(conn)
+            finally:
+                await conn.close()
+        finally:
+            await admin.execute(f"DROP DATABASE {name}")
+            await admin.close()
+    asyncio.run(run())
+
+async def write_twice(conn, sink, transactions: list) -> tuple:
+    await sink.init_connection(conn)
+    first = await sink.write(conn, transactions)
+    # 재전달(같은 tx_id) → ON CONFLICT DO NOTHING
+    second = await sink.write(conn, transactions[:3])
+    return first, second
+
+def test_copy_sink_merges_and_matches_insert_sink():
+    now = time.time()
+    transactions = [make_tx(i, now, 'VELOCITY: 5회/분, AMOUNT_SPIKE: 1원' if i == 2 else '') for i in range(500)]
+    
+    async def check(conn):
+        assert await write_twice(conn, CopySink('fds'), transactions) == (500, 0)
+        copied = await conn.fetch("SELECT * FROM fds.transactions ORDER BY tx_id")
+        await conn.execute("TRUNCATE fds.transactions")
+        await write_twice(conn, InsertSink('fds'), transactions)
+        inserted = await conn.fetch("SELECT * FROM fds.transactions ORDER BY tx_id")
+        
+        assert len(copied) == 500
+        ignore = {'id'}
+        assert [{k: v for k, v in row.items() if k not in ignore} for row in copied] == \
+               [{k: v for k, v in row.items() if k not in ignore} for row in inserted]
+        assert copied[2]['fraud_rules'] == 'VELOCITY: 5회/분, AMOUNT_SPIKE: 1원'
+        assert copied[2]['is_fraud'] is True
+    
+    run_with_database([read_sql('init_schema.sql')], check)
+
+def test_copy_sink_partitioned_schema():
+    now = time.time()
+    transactions = [make_tx(i, now) for i in range(10)]
+    
+    async def check(conn):
+        assert await write_twice(conn, CopySink('fds', 'tx_id, created_at'), transactions) == (10, 0)
+        assert await conn.fetchval("SELECT count(*) FROM fds.transactions") == 10
+    
+    run_with_database([read_sql('init_schema_partitioned.sql'), read_sql('init_schema.sql')], check)
+
+def test_init_schema_migrates_text_array_fraud_rules():
+    """이전 스키마(fraud_rules TEXT[]) DB에 init_schema.sql 재실행 → TEXT로 변환, 기존 값 유지"""
+    legacy = """
+        CREATE SCHEMA fds;
+        CREATE TABLE fds.transactions (
+            id SERIAL PRIMARY KEY,
+            tx_id VARCHAR(50) UNIQUE NOT NULL,
+            card_number VARCHAR(20) NOT NULL,
+            amount BIGINT NOT NULL,
+            merchant VARCHAR(100),
+            is_fraud BOOLEAN DEFAULT false,
+            fraud_rules TEXT[],
+            created_at TIMESTAMP DEFAULT NOW(),
+            processed_at TIMESTAMP
+        );
+        INSERT INTO fds.transactions (tx_id, card_number, amount, is_fraud, fraud_rules)
+        VALUES ('old', '4532', 1, true, ARRAY['VELOCITY: 5회/분', 'AMOUNT_SPIKE: 1원']);
+    """
+    
+    async def check(conn):
+        assert await conn.fetchval(
+            "SELECT data_type FROM information_schema.columns "
+            "WHERE table_schema = 'fds' AND table_name = 'transactions' AND column_name = 'fraud_rules'"
+        ) == 'text'
+        assert await conn.fetchval("SELECT fraud_rules FROM fds.transactions WHERE tx_id = 'old'") == \
+               'VELOCITY: 5회/분, AMOUNT_SPIKE: 1원'
+        assert await write_twice(conn, CopySink('fds'), [make_tx(1, time.time())]) == (1, 0)
+    
+    run_with_database([legacy, read_sql('init_schema.sql'), read_sql('init_schema.sql')], check)
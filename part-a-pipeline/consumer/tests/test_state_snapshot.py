@@ -0,0 +1,97 @@
+import asyncio
+import pytest
+from state_store import UserState
+from state_snapshot import SnapshotWriter, StateSnapshot, VELOCITY_SLOTS
+from transport import StreamTransport, ListTransport
+
+def make_states(count: int, now: float) -> dict:
+    states = {}
+    for i in range(count):
+        state = UserState(60, now - i)
+        state.amount_sum = 1000.0 * (i + 1)
+        state.amount_count = i + 1
+        for k in range(i % (VELOCITY_SLOTS + 3)):
+            state.velocity.add(now - i - 30 + k)
+        states[f"user_{i:05d}"] = state
+    return states
+
+def test_writer_saves_loop_state_in_background(tmp_path):
+    path = str(tmp_path / 'state.snap')
+    now = 1_700_000_000.0
+    states = make_states(50, now)
+    
+    async def scenario():
+        writer = SnapshotWriter(path, interval=0)
+        assert writer.maybe_save(states, offset='1700000000000-5')
+        # 레코드는 maybe_save 시점에 만들어짐 → 이후 변경은 이번 스냅샷에 없음
+        states['user_00000'].amount_sum = -1
+        states['late_user'] = UserState(60, now)
+        # 쓰는 중에는 다음 저장을 시작하지 않음
+        assert not writer.maybe_save(states, offset='1700000000000-6')
+        await writer.wait()
+    
+    asyncio.run(scenario())
+    snapshot = StateSnapshot.load(path)
+    assert snapshot.count == 50 and snapshot.offset == '1700000000000-5'
+    assert snapshot.restore('late_user', 60, now) is None
+    for i in (0, 1, 20, 49):
+        user_id = f"user_{i:05d}"
+        restored = snapshot.restore(user_id, 60, now)
+        expected = make_states(50, now)[user_id]
+        assert restored.amount_sum == expected.amount_sum
+        assert restored.amount_count == expected.amount_count
+        assert restored.velocity.events == pytest.approx(expected.velocity.events[-VELOCITY_SLOTS:], abs=1e-3)
+
+def test_writer_failure_is_logged_and_next_save_runs(tmp_path, capsys):
+    (tmp_path / 'blocked').write_text('')
+    
+    async def scenario():
+        writer = SnapshotWriter(str(tmp_path / 'blocked' / 'state.snap'), interval=0)
+        assert writer.maybe_save({}, None)
+        await writer.wait()
+        writer.path = str(tmp_path / 'state.snap')
+        assert writer.maybe_save({}, None)
+        await writer.wait()
+    
+    asyncio.run(scenario())
+    assert 'Save failed' in capsys.readouterr().out
+    assert StateSnapshot.load(str(tmp_path / 'state.snap')).count == 0
+
+def make_stream_transport(redis_client=None, consumer='me') -> StreamTransport:
+    return StreamTransport(redis_client, 'fds:tx', group='fds', consumer=consumer,
+                           block_ms=0, claim_idle_ms=0, claim_interval=0)
+
+def test_advance_offset_never_moves_backwards():
+    transport = make_stream_transport()
+    offset = transport.advance_offset(None, [b'1700000000000-3', b'1700000000000-10'])
+    assert offset == '1700000000000-10'
+    # XAUTOCLAIM으로 회수한 앞 ID 배치 (문자열 비교로는 '-9' > '-10')
+    assert transport.advance_offset(offset, [b'1700000000000-9']) == '1700000000000-10'
+    assert transport.advance_offset(offset, []) == '1700000000000-10'
+    assert transport.advance_offset(offset, ['1700000000001-0']) == '1700000000001-0'
+    assert ListTransport(None, 'fds:tx', block_timeout=1).advance_offset('1-0', []) == '1-0'
+
+class FakeRedis:
+    def __init__(self, now_ms: int, consumers: list):
+        self.now_ms = now_ms
+        self.consumers = consumers
+    
+    async def time(self):
+        return self.now_ms // 1000, self.now_ms % 1000 * 1000
+    
+    async def xinfo_consumers(self, stream_name, group):
+        return self.consumers
+
+def test_other_readers_since_snapshot_offset():
+    offset = '1700000000000-0'
+    now_ms = 1_700_000_100_000  # 스냅샷 offset 100초 후
+    consumers = [
+        {'name': b'me', 'pending': 0, 'idle': 0},
+        {'name': b'old-replica', 'pending': 0, 'idle': 150_000},  # offset 이전부터 활동 없음
+        {'name': b'replica-2', 'pending': 3, 'idle': 20_000},  # offset 이후 읽음
+    ]
+    transport = make_stream_transport(FakeRedis(now_ms, consumers))
+    assert asyncio.run(transport.other_readers_since(offset)) == ['replica-2']
+    
+    transport = make_stream_transport(FakeRedis(now_ms, consumers[:2]))
+    assert asyncio.run(transport.other_readers_since(offset)) == []
@@ -0,0 +1,46 @@
+from state_store import UserStateStore, APPROX_BYTES_PER_USER
+
+def test_lru_evicts_least_recently_used():
+    store = UserStateStore(60, max_users=2)
+    store.get('a', 1)
+    store.get('b', 2)
+    store.get('a', 3)  # a가 최근 사용
+    store.get('c', 4)
+    assert 'a' in store and 'c' in store and 'b' not in store
+    assert store.stats()['state_evicted_lru'] == 1
+
+def test_hit_keeps_state_and_counts():
+    store = UserStateStore(60)
+    state = store.get('a', 1)
+    state.amount_sum = 100
+    assert store.get('a', 2) is state
+    stats = store.stats()
+    assert (stats['state_hits'], stats['state_misses']) == (1, 1)
+
+def test_ttl_evicts_incrementally_on_insert():
+    store = UserStateStore(60, ttl_seconds=10)
+    for i in range(5):
+        store.get(f"old{i}", i)
+    # 새 사용자 1명당 만료 사용자 최대 2명씩 정리
+    store.get('new', 100)
+    assert len(store) == 4
+    assert store.stats()['state_evicted_ttl'] == 2
+
+def test_evict_idle_sweeps_expired_users():
+    store = UserStateStore(60, ttl_seconds=10)
+    store.get('a', 0)
+    store.get('b', 5)
+    store.get('c', 8)
+    assert store.evict_idle() == 0  # 기본 기준 시각은 가장 최근 거래(8)
+    assert store.evict_idle(16) == 2
+    assert list(store.users()) == ['c']
+
+def test_evict_idle_without_ttl_is_noop():
+    store = UserStateStore(60)
+    store.get('a', 0)
+    assert store.evict_idle(1e9) == 0
+    assert len(store) == 1
+
+def test_memory_cap_bounds_users():
+    store = UserStateStore(60, max_users=10**9, max_memory_mb=1)
+    assert store.max_users == 1024 * 1024 // APPROX_BYTES_PER_USER
@@ -0,0 +1,100 @@
+import random
+from velocity import SlidingWindowCounter
+from fds_rules import FDSRuleEngine
+
+def brute_force(times: list, ts: float, window: float) -> int:
+    return sum(1 for t in times if ts - window < t <= ts)
+
+def test_counts_events_in_half_open_window():
+    counter = SlidingWindowCounter(60)
+    assert counter.add(0) == 1
+    assert counter.add(30) == 2
+    assert counter.add(59.9) == 3
+    # (60 - 60, 60] → 0초 이벤트는 윈도우 밖
+    assert counter.add(60) == 3
+    assert counter.add(200) == 1
+    assert len(counter) == 1
+
+def test_count_does_not_add():
+    counter = SlidingWindowCounter(10)
+    for ts in (1, 2, 3):
+        counter.add(ts)
+    assert counter.count(5) == 3
+    assert counter.count(12) == 1  # (2, 12]
+    assert counter.count(100) == 0
+    assert len(counter) == 0
+
+def test_in_order_matches_brute_force():
+    rng = random.Random(7)
+    for window in (1, 60):
+        counter = SlidingWindowCounter(window)
+        times = []
+        ts = 0.0
+        for _ in range(5000):
+            ts += rng.choice([0, rng.expovariate(0.5)])  # 동시각 이벤트 포함
+            times.append(ts)
+            assert counter.add(ts) == brute_force(times, ts, window)
+
+def test_memory_is_bounded_by_window():
+    counter = SlidingWindowCounter(5)
+    for ts in range(10000):
+        counter.add(float(ts))
+    assert len(counter) == 5
+
+def shuffle_within(times: list, max_delay: float, rng: random.Random) -> list:
+    """이벤트 시각 + [0, max_delay) 지연으로 도착 순서를 섞음"""
+    return [ts for _, ts in sorted((ts + rng.uniform(0, max_delay), ts) for ts in times)]
+
+def test_late_events_within_lateness_match_event_time_brute_force():
+    rng = random.Random(11)
+    times = []
+    ts = 0.0
+    for _ in range(3000):
+        ts += rng.expovariate(0.5)
+        times.append(ts)
+    arrivals = shuffle_within(times, 5, rng)
+    assert arrivals != times
+    
+    counter = SlidingWindowCounter(10, allowed_lateness=5)
+    arrived = []
+    for ts in arrivals:
+        arrived.append(ts)
+        # 도착한 이벤트 중 (ts - window, ts] → 늦게 온 이벤트는 자기 시각 기준
+        assert counter.add(ts) == brute_force(arrived, ts, 10)
+
+def test_count_after_reordering_matches_in_order():
+    rng = random.Random(12)
+    times = sorted(rng.uniform(0, 600) for _ in range(2000))
+    in_order = SlidingWindowCounter(60, allowed_lateness=3)
+    shuffled = SlidingWindowCounter(60, allowed_lateness=3)
+    for ts in times:
+        in_order.add(ts)
+    for ts in shuffle_within(times, 3, rng):
+        shuffled.add(ts)
+    for now in (600, 620, 659.9, 700):
+        assert shuffled.count(now) == in_order.count(now)
+
+def test_events_beyond_lateness_are_flagged_late():
+    counter = SlidingWindowCounter(10, allowed_lateness=2)
+    for ts in (0, 1, 20):
+        counter.add(ts)
+    assert not counter.is_late(18.5)
+    assert counter.is_late(17.5)
+    # watermark(20 - 2) 이전 기록은 이미 정리될 수 있음 → 0, 1초 이벤트는 윈도우 계산에서 빠짐
+    assert counter.add(5) == 1
+
+def test_engine_counts_out_of_order_and_late_arrivals():
+    transactions = [
+        {'tx_id': f"t{i}", 'user_id': 'u', 'amount': 1000, 'created_at': ts}
+        for i, ts in enumerate([100.0, 101.0, 99.0, 110.0, 104.0, 200.0, 150.0])
+    ]
+    for batched in (False, True):
+        engine = FDSRuleEngine(allowed_lateness=5)
+        if batched:
+            engine.check_batch(transactions)
+        else:
+            for tx in transactions:
+                engine.check(tx)
+        stats = engine.state.stats()
+        # 99 (지연 1초), 104 (6초 → late), 150 (50초 → late)
+        assert (stats['state_out_of_order'], stats['state_late']) == (3, 2)
@@ -0,0 +1,231 @@
+"""
+Redis 큐 전송 방식 (Transport)
+- list:   LPUSH / BLMPOP (꺼낸 뒤 DB 실패 시 유실)
+- stream: XADD / XREADGROUP + XACK (DB 커밋 후 ACK → at-least-once)
+          ACK 못 받은 엔트리는 XAUTOCLAIM으로 다른 consumer가 회수
+"""
+
+import os
+import time
+import socket
+from redis.exceptions import ResponseError
+from config import Config
+
+class ListTransport:
+    name = 'list'
+    
+    def __init__(self, redis_client, queue_name: str, block_timeout: float):
+        self.redis = redis_client
+        self.queue_name = queue_name
+        self.block_timeout = block_timeout
+        self._use_blmpop = True
+    
+    async def setup(self):
+        pass
+    
+    async def fetch(self, batch_size: int) -> tuple:
+        """
+        Returns: (payloads, ack_ids)
+        - BLMPOP: 큐가 비어 있으면 첫 건이 들어올 때까지 대기하고,
+          들어오면 그 시점의 큐 깊이만큼(최대 batch_size) 한 번에 꺼냄
+          → 저부하에선 작은 배치로 바로 처리, 고부하에선 꽉 찬 배치
+        - Redis 7 미만이면 BRPOP + LRANGE/LTRIM으로 대체
+        """
+        if self._use_blmpop:
+            try:
+                response = await self.redis.blmpop(
+                    self.block_timeout, 1, self.queue_name,
+                    direction='RIGHT', count=batch_size
+                )
+                return (response[1] if response else []), []
+            except ResponseError as e:
+                if 'unknown command' not in str(e).lower():
+                    raise
+                print(f"[Transport] BLMPOP not supported, falling back to BRPOP")
+                self._use_blmpop = False
+        
+        first = await self.redis.brpop(self.queue_name, timeout=self.block_timeout)
+        if first is None:
+            return [], []
+        
+        # 나머지는 큐 오른쪽(가장 오래된 쪽)에서 한 번에 가져와 잘라냄
+        rest = batch_size - 1
+        if rest <= 0:
+            return [first[1]], []
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.lrange(self.queue_name, -rest, -1)
+        pipe.ltrim(self.queue_name, 0, -rest - 1)
+        items, _ = await pipe.execute()
+        return [first[1]] + items[::-1], []
+    
+    async def ack(self, ack_ids: list):
+        # 꺼낸 시점에 이미 큐에서 제거됨
+        pass
+    
+    async def length(self) -> int:
+        return await self.redis.llen(self.queue_name)
+    
+    def offset_of(self, ack_ids: list):
+        # 꺼낸 항목은 큐에서 사라지므로 되돌아갈 위치가 없음
+        return None
+    
+    def advance_offset(self, offset, ack_ids: list):
+        return offset
+
+class StreamTransport:
+    name = 'stream'
+    field = 'data'
+    
+    def __init__(self, redis_client, stream_name: str, group: str, consumer: str,
+                 block_ms: int, claim_idle_ms: int, claim_interval: float):
+        self.redis = redis_client
+        self.stream_name = stream_name
+        self.group = group
+        self.consumer = consumer
+        self.block_ms = block_ms
+        self.claim_idle_ms = claim_idle_ms
+        self.claim_interval = claim_interval
+        
+        self._claim_cursor = '0-0'
+        self._next_claim_at = 0
+    
+    async def setup(self):
+        try:
+            await self.redis.xgroup_create(self.stream_name, self.group, id='0', mkstream=True)
+            print(f"[Transport] Consumer group created: {self.stream_name}/{self.group}")
+        except ResponseError as e:
+            if 'BUSYGROUP' not in str(e):
+                raise
+    
+    async def fetch(self, batch_size: int) -> tuple:
+        """Returns: (payloads, ack_ids)"""
+        # 1. 다른 consumer가 처리하다 멈춘(ACK 안 된) 엔트리 회수
+        now = time.monotonic()
+        if now >= self._next_claim_at:
+            entries = await self._claim_stale(batch_size)
+            if entries:
+                return self._unpack(entries)
+            self._next_claim_at = now + self.claim_interval
+        
+        # 2. 신규 엔트리: 비어 있으면 BLOCK 동안 대기 (폴링 sleep 없음)
+        response = await self.redis.xreadgroup(
+            self.group, self.consumer, {self.stream_name: '>'},
+            count=batch_size, block=self.block_ms
+        )
+        if not response:
+            return [], []
+        return self._unpack(response[0][1])
+    
+    async def _claim_stale(self, batch_size: int) -> list:
+        response = await self.redis.xautoclaim(
+            self.stream_name, self.group, self.consumer,
+            min_idle_time=self.claim_idle_ms,
+            start_id=self._claim_cursor,
+            count=batch_size
+        )
+        next_cursor, entries = response[0], response[1]
+        # 한 바퀴 다 돌면 커서가 0-0으로 돌아옴 → 다음 주기까지 대기
+        self._claim_cursor = next_cursor
+        if next_cursor in ('0-0', b'0-0'):
+            self._next_claim_at = time.monotonic() + self.claim_interval
+        entries = [entry for entry in entries if entry is not None]
+        if entries:
+            print(f"[Transport] Reclaimed {len(entries)} pending entries")
+        return entries
+    
+    def _unpack(self, entries: list) -> tuple:
+        ack_ids = [entry_id for entry_id, _ in entries]
+        payloads = [fields.get(self.field) or fields.get(self.field.encode()) for _, fields in entries]
+        return payloads, ack_ids
+    
+    async def ack(self, ack_ids: list):
+        if ack_ids:
+            await self.redis.xack(self.stream_name, self.group, *ack_ids)
+    
+    async def length(self) -> int:
+        return await self.redis.xlen(self.stream_name)
+    
+    def offset_of(self, ack_ids: list):
+        """배치에서 가장 뒤의 엔트리 ID (회수된 엔트리는 신규보다 앞 ID)"""
+        if not ack_ids:
+            return None
+        entry_id = max(ack_ids, key=_stream_id_key)
+        return entry_id.decode() if isinstance(entry_id, bytes) else entry_id
+    
+    def advance_offset(self, offset: str, ack_ids: list):
+        """offset과 배치의 마지막 엔트리 중 더 뒤의 ID (XAUTOCLAIM으로 회수한 앞 ID 배치가 와도 되돌아가지 않음)"""
+        latest = self.offset_of(ack_ids)
+        if latest is None or (offset is not None and _stream_id_key(latest) <= _stream_id_key(offset)):
+            return offset
+        return latest
+    
+    async def other_readers_since(self, offset: str) -> list:
+        """
+        offset 이후 엔트리를 읽었을 수 있는 같은 group의 다른 consumer 이름
+        - ACK된 엔트리는 어느 consumer가 처리했는지 남지 않으므로 마지막 활동 시각(idle)으로 판단
+        - 자동 ID(ms-seq)와 idle 모두 Redis 서버 시계 기준
+        """
+        seconds, microseconds = await self.redis.time()
+        now_ms = seconds * 1000 + microseconds // 1000
+        offset_ms = _stream_id_key(offset)[0]
+        others = []
+        for consumer in await self.redis.xinfo_consumers(self.stream_name, self.group):
+            name = consumer['name']
+            name = name.decode() if isinstance(name, bytes) else name
+            if name != self.consumer and now_ms - consumer['idle'] >= offset_ms:
+                others.append(name)
+        return others
+    
+    async def read_after(self, offset: str, batch_size: int):
+        """
+        offset 이후 ~ group이 이미 전달한 마지막 엔트리까지 (payloads, entry_ids)를 batch_size씩 반환 (async generator)
+        스냅샷 이후 처리된 엔트리로 룰 엔진 상태를 다시 채울 때 사용 (DB 쓰기/ACK 없음)
+        group 전체 기준이므로 group당 consumer 1개일 때만 사용 (other_readers_since로 확인)
+        """
+        last_delivered = None
+        for group in await self.redis.xinfo_groups(self.stream_name):
+            name = group['name']
+            if (name.decode() if isinstance(name, bytes) else name) == self.group:
+                last_delivered = group['last-delivered-id']
+        if last_delivered is None:
+            return
+        if isinstance(last_delivered, bytes):
+            last_delivered = last_delivered.decode()
+        if _stream_id_key(last_delivered) <= _stream_id_key(offset):
+            return
+        
+        start = offset
+        while True:
+            entries = await self.redis.xrange(
+                self.stream_name, min=f"({start}", max=last_delivered, count=batch_size
+            )
+            if not entries:
+                return
+            payloads, entry_ids = self._unpack(entries)
+            yield payloads, entry_ids
+            start = self.offset_of(entry_ids)
+            if len(entries) < batch_size:
+                return
+
+def _stream_id_key(entry_id) -> tuple:
+    if isinstance(entry_id, bytes):
+        entry_id = entry_id.decode()
+    ms, _, seq = entry_id.partition('-')
+    return int(ms), int(seq or 0)
+
+def create_transport(redis_client, queue_name: str, mode: str = None):
+    mode = mode or Config.TRANSPORT
+    if mode == ListTransport.name:
+        return ListTransport(redis_client, queue_name, block_timeout=Config.LIST_BLOCK_TIMEOUT)
+    if mode == StreamTransport.name:
+        consumer = Config.STREAM_CONSUMER or f"{socket.gethostname()}-{os.getpid()}"
+        return StreamTransport(
+            redis_client,
+            queue_name,
+            group=Config.STREAM_GROUP,
+            consumer=consumer,
+            block_ms=Config.STREAM_BLOCK_MS,
+            claim_idle_ms=Config.STREAM_CLAIM_IDLE_MS,
+            claim_interval=Config.STREAM_CLAIM_INTERVAL
+        )
+    raise ValueError(f"Unknown TRANSPORT: {mode} (available: list, stream)")
@@ -0,0 +1,54 @@
+"""
+Velocity 룰용 슬라이딩 윈도우 카운터 (event-time 기준)
+- 사용자별 거래 시각을 정렬된 리스트에 보관
+- 순서대로 들어오면 append + 앞쪽 일괄 제거 (분할상환 O(1))
+- 늦게 도착한 이벤트는 bisect로 제자리에 삽입 → (ts - window, ts] 건수는 도착 순서와 무관
+- allowed_lateness: 가장 늦은 이벤트 시각(watermark 기준)보다 이만큼 이전까지의 지연 도착은 정확히 셈
+  → 윈도우 밖 기록도 allowed_lateness초 동안은 유지
+"""
+
+from bisect import bisect_right, insort
+
+class SlidingWindowCounter:
+    """최근 window초 내 이벤트 수"""
+    __slots__ = ('window', 'allowed_lateness', 'events')
+    
+    def __init__(self, window: float, allowed_lateness: float = 0):
+        self.window = window
+        self.allowed_lateness = allowed_lateness
+        self.events = []
+    
+    def add(self, ts: float) -> int:
+        """이벤트 추가 후 (ts - window, ts] 구간의 이벤트 수 반환 (ts보다 늦은 시각의 이벤트는 제외)"""
+        events = self.events
+        cutoff = ts - self.window
+        if events and ts < events[-1]:
+            # 지연 도착: 정렬 위치에 삽입하고 자기 시각 기준으로 셈 (최신 시각이 그대로라 제거할 것 없음)
+            insort(events, ts)
+            return bisect_right(events, ts) - bisect_right(events, cutoff)
+        events.append(ts)
+        if events[0] > cutoff:
+            return len(events)
+        expired = bisect_right(events, cutoff - self.allowed_lateness)
+        if expired:
+            del events[:expired]
+        return len(events) - bisect_right(events, cutoff)
+    
+    def count(self, now: float) -> int:
+        """(now - window, now] 구간의 이벤트 수"""
+        events = self.events
+        if not events:
+            return 0
+        cutoff = now - self.window
+        expired = bisect_right(events, max(now, events[-1]) - self.window - self.allowed_lateness)
+        if expired:
+            del events[:expired]
+        return bisect_right(events, now) - bisect_right(events, cutoff)
+    
+    def is_late(self, ts: float) -> bool:
+        """watermark(최신 이벤트 시각 - allowed_lateness)보다 이전 → 윈도우 일부가 이미 제거됐을 수 있음"""
+        events = self.events
+        return bool(events) and ts < events[-1] - self.allowed_lateness
+    
+    def __len__(self) -> int:
+        return len(self.events)
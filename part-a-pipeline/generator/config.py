@@ -1,4 +1,5 @@
 import os
+import zlib
 
 class Config:
     # PostgreSQL
@@ -12,14 +13,36 @@ class Config:
     # Redis
     REDIS_HOST = os.getenv('REDIS_HOST', 'fds-redis')
     REDIS_PORT = int(os.getenv('REDIS_PORT', 6379))
+    QUEUE_NAME = os.getenv('QUEUE_NAME', 'tx_queue')
+    # user_id 해시 기준 샤드 수 (generator/consumer 동일 값 사용)
+    NUM_SHARDS = int(os.getenv('NUM_SHARDS', 1))
+    
+    # 큐 전송 방식: list (LPUSH/RPOP) | stream (XADD/XREADGROUP/XACK)
+    TRANSPORT = os.getenv('TRANSPORT', 'list')
+    STREAM_MAXLEN = int(os.getenv('STREAM_MAXLEN', 1000000))  # XADD MAXLEN ~ (근사 트리밍)
+    
+    # 직렬화: json | msgpack, FRAME_SIZE건을 Redis 값 하나로 묶음 (1이면 건별)
+    CODEC = os.getenv('CODEC', 'json')
+    FRAME_SIZE = int(os.getenv('FRAME_SIZE', 1))
     
     # Generator 설정
     PHASE = int(os.getenv('PHASE', 1))
     TPS = int(os.getenv('TPS', 100))  # 초당 생성할 트랜잭션 수
+    BULK_GENERATION = os.getenv('BULK_GENERATION', '1') == '1'  # 배치 생성 시 NumPy 벌크 경로 사용
+    
+    # Phase 3 부하 모드: closed (배치 완료 후 다음 배치) | open (도착 스케줄 고정, coordinated omission 없음)
+    LOAD_MODE = os.getenv('LOAD_MODE', 'closed')
+    # constant:<tps> | ramp:<start>:<end>:<sec> | step:<start>:<step>:<sec>:<max> (미지정 시 constant:TPS)
+    LOAD_PROFILE = os.getenv('LOAD_PROFILE', '')
+    ARRIVAL = os.getenv('ARRIVAL', 'fixed')  # fixed | poisson
+    OPEN_LOOP_MAX_BATCH = int(os.getenv('OPEN_LOOP_MAX_BATCH', 500))  # 전송 1회에 묶는 최대 건수
+    MAX_INFLIGHT_BATCHES = int(os.getenv('MAX_INFLIGHT_BATCHES', 1000))  # 초과분은 드롭(에러 집계)
     
     # 메트릭 설정
     METRICS_INTERVAL = int(os.getenv('METRICS_INTERVAL', 10))  # 초
     METRICS_OUTPUT_PATH = os.getenv('METRICS_OUTPUT_PATH', '/app/data')
+    METRICS_PORT = int(os.getenv('METRICS_PORT', 9100))  # Prometheus exposition 포트 (0이면 비활성)
+    METRICS_GAUGE_INTERVAL = float(os.getenv('METRICS_GAUGE_INTERVAL', 1))  # 큐 길이 게이지 갱신 주기 (초)
     
     @classmethod
     def get_postgres_dsn(cls):
@@ -28,3 +51,20 @@ class Config:
     @classmethod
     def get_postgres_dsn_async(cls):
         return f"postgresql://{cls.POSTGRES_USER}:{cls.POSTGRES_PASSWORD}@{cls.POSTGRES_HOST}:{cls.POSTGRES_PORT}/{cls.POSTGRES_DB}"
+    
+    @classmethod
+    def get_queue_name(cls, shard: int = None):
+        if shard is None or cls.NUM_SHARDS <= 1:
+            return cls.QUEUE_NAME
+        return f"{cls.QUEUE_NAME}:{shard}"
+    
+    @classmethod
+    def get_shard(cls, user_id: str):
+        # 프로세스마다 달라지는 hash() 대신 crc32로 고정된 샤드 배정
+        return zlib.crc32(user_id.encode()) % cls.NUM_SHARDS
+    
+    @classmethod
+    def get_queue_names(cls):
+        if cls.NUM_SHARDS <= 1:
+            return [cls.QUEUE_NAME]
+        return [cls.get_queue_name(shard) for shard in range(cls.NUM_SHARDS)]
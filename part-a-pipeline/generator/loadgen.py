@@ -0,0 +1,152 @@
+"""
+Open-loop 부하 생성기
+- 전송 시각을 고정 간격(fixed) 또는 포아송(poisson) 도착 스케줄로 미리 계산
+- sink가 느려져도 다음 전송을 기다리지 않음 (closed-loop의 coordinated omission 방지)
+- 지연시간은 '실제 보낸 시각'이 아니라 '보냈어야 할 시각' 기준으로 측정
+- 부하 프로파일: constant / ramp / step
+
+LOAD_PROFILE 형식:
+    constant:<tps>
+    ramp:<start_tps>:<end_tps>:<duration_s>            (duration 이후 end_tps 유지)
+    step:<start_tps>:<step_tps>:<interval_s>:<max_tps>
+"""
+
+import sys
+import time
+import random
+import asyncio
+
+class LoadProfile:
+    def __init__(self, kind: str, params: list):
+        self.kind = kind
+        self.params = params
+    
+    @classmethod
+    def parse(cls, spec: str):
+        kind, *values = spec.split(':')
+        params = [float(v) for v in values]
+        expected = {'constant': 1, 'ramp': 3, 'step': 4}
+        if kind not in expected or len(params) != expected[kind]:
+            raise ValueError(f"Invalid LOAD_PROFILE: {spec}")
+        return cls(kind, params)
+    
+    def rate(self, elapsed: float) -> float:
+        """시작 후 elapsed초 시점의 목표 TPS"""
+        if self.kind == 'constant':
+            return self.params[0]
+        if self.kind == 'ramp':
+            start, end, duration = self.params
+            if elapsed >= duration:
+                return end
+            return start + (end - start) * elapsed / duration
+        start, step, interval, max_rate = self.params
+        return min(start + step * int(elapsed // interval), max_rate)
+    
+    def __str__(self):
+        return f"{self.kind}:{':'.join(f'{p:g}' for p in self.params)}"
+
+class ArrivalSchedule:
+    """목표 전송 시각(monotonic) 시퀀스"""
+    
+    def __init__(self, profile: LoadProfile, arrival: str = 'fixed', start: float = None, seed: int = None):
+        if arrival not in ('fixed', 'poisson'):
+            raise ValueError(f"Unknown ARRIVAL: {arrival} (available: fixed, poisson)")
+        self.profile = profile
+        self.poisson = arrival == 'poisson'
+        self.start = time.monotonic() if start is None else start
+        self.next_time = self.start
+        self.rng = random.Random(seed)
+    
+    def advance(self) -> float:
+        """다음 전송 시각을 반환하고 스케줄을 한 칸 진행"""
+        current = self.next_time
+        rate = max(self.profile.rate(current - self.start), 1e-6)
+        gap = self.rng.expovariate(rate) if self.poisson else 1.0 / rate
+        self.next_time = current + gap
+        return current
+    
+    def due(self, now: float, limit: int) -> list:
+        """now까지 보냈어야 할 전송 시각 (최대 limit개)"""
+        times = []
+        while self.next_time <= now and len(times) < limit:
+            times.append(self.advance())
+        return times
+
+class OpenLoopRunner:
+    """
+    send_batch(intended_times) 코루틴을 스케줄대로 띄우고 완료를 기다리지 않음
+    - in-flight 배치가 max_inflight를 넘으면 기다리지 않고 드롭(에러로 집계)
+    """
+    
+    def __init__(self, schedule: ArrivalSchedule, send_batch, metrics,
+                 max_batch: int = 500, max_inflight: int = 1000, tick: float = 0.001):
+        self.schedule = schedule
+        self.send_batch = send_batch
+        self.metrics = metrics
+        self.max_batch = max_batch
+        self.max_inflight = max_inflight
+        self.tick = tick
+        self.inflight = set()
+        
+        # 리포트 구간 카운터
+        self.window_start = time.monotonic()
+        self.scheduled = 0
+        self.completed = 0
+        self.dropped = 0
+    
+    async def _send(self, intended_times: list):
+        try:
+            await self.send_batch(intended_times)
+            done = time.monotonic()
+            for intended in intended_times:
+                self.metrics.record_success(done - intended)
+            self.completed += len(intended_times)
+        except Exception as e:
+            self.metrics.record_error(len(intended_times))
+            print(f"[Error] {e}")
+    
+    def _dispatch(self, intended_times: list):
+        if len(self.inflight) >= self.max_inflight:
+            self.dropped += len(intended_times)
+            self.metrics.record_error(len(intended_times))
+            return
+        task = asyncio.create_task(self._send(intended_times))
+        self.inflight.add(task)
+        task.add_done_callback(self.inflight.discard)
+    
+    def report(self) -> dict:
+        """구간별 목표/제공/처리 TPS 후 카운터 초기화"""
+        now = time.monotonic()
+        elapsed = max(now - self.window_start, 1e-9)
+        stats = {
+            'target_tps': round(self.schedule.profile.rate(now - self.schedule.start), 2),
+            'offered_tps': round(self.scheduled / elapsed, 2),
+            'achieved_tps': round(self.completed / elapsed, 2),
+            'dropped': self.dropped,
+            'inflight_batches': len(self.inflight),
+        }
+        print(f"[OpenLoop] target: {stats['target_tps']} TPS, offered: {stats['offered_tps']}, "
+              f"achieved: {stats['achieved_tps']}, dropped: {stats['dropped']}, "
+              f"in-flight batches: {stats['inflight_batches']}")
+        sys.stdout.flush()
+        self.window_start = now
+        self.scheduled = 0
+        self.completed = 0
+        self.dropped = 0
+        return stats
+    
+    async def run_until(self, should_stop=lambda: False, on_tick=None):
+        while not should_stop():
+            now = time.monotonic()
+            intended_times = self.schedule.due(now, self.max_batch)
+            if intended_times:
+                self.scheduled += len(intended_times)
+                self._dispatch(intended_times)
+            if on_tick is not None:
+                await on_tick(self)
+            # 밀린 전송이 남아 있으면 대기 없이 다음 배치
+            # (sleep(0)으로 방금 만든 _send 태스크를 먼저 시작시켜 inflight가 실제 동시 전송 수가 되도록)
+            if self.schedule.next_time <= now:
+                await asyncio.sleep(0)
+                continue
+            await asyncio.sleep(max(self.schedule.next_time - time.monotonic(), self.tick))
@@ -2,17 +2,25 @@ import sys
 sys.stdout.reconfigure(line_buffering=True)
 
 import os
+# 공용 모듈(codec, histogram, exporter)은 part-a-pipeline/common
+# 로컬 실행은 ../common에서 import, 컨테이너는 Dockerfile이 /app에 함께 복사
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'common'))
+
 import time
 import uuid
 import random
 import asyncio
-import json
 import psycopg2
 import asyncpg
+import numpy as np
 import redis.asyncio as aioredis
 from datetime import datetime
 from config import Config
 from metrics import MetricsCollector
+from exporter import start_http_server
+from codec import get_codec, encode_batch
+from samplers import AliasSampler
+from loadgen import LoadProfile, ArrivalSchedule, OpenLoopRunner
 
 # ============================================
 # 현실적 데이터 생성기 (sample_data_generator 기반)
@@ -112,6 +120,11 @@ MERCHANTS = {
 CATEGORIES = list(MERCHANTS.keys())
 CATEGORY_WEIGHTS = [MERCHANTS[cat]['weight'] for cat in CATEGORIES]
 
+# 가중치 샘플러: 시작 시 1회 구축 (거래마다 10만 개 가중치 리스트를 만들지 않음)
+TIER_WEIGHTS = {'vip': 3, 'premium': 2, 'normal': 1}
+USER_SAMPLER = AliasSampler(USER_IDS, [TIER_WEIGHTS[USER_TIERS[u]] for u in USER_IDS])
+CATEGORY_SAMPLER = AliasSampler(CATEGORIES, CATEGORY_WEIGHTS)
+
 def get_time_slot(hour: int) -> str:
     if 0 <= hour < 6:
         return 'dawn'
@@ -169,13 +182,8 @@ def generate_amount(user_id: str, category: str) -> int:
 
 def generate_transaction() -> dict:
     """현실적인 트랜잭션 생성"""
-    user_id = random.choices(
-        USER_IDS,
-        weights=[3 if USER_TIERS[u] == 'vip' else 2 if USER_TIERS[u] == 'premium' else 1 for u in USER_IDS],
-        k=1
-    )[0]
-    
-    category = random.choices(CATEGORIES, weights=CATEGORY_WEIGHTS, k=1)[0]
+    user_id = USER_SAMPLER.sample()
+    category = CATEGORY_SAMPLER.sample()
     amount = generate_amount(user_id, category)
     merchant = random.choice(MERCHANTS[category]['names'])
     region = USER_REGIONS[user_id]
@@ -213,6 +221,130 @@ def generate_transaction() -> dict:
         'created_at': time.time()
     }
 
+# ============================================
+# NumPy 벌크 생성 (배치 단위 벡터화)
+# ============================================
+
+NP_RNG = np.random.default_rng()
+
+TIER_NORMAL, TIER_PREMIUM, TIER_VIP = 0, 1, 2
+USER_TIER_CODES = np.array(
+    [{'normal': TIER_NORMAL, 'premium': TIER_PREMIUM, 'vip': TIER_VIP}[USER_TIERS[u]] for u in USER_IDS],
+    dtype=np.int8
+)
+USER_CARD_LIST = [USER_CARDS[u] for u in USER_IDS]
+USER_REGION_LIST = [USER_REGIONS[u] for u in USER_IDS]
+
+# 카테고리별 금액 분포 종류: restaurant / 고가(luxury, electronics, travel) / 일반
+KIND_GENERAL, KIND_RESTAURANT, KIND_HIGH = 0, 1, 2
+CATEGORY_KINDS = np.array([
+    KIND_RESTAURANT if cat == 'restaurant'
+    else KIND_HIGH if cat in ['luxury', 'electronics', 'travel']
+    else KIND_GENERAL
+    for cat in CATEGORIES
+], dtype=np.int8)
+CATEGORY_MIN_AMOUNT = np.array([MERCHANTS[cat]['amount_range'][0] for cat in CATEGORIES], dtype=np.int64)
+CATEGORY_MAX_AMOUNT = np.array([MERCHANTS[cat]['amount_range'][1] for cat in CATEGORIES], dtype=np.int64)
+CATEGORY_OPEN_HOUR = np.array([MERCHANTS[cat]['hours'][0] for cat in CATEGORIES], dtype=np.int64)
+CATEGORY_CLOSE_HOUR = np.array([MERCHANTS[cat]['hours'][1] for cat in CATEGORIES], dtype=np.int64)
+
+MERCHANT_NAME_LIST = [name for cat in CATEGORIES for name in MERCHANTS[cat]['names']]
+CATEGORY_NAME_COUNT = np.array([len(MERCHANTS[cat]['names']) for cat in CATEGORIES], dtype=np.int64)
+CATEGORY_NAME_OFFSET = np.concatenate([[0], np.cumsum(CATEGORY_NAME_COUNT)[:-1]])
+
+TIER_NAMES = ['normal', 'premium', 'vip']
+TIME_SLOT_BY_HOUR = [get_time_slot(hour) for hour in range(24)]
+
+def generate_amounts_bulk(tiers: np.ndarray, categories: np.ndarray) -> np.ndarray:
+    """generate_amount와 같은 분포를 배열 연산으로"""
+    n = len(tiers)
+    min_amt = CATEGORY_MIN_AMOUNT[categories]
+    max_amt = CATEGORY_MAX_AMOUNT[categories]
+    max_amt = np.where(tiers == TIER_VIP, np.minimum(max_amt * 3, 100000000), max_amt)
+    max_amt = np.where(tiers == TIER_PREMIUM, np.minimum((max_amt * 1.5).astype(np.int64), 20000000), max_amt)
+    
+    kinds = CATEGORY_KINDS[categories]
+    is_restaurant = kinds == KIND_RESTAURANT
+    p0 = np.select([is_restaurant, kinds == KIND_HIGH], [0.80, 0.50], 0.70)
+    p1 = np.select([is_restaurant, kinds == KIND_HIGH], [0.95, 0.80], 0.95)
+    rand = NP_RNG.random(n)
+    band = (rand >= p0).astype(np.int64) + (rand >= p1)
+    
+    span = max_amt - min_amt
+    third1 = min_amt + span // 3
+    third2 = min_amt + 2 * span // 3
+    low = np.choose(band, [min_amt, third1, third2])
+    high = np.choose(band, [third1, third2, max_amt])
+    # 회식 반영: 식사 / 외식 / 회식 구간
+    low = np.where(is_restaurant, np.choose(band, [min_amt, 30000, 80000]), low)
+    high = np.where(is_restaurant, np.choose(band, [30000, 80000, max_amt]), high)
+    
+    amounts = NP_RNG.integers(low, high + 1)
+    return np.where(
+        amounts >= 10000, (amounts // 1000) * 1000,
+        np.where(amounts >= 1000, (amounts // 100) * 100, amounts)
+    )
+
+def generate_hours_bulk(categories: np.ndarray) -> np.ndarray:
+    """영업시간 내 랜덤 시간 (야간 영업은 80%를 개점~23시에 배정)"""
+    n = len(categories)
+    open_hour = CATEGORY_OPEN_HOUR[categories]
+    close_hour = CATEGORY_CLOSE_HOUR[categories]
+    overnight = open_hour >= close_hour
+    evening = NP_RNG.integers(open_hour, np.where(overnight, 24, close_hour))
+    early = NP_RNG.integers(0, np.where(overnight, close_hour, 0) + 1)
+    return np.where(overnight & (NP_RNG.random(n) >= 0.8), early, evening)
+
+def generate_tx_ids(count: int) -> list:
+    """UUID4 문자열 count개 (urandom 1회 호출, uuid.uuid4()와 같은 형식)"""
+    raw = os.urandom(16 * count).hex()
+    tx_ids = []
+    for i in range(0, 32 * count, 32):
+        h = raw[i:i + 32]
+        tx_ids.append(
+            f"{h[:8]}-{h[8:12]}-4{h[13:16]}-{'89ab'[int(h[16], 16) & 3]}{h[17:20]}-{h[20:]}"
+        )
+    return tx_ids
+
+def generate_transactions_bulk(count: int) -> list:
+    """generate_transaction count건을 한 번의 벡터 연산으로 생성"""
+    users = USER_SAMPLER.sample_indices(count, NP_RNG)
+    categories = CATEGORY_SAMPLER.sample_indices(count, NP_RNG)
+    tiers = USER_TIER_CODES[users]
+    
+    amounts = generate_amounts_bulk(tiers, categories)
+    merchants = CATEGORY_NAME_OFFSET[categories] + NP_RNG.integers(0, CATEGORY_NAME_COUNT[categories])
+    hours = generate_hours_bulk(categories)
+    days = NP_RNG.integers(0, 7, size=count)
+    
+    created_at = time.time()
+    return [
+        {
+            'tx_id': tx_id,
+            'user_id': USER_IDS[u],
+            'user_tier': TIER_NAMES[t],
+            'card_number': USER_CARD_LIST[u],
+            'amount': amount,
+            'merchant': MERCHANT_NAME_LIST[m],
+            'merchant_category': CATEGORIES[c],
+            'region': USER_REGION_LIST[u],
+            'hour': hour,
+            'day_of_week': day,
+            'is_weekend': day >= 5,
+            'time_slot': TIME_SLOT_BY_HOUR[hour],
+            'created_at': created_at
+        }
+        for tx_id, u, t, c, amount, m, hour, day in zip(
+            generate_tx_ids(count), users.tolist(), tiers.tolist(), categories.tolist(), amounts.tolist(),
+            merchants.tolist(), hours.tolist(), days.tolist()
+        )
+    ]
+
+def generate_transactions(count: int) -> list:
+    if Config.BULK_GENERATION:
+        return generate_transactions_bulk(count)
+    return [generate_transaction() for _ in range(count)]
+
 # ============================================
 # Phase 1: 동기 방식 (Baseline)
 # ============================================
@@ -372,7 +504,7 @@ async def run_phase2_optimized(tps: int, metrics: MetricsCollector):
     batch_size = 100
     
     async def insert_batch():
-        transactions = [generate_transaction() for _ in range(batch_size)]
+        transactions = generate_transactions(batch_size)
         start = time.time()
         async with pool.acquire() as conn:
             await conn.executemany(f"""
@@ -391,12 +523,10 @@ async def run_phase2_optimized(tps: int, metrics: MetricsCollector):
             
             for result in results:
                 if isinstance(result, Exception):
-                    for _ in range(batch_size):
-                        metrics.record_error()
+                    metrics.record_error(batch_size)
                 else:
                     latency, count = result
-                    for _ in range(count):
-                        metrics.record_success(latency / count)
+                    metrics.record_many(latency / count, count)
             
             if time.time() - last_metrics_time >= Config.METRICS_INTERVAL:
                 metrics.flush()
@@ -428,7 +558,7 @@ async def run_phase2_max(tps: int, metrics: MetricsCollector):
     batch_size = 500
     
     async def insert_batch():
-        transactions = [generate_transaction() for _ in range(batch_size)]
+        transactions = generate_transactions(batch_size)
         start = time.time()
         async with pool.acquire() as conn:
             await conn.executemany(f"""
@@ -447,12 +577,10 @@ async def run_phase2_max(tps: int, metrics: MetricsCollector):
             
             for result in results:
                 if isinstance(result, Exception):
-                    for _ in range(batch_size):
-                        metrics.record_error()
+                    metrics.record_error(batch_size)
                 else:
                     latency, count = result
-                    for _ in range(count):
-                        metrics.record_success(latency / count)
+                    metrics.record_many(latency / count, count)
             
             if time.time() - last_metrics_time >= Config.METRICS_INTERVAL:
                 metrics.flush()
@@ -470,9 +598,96 @@ async def run_phase2_max(tps: int, metrics: MetricsCollector):
 # Phase 3: Redis Buffer
 # ============================================
 
+async def get_queue_length(redis_client) -> int:
+    """전체 샤드 큐 길이 합계"""
+    pipe = redis_client.pipeline()
+    for queue_name in Config.get_queue_names():
+        if Config.TRANSPORT == 'stream':
+            pipe.xlen(queue_name)
+        else:
+            pipe.llen(queue_name)
+    return sum(await pipe.execute())
+
+async def update_queue_gauge(redis_client, metrics: MetricsCollector):
+    """exposition용 큐 길이 게이지 (scrape 스레드는 Redis를 조회하지 않음)"""
+    while True:
+        try:
+            metrics.set_gauge('queue_length', await get_queue_length(redis_client))
+        except Exception as e:
+            print(f"[Error] Queue length check failed: {e}")
+        await asyncio.sleep(Config.METRICS_GAUGE_INTERVAL)
+
+async def push_transactions(redis_client, codec, transactions: list):
+    """트랜잭션 리스트를 샤드별 큐에 한 번의 파이프라인으로 적재"""
+    # 샤드 모드면 user_id 해시로 큐를 나눠 같은 유저는 항상 같은 consumer가 처리 (단일 샤드는 해시 없이 그대로)
+    if Config.NUM_SHARDS <= 1:
+        queues = {Config.QUEUE_NAME: transactions}
+    else:
+        queues = {}
+        for tx in transactions:
+            queue_name = Config.get_queue_name(Config.get_shard(tx['user_id']))
+            queues.setdefault(queue_name, []).append(tx)
+    
+    pipe = redis_client.pipeline()
+    for queue_name, queue_txs in queues.items():
+        payloads = encode_batch(codec, queue_txs, Config.FRAME_SIZE)
+        if Config.TRANSPORT == 'stream':
+            for payload in payloads:
+                pipe.xadd(queue_name, {'data': payload},
+                          maxlen=Config.STREAM_MAXLEN, approximate=True)
+        else:
+            pipe.lpush(queue_name, *payloads)
+    await pipe.execute()
+
+async def run_phase3_open_loop(redis_client, codec, metrics: MetricsCollector):
+    """
+    Open-loop 모드: 도착 스케줄대로 전송하고 이전 전송 완료를 기다리지 않음
+    - created_at은 스케줄상 전송 시각, 지연시간도 그 시각부터 측정
+    """
+    profile = LoadProfile.parse(Config.LOAD_PROFILE or f"constant:{Config.TPS}")
+    schedule = ArrivalSchedule(profile, Config.ARRIVAL)
+    # monotonic 스케줄 시각 → wall clock
+    wall_offset = time.time() - schedule.start
+    
+    print(f"[Phase 3] Open-loop: profile={profile}, arrival={Config.ARRIVAL}, "
+          f"max batch={Config.OPEN_LOOP_MAX_BATCH}, max in-flight={Config.MAX_INFLIGHT_BATCHES}")
+    sys.stdout.flush()
+    
+    async def send_batch(intended_times: list):
+        transactions = generate_transactions(len(intended_times))
+        for tx, intended in zip(transactions, intended_times):
+            tx['created_at'] = intended + wall_offset
+        await push_transactions(redis_client, codec, transactions)
+    
+    runner = OpenLoopRunner(
+        schedule, send_batch, metrics,
+        max_batch=Config.OPEN_LOOP_MAX_BATCH,
+        max_inflight=Config.MAX_INFLIGHT_BATCHES
+    )
+    last_metrics_time = time.time()
+    
+    async def on_tick(runner):
+        nonlocal last_metrics_time
+        metrics.set_gauge('inflight_batches', len(runner.inflight))
+        metrics.set_gauge('target_tps', profile.rate(time.monotonic() - schedule.start))
+        if time.time() - last_metrics_time >= Config.METRICS_INTERVAL:
+            stats = runner.report()
+            queue_len = await get_queue_length(redis_client)
+            metrics.flush(queue_length=queue_len, target_tps=stats['target_tps'])
+            last_metrics_time = time.time()
+    
+    try:
+        await runner.run_until(on_tick=on_tick)
+    finally:
+        if runner.inflight:
+            await asyncio.gather(*runner.inflight, return_exceptions=True)
+
 async def run_phase3(tps: int, metrics: MetricsCollector):
     print(f"[Phase 3] Redis Buffer mode")
     print(f"[Phase 3] Redis: {Config.REDIS_HOST}:{Config.REDIS_PORT}")
+    print(f"[Phase 3] Shards: {Config.NUM_SHARDS}")
+    print(f"[Phase 3] Transport: {Config.TRANSPORT}")
+    print(f"[Phase 3] Codec: {Config.CODEC} (frame size: {Config.FRAME_SIZE})")
     sys.stdout.flush()
     
     redis_client = await aioredis.from_url(
@@ -482,20 +697,28 @@ async def run_phase3(tps: int, metrics: MetricsCollector):
     )
     
     print(f"[Phase 3] Redis connected")
+    
+    codec = get_codec(Config.CODEC)
     sys.stdout.flush()
     
+    gauge_task = asyncio.create_task(update_queue_gauge(redis_client, metrics)) if Config.METRICS_PORT else None
+    
+    if Config.LOAD_MODE == 'open':
+        try:
+            await run_phase3_open_loop(redis_client, codec, metrics)
+        finally:
+            if gauge_task is not None:
+                gauge_task.cancel()
+            await redis_client.close()
+        return
+    
     last_metrics_time = time.time()
     batch_size = 100
     
     async def push_batch():
-        transactions = [generate_transaction() for _ in range(batch_size)]
+        transactions = generate_transactions(batch_size)
         start = time.time()
-        
-        pipe = redis_client.pipeline()
-        for tx in transactions:
-            pipe.lpush("tx_queue", json.dumps(tx))
-        await pipe.execute()
-        
+        await push_transactions(redis_client, codec, transactions)
         return time.time() - start, batch_size
     
     try:
@@ -508,16 +731,14 @@ async def run_phase3(tps: int, metrics: MetricsCollector):
             
             for result in results:
                 if isinstance(result, Exception):
-                    for _ in range(batch_size):
-                        metrics.record_error()
+                    metrics.record_error(batch_size)
                     print(f"[Error] {result}")
                 else:
                     latency, count = result
-                    for _ in range(count):
-                        metrics.record_success(latency / count)
+                    metrics.record_many(latency / count, count)
             
             if time.time() - last_metrics_time >= Config.METRICS_INTERVAL:
-                queue_len = await redis_client.llen("tx_queue")
+                queue_len = await get_queue_length(redis_client)
                 metrics.flush(queue_length=queue_len)
                 last_metrics_time = time.time()
             
@@ -528,6 +749,8 @@ async def run_phase3(tps: int, metrics: MetricsCollector):
                 await asyncio.sleep(expected_time - elapsed)
     
     finally:
+        if gauge_task is not None:
+            gauge_task.cancel()
         await redis_client.close()
 
 # ============================================
@@ -548,6 +771,8 @@ def main():
         phase=Config.PHASE,
         role="generator"
     )
+    if Config.METRICS_PORT:
+        start_http_server(Config.METRICS_PORT, metrics.render)
     
     if Config.PHASE == 1:
         run_phase1(Config.TPS, metrics)
@@ -1,12 +1,32 @@
 import time
 import csv
 import os
+import json
 import psutil
+import threading
 import numpy as np
 from datetime import datetime
+from histogram import LatencyHistogram
+from exporter import format_counter, format_gauge, format_histogram
+
+GAUGE_HELP = {
+    'queue_length': 'Redis queue length',
+    'target_tps': 'Open-loop target rate',
+    'inflight_batches': 'Open-loop batches in flight',
+}
+
+# phase*_metrics.csv 컬럼은 기존 분석(노트북, docs)과 호환되도록 고정
+# 이후 추가한 항목은 같은 timestamp로 phase*_metrics_ext.csv에 따로 기록
+METRICS_COLUMNS = (
+    'timestamp', 'tps', 'success_count', 'error_count',
+    'error_rate', 'latency_avg_ms', 'latency_p50_ms',
+    'latency_p95_ms', 'latency_p99_ms', 'cpu_percent',
+    'memory_percent', 'queue_length'
+)
+EXTENDED_COLUMNS = ('timestamp', 'target_tps', 'latency_p999_ms')
 
 class MetricsCollector:
-    def __init__(self, output_dir: str, phase: int, role: str = "generator"):
+    def __init__(self, output_dir: str, phase: int, role: str = "generator", labels: dict = None):
         self.output_dir = output_dir
         self.phase = phase
         self.role = role
@@ -14,64 +34,121 @@ class MetricsCollector:
             output_dir, 
             f"phase{phase}_{role}_metrics.csv"
         )
+        self.extended_path = os.path.join(
+            output_dir,
+            f"phase{phase}_{role}_metrics_ext.csv"
+        )
+        # 구간별 히스토그램 snapshot (샤드/프로세스 간 병합용, JSON lines)
+        self.histogram_path = os.path.join(
+            output_dir,
+            f"phase{phase}_{role}_latency.jsonl"
+        )
         
-        self.latencies = []
+        self.histogram = LatencyHistogram()
         self.success_count = 0
         self.error_count = 0
         self.start_time = time.time()
         
+        # Prometheus exposition용 누적값 (flush해도 초기화하지 않음)
+        self.labels = labels or {}
+        self.lifetime = LatencyHistogram()
+        self.total_success = 0
+        self.total_errors = 0
+        self.gauges = {}
+        self._lock = threading.Lock()
+        
         os.makedirs(output_dir, exist_ok=True)
         self._write_header()
     
     def _write_header(self):
-        if not os.path.exists(self.output_path):
-            with open(self.output_path, 'w', newline='') as f:
-                writer = csv.writer(f)
-                writer.writerow([
-                    'timestamp', 'tps', 'success_count', 'error_count',
-                    'error_rate', 'latency_avg_ms', 'latency_p50_ms',
-                    'latency_p95_ms', 'latency_p99_ms', 'cpu_percent',
-                    'memory_percent', 'queue_length'
-                ])
+        for path, columns in ((self.output_path, METRICS_COLUMNS), (self.extended_path, EXTENDED_COLUMNS)):
+            if not os.path.exists(path):
+                with open(path, 'w', newline='') as f:
+                    csv.writer(f).writerow(columns)
     
     def record_success(self, latency: float):
-        self.latencies.append(latency)
+        self.histogram.record(latency)
         self.success_count += 1
+        self.total_success += 1
+    
+    def record_many(self, latency: float, count: int):
+        """같은 지연시간 count건 (배치 단위 기록)"""
+        self.histogram.record_many(latency, count)
+        self.success_count += count
+        self.total_success += count
     
-    def record_error(self):
-        self.error_count += 1
+    def record_error(self, count: int = 1):
+        self.error_count += count
+        self.total_errors += count
     
-    def flush(self, queue_length: int = 0) -> dict:
+    def set_gauge(self, name: str, value):
+        """exposition 게이지 갱신 (이벤트 루프에서 호출)"""
+        self.gauges[name] = value
+    
+    def flush(self, queue_length: int = 0, target_tps: float = 0) -> dict:
         elapsed = time.time() - self.start_time
         total_count = self.success_count + self.error_count
         
+        histogram = self.histogram
+        p50, p95, p99, p999 = histogram.percentiles([50, 95, 99, 99.9])
+        
         metrics = {
             'timestamp': datetime.now().isoformat(),
             'tps': round(self.success_count / elapsed, 2) if elapsed > 0 else 0,
             'success_count': self.success_count,
             'error_count': self.error_count,
             'error_rate': round(self.error_count / total_count, 4) if total_count > 0 else 0,
-            'latency_avg_ms': round(np.mean(self.latencies) * 1000, 2) if self.latencies else 0,
-            'latency_p50_ms': round(np.percentile(self.latencies, 50) * 1000, 2) if self.latencies else 0,
-            'latency_p95_ms': round(np.percentile(self.latencies, 95) * 1000, 2) if len(self.latencies) >= 20 else 0,
-            'latency_p99_ms': round(np.percentile(self.latencies, 99) * 1000, 2) if len(self.latencies) >= 100 else 0,
+            'latency_avg_ms': round(histogram.mean() * 1000, 2),
+            'latency_p50_ms': round(p50 * 1000, 2),
+            'latency_p95_ms': round(p95 * 1000, 2) if len(histogram) >= 20 else 0,
+            'latency_p99_ms': round(p99 * 1000, 2) if len(histogram) >= 100 else 0,
             'cpu_percent': psutil.cpu_percent(),
             'memory_percent': round(psutil.virtual_memory().percent, 1),
-            'queue_length': queue_length
+            'queue_length': queue_length,
+            'target_tps': target_tps,
+            'latency_p999_ms': round(p999 * 1000, 2) if len(histogram) >= 1000 else 0
         }
         
         with open(self.output_path, 'a', newline='') as f:
-            writer = csv.writer(f)
-            writer.writerow(metrics.values())
+            csv.writer(f).writerow([metrics[column] for column in METRICS_COLUMNS])
+        with open(self.extended_path, 'a', newline='') as f:
+            csv.writer(f).writerow([metrics[column] for column in EXTENDED_COLUMNS])
         
         print(f"[{metrics['timestamp']}] TPS: {metrics['tps']}, "
-              f"Latency(avg): {metrics['latency_avg_ms']}ms, "
+              f"Latency(avg): {metrics['latency_avg_ms']}ms (p99 {metrics['latency_p99_ms']}ms), "
               f"Queue: {metrics['queue_length']}, "
               f"CPU: {metrics['cpu_percent']}%")
         
-        self.latencies = []
+        with open(self.histogram_path, 'a') as f:
+            f.write(json.dumps({'timestamp': metrics['timestamp'], 'histogram': histogram.snapshot()}) + '\n')
+        
+        # scrape 스레드가 병합 도중 값을 읽지 않도록 잠금
+        with self._lock:
+            self.lifetime.merge(histogram)
+            self.histogram = LatencyHistogram()
         self.success_count = 0
         self.error_count = 0
         self.start_time = time.time()
         
         return metrics
+    
+    def render(self) -> str:
+        """Prometheus 텍스트 포맷 (HTTP 스레드에서 호출)"""
+        prefix = f"fds_{self.role.split('_')[0]}"
+        labels = self.labels
+        with self._lock:
+            window, lifetime = self.histogram, self.lifetime
+            counts = np.add(lifetime.counts, window.counts)
+            total = lifetime.total + window.total
+            sum_seconds = lifetime.sum + window.sum
+        
+        lines = format_counter(f"{prefix}_transactions_total", "Processed transactions by result", [
+            ({**labels, 'result': 'success'}, self.total_success),
+            ({**labels, 'result': 'error'}, self.total_errors),
+        ])
+        for name, value in sorted(dict(self.gauges).items()):
+            lines.extend(format_gauge(f"{prefix}_{name}", GAUGE_HELP.get(name, name), [(labels, value)]))
+        lines.extend(format_histogram(f"{prefix}_latency_seconds", "Latency by stage", [
+            ({**labels, 'stage': 'push'}, counts, total, sum_seconds),
+        ]))
+        return '\n'.join(lines) + '\n'
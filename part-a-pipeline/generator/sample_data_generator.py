@@ -1,10 +1,24 @@
+"""
+샘플 거래 데이터 생성기
+- generate_sample_csv: 건별 dict 생성 → CSV (분석 노트북용 소량 데이터)
+- generate_columnar: 같은 분포를 NumPy로 청크 단위 생성 → .npy 컬럼(memmap) / Parquet / CSV
+  (1억 건 이상 replay/backtest 코퍼스, 메모리는 청크 크기만큼만 사용)
+
+사용법:
+    python sample_data_generator.py                                      # 기존 10,000건 CSV
+    python sample_data_generator.py --rows 100000000 --format npy --output data/corpus_100m
+    python sample_data_generator.py --rows 10000000 --format parquet --output data/corpus.parquet --users 100000
+"""
+
 import uuid
 import random
 import time
 import csv
 import os
+import json
+import argparse
 from datetime import datetime, timedelta
-from collections import defaultdict
+import numpy as np
 
 # ============================================
 # 사용자 풀 (500명으로 축소)
@@ -108,10 +122,24 @@ MERCHANTS = {
 CATEGORIES = list(MERCHANTS.keys())
 CATEGORY_WEIGHTS = [MERCHANTS[cat]['weight'] for cat in CATEGORIES]
 
+# 등급이 높을수록 자주 결제 (리스트는 1회만 생성, 거래마다 다시 만들지 않음)
+TIER_WEIGHTS = {'vip': 3, 'premium': 2, 'normal': 1}
+USER_WEIGHTS = [TIER_WEIGHTS[USER_TIERS[u]] for u in USER_IDS]
+
 # ============================================
 # 시간 생성 (영업시간 반영)
 # ============================================
 
+HOUR_WEIGHTS_24H = [
+    1, 1, 1, 1, 1, 2,      # 0-5: 새벽
+    4, 8, 10, 8,           # 6-9: 오전
+    6, 8,                  # 10-11
+    15, 12,                # 12-13: 점심 피크
+    8, 6, 6, 8,            # 14-17
+    12, 15, 12, 10,        # 18-21: 저녁 피크
+    6, 3                   # 22-23
+]
+
 def is_valid_hour(category: str, hour: int) -> bool:
     """해당 카테고리가 영업 중인 시간인지 확인"""
     open_hour, close_hour = MERCHANTS[category]['hours']
@@ -129,25 +157,17 @@ def generate_valid_hour(category: str) -> int:
     
     if open_hour == 0 and close_hour == 24:
         # 24시간 영업
-        hour_weights = [
-            1, 1, 1, 1, 1, 2,      # 0-5: 새벽
-            4, 8, 10, 8,           # 6-9: 오전
-            6, 8,                  # 10-11
-            15, 12,                # 12-13: 점심 피크
-            8, 6, 6, 8,            # 14-17
-            12, 15, 12, 10,        # 18-21: 저녁 피크
-            6, 3                   # 22-23
-        ]
-        return random.choices(range(24), weights=hour_weights, k=1)[0]
-    
-    elif open_hour < close_hour:
-        # 일반적인 경우
-        valid_hours = list(range(open_hour, close_hour))
-    else:
-        # 자정을 넘기는 경우
-        valid_hours = list(range(open_hour, 24)) + list(range(0, close_hour))
+        return random.choices(range(24), weights=HOUR_WEIGHTS_24H, k=1)[0]
     
-    return random.choice(valid_hours)
+    return random.choice(valid_hours(category))
+
+def valid_hours(category: str) -> list:
+    open_hour, close_hour = MERCHANTS[category]['hours']
+    if open_hour < close_hour:
+        # 일반적인 경우
+        return list(range(open_hour, close_hour))
+    # 자정을 넘기는 경우
+    return list(range(open_hour, 24)) + list(range(0, close_hour))
 
 def get_time_slot(hour: int) -> str:
     if 0 <= hour < 6:
@@ -167,8 +187,13 @@ def get_time_slot(hour: int) -> str:
 # 금액 생성 (회식 반영)
 # ============================================
 
-def generate_amount(user_id: str, category: str) -> int:
-    tier = USER_TIERS[user_id]
+HIGH_VALUE_CATEGORIES = ['luxury', 'electronics', 'travel']
+
+def amount_bands(tier: str, category: str) -> tuple:
+    """
+    (등급, 카테고리)별 금액 구간 3개와 누적 확률 2개
+    Returns: ((p1, p2), ((lo, hi), (lo, hi), (lo, hi)))  ← 구간은 양끝 포함
+    """
     min_amt, max_amt = MERCHANTS[category]['amount_range']
     
     # 등급별 최대 금액 조정
@@ -179,49 +204,49 @@ def generate_amount(user_id: str, category: str) -> int:
     
     # 카테고리별 금액 분포
     if category == 'restaurant':
-        # 회식 반영: 5% 확률로 10만원 이상
-        rand = random.random()
-        if rand < 0.80:
-            amount = random.randint(min_amt, 30000)  # 일반 식사
-        elif rand < 0.95:
-            amount = random.randint(30000, 80000)   # 외식
-        else:
-            amount = random.randint(80000, max_amt)  # 회식
+        # 회식 반영: 5% 확률로 8만원 이상 (일반 식사 80%, 외식 15%)
+        return (0.80, 0.95), ((min_amt, 30000), (30000, 80000), (80000, max_amt))
     
-    elif category in ['luxury', 'electronics', 'travel']:
+    first = min_amt + (max_amt - min_amt) // 3
+    second = min_amt + 2 * (max_amt - min_amt) // 3
+    thirds = ((min_amt, first), (first, second), (second, max_amt))
+    if category in HIGH_VALUE_CATEGORIES:
         # 고가 카테고리: 상위 금액 비중 높음
-        rand = random.random()
-        if rand < 0.50:
-            amount = random.randint(min_amt, min_amt + (max_amt - min_amt) // 3)
-        elif rand < 0.80:
-            amount = random.randint(min_amt + (max_amt - min_amt) // 3, min_amt + 2 * (max_amt - min_amt) // 3)
-        else:
-            amount = random.randint(min_amt + 2 * (max_amt - min_amt) // 3, max_amt)
-    
-    else:
-        # 일반 카테고리: 소액 비중 높음
-        rand = random.random()
-        if rand < 0.70:
-            amount = random.randint(min_amt, min_amt + (max_amt - min_amt) // 3)
-        elif rand < 0.95:
-            amount = random.randint(min_amt + (max_amt - min_amt) // 3, min_amt + 2 * (max_amt - min_amt) // 3)
-        else:
-            amount = random.randint(min_amt + 2 * (max_amt - min_amt) // 3, max_amt)
-    
+        return (0.50, 0.80), thirds
+    # 일반 카테고리: 소액 비중 높음
+    return (0.70, 0.95), thirds
+
+def round_amount(amount: int) -> int:
     # 1000원 단위로 반올림
     if amount >= 10000:
         amount = (amount // 1000) * 1000
     elif amount >= 1000:
         amount = (amount // 100) * 100
-    
     return amount
 
+def generate_amount(user_id: str, category: str) -> int:
+    (p1, p2), bands = amount_bands(USER_TIERS[user_id], category)
+    rand = random.random()
+    if rand < p1:
+        low, high = bands[0]
+    elif rand < p2:
+        low, high = bands[1]
+    else:
+        low, high = bands[2]
+    return round_amount(random.randint(low, high))
+
 # ============================================
 # 이상거래 패턴 (실제 데이터 생성)
 # ============================================
 
 class FraudPatternManager:
     """실제 이상거래 패턴을 데이터에 삽입"""
+    VELOCITY_COUNT = 5  # 패턴 1건당 결제 수
+    VELOCITY_SPREAD_SECONDS = 50
+    VELOCITY_CATEGORY = 'online_shopping'  # 온라인이 연속 결제 가능
+    VELOCITY_REASON = '1분 내 5회 이상 결제'
+    AMOUNT_SPIKE_MULTIPLIER = 10
+    AMOUNT_SPIKE_REASON = '평소의 10배 이상 금액'
     
     def __init__(self):
         self.velocity_queue = []  # (user_id, remaining_count, base_datetime)
@@ -231,9 +256,9 @@ class FraudPatternManager:
         """1분 내 5회 결제 패턴 예약"""
         self.velocity_queue.append({
             'user_id': user_id,
-            'remaining': 5,
+            'remaining': self.VELOCITY_COUNT,
             'base_datetime': base_datetime,
-            'category': 'online_shopping'  # 온라인이 연속 결제 가능
+            'category': self.VELOCITY_CATEGORY
         })
     
     def get_velocity_transaction(self) -> dict:
@@ -249,7 +274,7 @@ class FraudPatternManager:
         pattern['remaining'] -= 1
         
         # 1분 내 랜덤 시간
-        seconds_offset = random.randint(0, 50)
+        seconds_offset = random.randint(0, self.VELOCITY_SPREAD_SECONDS)
         tx_datetime = pattern['base_datetime'] + timedelta(seconds=seconds_offset)
         
         if pattern['remaining'] == 0:
@@ -260,7 +285,7 @@ class FraudPatternManager:
             'datetime': tx_datetime,
             'category': pattern['category'],
             'fraud_type': 'velocity',
-            'fraud_reason': '1분 내 5회 이상 결제'
+            'fraud_reason': self.VELOCITY_REASON
         }
     
     def schedule_amount_spike(self, user_id: str):
@@ -279,6 +304,8 @@ fraud_manager = FraudPatternManager()
 # 트랜잭션 생성
 # ============================================
 
+DAY_NAMES = ['월', '화', '수', '목', '금', '토', '일']
+
 def generate_transaction(tx_datetime: datetime, force_user: str = None, 
                          force_fraud: dict = None) -> dict:
     """단일 트랜잭션 생성"""
@@ -287,11 +314,7 @@ def generate_transaction(tx_datetime: datetime, force_user: str = None,
         user_id = force_user
     else:
         # 특정 사용자가 더 자주 결제하도록 가중치 적용
-        user_id = random.choices(
-            USER_IDS, 
-            weights=[3 if USER_TIERS[u] == 'vip' else 2 if USER_TIERS[u] == 'premium' else 1 for u in USER_IDS],
-            k=1
-        )[0]
+        user_id = random.choices(USER_IDS, weights=USER_WEIGHTS, k=1)[0]
     
     if force_fraud:
         category = force_fraud.get('category', random.choices(CATEGORIES, weights=CATEGORY_WEIGHTS, k=1)[0])
@@ -306,7 +329,7 @@ def generate_transaction(tx_datetime: datetime, force_user: str = None,
     if force_fraud and force_fraud.get('fraud_type') == 'amount_spike':
         # 평소의 10배
         base_amount = generate_amount(user_id, category)
-        amount = base_amount * 10
+        amount = base_amount * FraudPatternManager.AMOUNT_SPIKE_MULTIPLIER
     else:
         amount = generate_amount(user_id, category)
     
@@ -331,7 +354,7 @@ def generate_transaction(tx_datetime: datetime, force_user: str = None,
         'date': tx_datetime.strftime('%Y-%m-%d'),
         'hour': tx_datetime.hour,
         'day_of_week': tx_datetime.weekday(),
-        'day_name': ['월', '화', '수', '목', '금', '토', '일'][tx_datetime.weekday()],
+        'day_name': DAY_NAMES[tx_datetime.weekday()],
         'is_weekend': tx_datetime.weekday() >= 5,
         'time_slot': get_time_slot(tx_datetime.hour),
         'is_suspected_fraud': is_fraud,
@@ -339,6 +362,141 @@ def generate_transaction(tx_datetime: datetime, force_user: str = None,
         'fraud_reason': fraud_reason
     }
 
+# ============================================
+# 통계 (단일 패스)
+# ============================================
+
+TIERS = ['normal', 'premium', 'vip']
+TIME_SLOTS = ['dawn', 'morning', 'lunch', 'afternoon', 'evening', 'night']
+FRAUD_TYPES = ['', 'velocity', 'amount_spike']  # 코드 0 = 정상
+
+class TransactionStats:
+    """
+    생성 통계를 거래를 한 번만 훑으면서 누적
+    - add: 건별 dict (generate_sample_csv)
+    - add_columns: 청크 컬럼 배열 (generate_columnar, np.bincount로 집계)
+    """
+    
+    def __init__(self, num_users: int):
+        self.total = 0
+        self.user_counts = np.zeros(num_users, dtype=np.int64)
+        self.tier_counts = np.zeros(len(TIERS), dtype=np.int64)
+        self.tier_amounts = np.zeros(len(TIERS), dtype=np.int64)
+        self.category_counts = np.zeros(len(CATEGORIES), dtype=np.int64)
+        self.category_amounts = np.zeros(len(CATEGORIES), dtype=np.int64)
+        self.slot_counts = np.zeros(len(TIME_SLOTS), dtype=np.int64)
+        self.fraud_counts = np.zeros(len(FRAUD_TYPES), dtype=np.int64)
+        self.velocity_users = {}  # user index → velocity 패턴 거래 수
+        self.first_ts = None
+        self.last_ts = None
+    
+    def add(self, tx: dict):
+        user = int(tx['user_id'].rsplit('_', 1)[1])
+        tier = TIERS.index(tx['user_tier'])
+        category = CATEGORIES.index(tx['merchant_category'])
+        amount = tx['amount']
+        self.total += 1
+        self.user_counts[user] += 1
+        self.tier_counts[tier] += 1
+        self.tier_amounts[tier] += amount
+        self.category_counts[category] += 1
+        self.category_amounts[category] += amount
+        self.slot_counts[TIME_SLOTS.index(tx['time_slot'])] += 1
+        self.fraud_counts[FRAUD_TYPES.index(tx['fraud_type'] or '')] += 1
+        if tx['fraud_type'] == 'velocity':
+            self.velocity_users[user] = self.velocity_users.get(user, 0) + 1
+    
+    def add_columns(self, columns: dict):
+        n = len(columns['amount'])
+        if n == 0:
+            return
+        amounts = columns['amount']
+        self.total += n
+        self.user_counts += np.bincount(columns['user'], minlength=len(self.user_counts))
+        for counts, sums, codes in (
+            (self.tier_counts, self.tier_amounts, columns['user_tier']),
+            (self.category_counts, self.category_amounts, columns['merchant_category']),
+        ):
+            counts += np.bincount(codes, minlength=len(counts))
+            # float64 누적은 2^53원 넘으면 오차 → 청크마다 정수로 더함
+            sums += np.bincount(codes, weights=amounts, minlength=len(sums)).astype(np.int64)
+        self.slot_counts += np.bincount(columns['time_slot'], minlength=len(self.slot_counts))
+        self.fraud_counts += np.bincount(columns['fraud_type'], minlength=len(self.fraud_counts))
+        velocity = columns['user'][columns['fraud_type'] == FRAUD_TYPES.index('velocity')]
+        for user, count in zip(*np.unique(velocity, return_counts=True)):
+            self.velocity_users[int(user)] = self.velocity_users.get(int(user), 0) + int(count)
+        created_at = columns['created_at']
+        self.first_ts = int(created_at[0]) if self.first_ts is None else self.first_ts
+        self.last_ts = int(created_at[-1])
+    
+    def summary(self) -> dict:
+        """메타데이터 저장용"""
+        return {
+            'rows': self.total,
+            'unique_users': int(np.count_nonzero(self.user_counts)),
+            'tiers': {tier: {'count': int(c), 'amount': int(a)}
+                      for tier, c, a in zip(TIERS, self.tier_counts, self.tier_amounts)},
+            'categories': {category: {'count': int(c), 'amount': int(a)}
+                           for category, c, a in zip(CATEGORIES, self.category_counts, self.category_amounts)},
+            'time_slots': dict(zip(TIME_SLOTS, self.slot_counts.tolist())),
+            'fraud_types': {ftype or 'normal': int(c) for ftype, c in zip(FRAUD_TYPES, self.fraud_counts)},
+            'first_ts': self.first_ts,
+            'last_ts': self.last_ts,
+        }
+    
+    def report(self, user_ids):
+        print("\n" + "=" * 50)
+        print("데이터 통계")
+        print("=" * 50)
+        
+        # 유저별 결제 횟수
+        unique_users = int(np.count_nonzero(self.user_counts))
+        avg_tx_per_user = self.total / unique_users
+        max_user = int(np.argmax(self.user_counts))
+        
+        print(f"\n[유저 통계]")
+        print(f"  고유 유저 수: {unique_users}명")
+        print(f"  인당 평균 결제: {avg_tx_per_user:.1f}건")
+        print(f"  최다 결제 유저: {user_ids[max_user]} ({self.user_counts[max_user]}건)")
+        
+        # 등급별
+        print(f"\n[등급별 통계]")
+        for tier in ['normal', 'premium', 'vip']:
+            count = int(self.tier_counts[TIERS.index(tier)])
+            avg_amt = self.tier_amounts[TIERS.index(tier)] / count if count > 0 else 0
+            print(f"  {tier:8}: {count:4}건, 평균 {avg_amt:>12,.0f}원")
+        
+        # 카테고리별
+        print(f"\n[카테고리 TOP 5]")
+        for index in np.argsort(-self.category_counts, kind='stable')[:5]:
+            count = int(self.category_counts[index])
+            if count == 0:
+                break
+            avg = self.category_amounts[index] / count
+            print(f"  {CATEGORIES[index]:15}: {count:4}건, 평균 {avg:>10,.0f}원")
+        
+        # 시간대별
+        print(f"\n[시간대별]")
+        for slot in ['dawn', 'morning', 'lunch', 'afternoon', 'evening', 'night']:
+            count = int(self.slot_counts[TIME_SLOTS.index(slot)])
+            pct = count / self.total * 100
+            print(f"  {slot:10}: {count:4}건 ({pct:5.1f}%)")
+        
+        # 이상거래
+        fraud_total = int(self.fraud_counts[1:].sum())
+        print(f"\n[이상거래]")
+        print(f"  총 {fraud_total}건 ({fraud_total/self.total*100:.2f}%)")
+        for ftype, count in zip(FRAUD_TYPES[1:], self.fraud_counts[1:]):
+            if count:
+                print(f"    - {ftype}: {count}건")
+        
+        # Velocity 패턴 검증 (대량 코퍼스는 일부만)
+        print(f"\n[Velocity 패턴 검증]")
+        for user, count in list(self.velocity_users.items())[:10]:
+            print(f"  {user_ids[user]}: {count}건 연속 결제")
+        if len(self.velocity_users) > 10:
+            print(f"  ... 외 {len(self.velocity_users) - 10}명")
+
 # ============================================
 # CSV 생성
 # ============================================
@@ -369,16 +527,12 @@ def generate_sample_csv(num_records: int = 1000, output_path: str = 'sample_tran
         tx_datetime = tx_date.replace(hour=12)  # 임시, generate_transaction에서 재설정
         
         # Amount Spike 체크
-        user_id = random.choices(
-            USER_IDS,
-            weights=[3 if USER_TIERS[u] == 'vip' else 2 if USER_TIERS[u] == 'premium' else 1 for u in USER_IDS],
-            k=1
-        )[0]
+        user_id = random.choices(USER_IDS, weights=USER_WEIGHTS, k=1)[0]
         
         if fraud_manager.is_amount_spike_user(user_id):
             tx = generate_transaction(tx_datetime, force_user=user_id, force_fraud={
                 'fraud_type': 'amount_spike',
-                'fraud_reason': '평소의 10배 이상 금액'
+                'fraud_reason': FraudPatternManager.AMOUNT_SPIKE_REASON
             })
         else:
             tx = generate_transaction(tx_datetime)
@@ -411,83 +565,417 @@ def generate_sample_csv(num_records: int = 1000, output_path: str = 'sample_tran
     
     print(f"✅ {len(transactions)}건 생성 완료: {output_path}")
     
-    # 통계
-    print("\n" + "=" * 50)
-    print("데이터 통계")
-    print("=" * 50)
-    
-    # 유저별 결제 횟수
-    user_counts = defaultdict(int)
+    # 통계 (한 번 순회하며 집계)
+    stats = TransactionStats(len(USER_IDS))
     for tx in transactions:
-        user_counts[tx['user_id']] += 1
-    
-    unique_users = len(user_counts)
-    avg_tx_per_user = len(transactions) / unique_users
-    max_tx_user = max(user_counts.items(), key=lambda x: x[1])
-    
-    print(f"\n[유저 통계]")
-    print(f"  고유 유저 수: {unique_users}명")
-    print(f"  인당 평균 결제: {avg_tx_per_user:.1f}건")
-    print(f"  최다 결제 유저: {max_tx_user[0]} ({max_tx_user[1]}건)")
-    
-    # 등급별
-    tier_counts = {'normal': 0, 'premium': 0, 'vip': 0}
-    tier_amounts = {'normal': 0, 'premium': 0, 'vip': 0}
-    for tx in transactions:
-        tier = tx['user_tier']
-        tier_counts[tier] += 1
-        tier_amounts[tier] += tx['amount']
-    
-    print(f"\n[등급별 통계]")
-    for tier in ['normal', 'premium', 'vip']:
-        count = tier_counts[tier]
-        avg_amt = tier_amounts[tier] / count if count > 0 else 0
-        print(f"  {tier:8}: {count:4}건, 평균 {avg_amt:>12,.0f}원")
-    
-    # 카테고리별
-    cat_counts = defaultdict(int)
-    cat_amounts = defaultdict(int)
-    for tx in transactions:
-        cat = tx['merchant_category']
-        cat_counts[cat] += 1
-        cat_amounts[cat] += tx['amount']
-    
-    print(f"\n[카테고리 TOP 5]")
-    for cat, count in sorted(cat_counts.items(), key=lambda x: -x[1])[:5]:
-        avg = cat_amounts[cat] / count
-        print(f"  {cat:15}: {count:4}건, 평균 {avg:>10,.0f}원")
-    
-    # 시간대별
-    slot_counts = defaultdict(int)
-    for tx in transactions:
-        slot_counts[tx['time_slot']] += 1
-    
-    print(f"\n[시간대별]")
-    for slot in ['dawn', 'morning', 'lunch', 'afternoon', 'evening', 'night']:
-        count = slot_counts[slot]
-        pct = count / len(transactions) * 100
-        print(f"  {slot:10}: {count:4}건 ({pct:5.1f}%)")
-    
-    # 이상거래
-    fraud_txs = [tx for tx in transactions if tx['is_suspected_fraud']]
-    print(f"\n[이상거래]")
-    print(f"  총 {len(fraud_txs)}건 ({len(fraud_txs)/len(transactions)*100:.2f}%)")
-    
-    fraud_types = defaultdict(int)
-    for tx in fraud_txs:
-        fraud_types[tx['fraud_type']] += 1
-    
-    for ftype, count in fraud_types.items():
-        print(f"    - {ftype}: {count}건")
-    
-    # Velocity 패턴 검증
-    print(f"\n[Velocity 패턴 검증]")
-    velocity_txs = [tx for tx in fraud_txs if tx['fraud_type'] == 'velocity']
-    velocity_users = set(tx['user_id'] for tx in velocity_txs)
-    for user in velocity_users:
-        user_velocity_txs = [tx for tx in velocity_txs if tx['user_id'] == user]
-        print(f"  {user}: {len(user_velocity_txs)}건 연속 결제")
+        stats.add(tx)
+    stats.report(USER_IDS)
+
+# ============================================
+# 대량 생성 (청크 단위 컬럼 출력)
+# ============================================
+
+# 건당 이상거래 패턴 비율 (generate_sample_csv 기본 10,000건 기준: velocity 2회, amount spike 3건)
+VELOCITY_PATTERN_RATE = 2 / 10000
+AMOUNT_SPIKE_RATE = 3 / 10000
+VELOCITY_HOURS = range(10, 21)  # velocity 패턴 시작 시각 (schedule_velocity_fraud 호출부와 동일)
+
+MERCHANT_NAMES = [name for cat in CATEGORIES for name in MERCHANTS[cat]['names']]
+MERCHANT_COUNT = np.array([len(MERCHANTS[cat]['names']) for cat in CATEGORIES])
+MERCHANT_OFFSET = np.concatenate([[0], np.cumsum(MERCHANT_COUNT)[:-1]])
+TIME_SLOT_BY_HOUR = np.array([TIME_SLOTS.index(get_time_slot(hour)) for hour in range(24)], dtype=np.int8)
+
+def _category_hour_probs() -> np.ndarray:
+    """P(hour | category), shape (카테고리, 24) — generate_valid_hour와 같은 분포"""
+    probs = np.zeros((len(CATEGORIES), 24))
+    for c, category in enumerate(CATEGORIES):
+        if MERCHANTS[category]['hours'] == (0, 24):
+            probs[c] = HOUR_WEIGHTS_24H
+        else:
+            probs[c, valid_hours(category)] = 1
+        probs[c] /= probs[c].sum()
+    return probs
+
+CATEGORY_PROBS = np.array(CATEGORY_WEIGHTS, dtype=np.float64) / sum(CATEGORY_WEIGHTS)
+# (hour, category) 결합 분포 → 시간 셀별 건수를 미리 배정해 시간순으로 생성
+HOUR_CATEGORY_PROBS = (CATEGORY_PROBS[:, None] * _category_hour_probs()).T
+
+# (등급, 카테고리, 구간) → 금액 구간/누적 확률 (amount_bands 표)
+AMOUNT_LOW = np.zeros((len(TIERS), len(CATEGORIES), 3), dtype=np.int64)
+AMOUNT_HIGH = np.zeros((len(TIERS), len(CATEGORIES), 3), dtype=np.int64)
+AMOUNT_CUM_PROBS = np.zeros((len(TIERS), len(CATEGORIES), 2))
+for _t, _tier in enumerate(TIERS):
+    for _c, _category in enumerate(CATEGORIES):
+        _probs, _bands = amount_bands(_tier, _category)
+        AMOUNT_CUM_PROBS[_t, _c] = _probs
+        AMOUNT_LOW[_t, _c], AMOUNT_HIGH[_t, _c] = zip(*_bands)
+
+# 출력 컬럼 (문자열 필드는 정수 코드, 코드표는 메타데이터/Parquet dictionary에 저장)
+COLUMNS = {
+    'tx_seq': np.int64,
+    'created_at': np.int64,  # epoch 초 (로컬 시각 기준, hour/day_of_week와 일치)
+    'user': np.int32,
+    'user_tier': np.int8,
+    'amount': np.int64,
+    'merchant': np.int16,
+    'merchant_category': np.int8,
+    'region': np.int8,
+    'hour': np.int8,
+    'day_of_week': np.int8,
+    'is_weekend': np.bool_,
+    'time_slot': np.int8,
+    'is_suspected_fraud': np.bool_,
+    'fraud_type': np.int8,
+}
+CODES = {
+    'user_tier': TIERS,
+    'merchant': MERCHANT_NAMES,
+    'merchant_category': CATEGORIES,
+    'region': REGIONS,
+    'time_slot': TIME_SLOTS,
+    'fraud_type': FRAUD_TYPES,
+}
+FRAUD_REASONS = ['', FraudPatternManager.VELOCITY_REASON, FraudPatternManager.AMOUNT_SPIKE_REASON]
+
+class UserTable:
+    """사용자 속성 배열 (등급/지역/카드 끝 4자리), 등급 가중치 샘플링"""
+    
+    def __init__(self, tiers: np.ndarray, regions: np.ndarray, card_suffixes: np.ndarray):
+        self.tiers = tiers.astype(np.int8)
+        self.regions = regions.astype(np.int8)
+        self.card_suffixes = card_suffixes.astype(np.int16)
+        weights = np.array([TIER_WEIGHTS[tier] for tier in TIERS], dtype=np.float64)[self.tiers]
+        self._cum_weights = np.cumsum(weights) / weights.sum()
+        self._id_width = max(5, len(str(len(tiers) - 1)))
+    
+    @classmethod
+    def default(cls):
+        """모듈 사용자 풀 (generate_sample_csv와 같은 사용자)"""
+        return cls(
+            np.array([TIERS.index(USER_TIERS[u]) for u in USER_IDS]),
+            np.array([REGIONS.index(USER_REGIONS[u]) for u in USER_IDS]),
+            np.array([int(USER_CARDS[u][-4:]) for u in USER_IDS]),
+        )
+    
+    @classmethod
+    def synthetic(cls, num_users: int, rng: np.random.Generator):
+        """같은 등급/지역 비율의 사용자 num_users명"""
+        rand = rng.random(num_users)
+        tiers = np.where(rand < 0.02, TIERS.index('vip'), np.where(rand < 0.15, TIERS.index('premium'), 0))
+        region_probs = np.array(REGION_WEIGHTS, dtype=np.float64) / sum(REGION_WEIGHTS)
+        regions = rng.choice(len(REGIONS), size=num_users, p=region_probs)
+        return cls(tiers, regions, rng.integers(1000, 10000, size=num_users))
+    
+    def __len__(self) -> int:
+        return len(self.tiers)
+    
+    def __getitem__(self, user: int) -> str:
+        return f"user_{user:0{self._id_width}d}"
+    
+    def sample(self, rng: np.random.Generator, size: int) -> np.ndarray:
+        users = np.searchsorted(self._cum_weights, rng.random(size), side='right')
+        return np.minimum(users, len(self.tiers) - 1).astype(np.int32)
+
+def generate_amounts(rng: np.random.Generator, tiers: np.ndarray, categories: np.ndarray) -> np.ndarray:
+    """generate_amount 벡터 버전"""
+    cum_probs = AMOUNT_CUM_PROBS[tiers, categories]
+    rand = rng.random(len(tiers))
+    band = (rand >= cum_probs[:, 0]).astype(np.int64) + (rand >= cum_probs[:, 1])
+    low = AMOUNT_LOW[tiers, categories, band]
+    high = AMOUNT_HIGH[tiers, categories, band]
+    amounts = rng.integers(low, high + 1)
+    return np.where(amounts >= 10000, amounts // 1000 * 1000,
+                    np.where(amounts >= 1000, amounts // 100 * 100, amounts))
+
+def plan_cells(rng: np.random.Generator, num_records: int, days: int) -> tuple:
+    """
+    (일, 시) 셀별 카테고리 건수와 velocity 패턴 수를 미리 배정
+    Returns: counts (days, 24, 카테고리), patterns (days, 24) — 합계 = num_records
+    """
+    spread = FraudPatternManager.VELOCITY_COUNT
+    num_patterns = min(rng.binomial(num_records, VELOCITY_PATTERN_RATE), num_records // spread)
+    normal = num_records - num_patterns * spread
+    
+    cell_probs = np.tile(HOUR_CATEGORY_PROBS.ravel() / days, days)
+    counts = rng.multinomial(normal, cell_probs).reshape(days, 24, len(CATEGORIES))
+    
+    pattern_cells = np.zeros((days, 24))
+    pattern_cells[:, list(VELOCITY_HOURS)] = 1
+    patterns = rng.multinomial(num_patterns, pattern_cells.ravel() / pattern_cells.sum()).reshape(days, 24)
+    return counts, patterns
+
+def generate_cell(rng: np.random.Generator, users: UserTable, category_counts: np.ndarray,
+                  patterns: int, start_ts: int, low: int, high: int) -> dict:
+    """
+    시간 셀 [start_ts + low, start_ts + high) 하나의 거래 컬럼 (created_at 순)
+    - velocity: 패턴마다 같은 사용자 VELOCITY_COUNT건을 VELOCITY_SPREAD_SECONDS초 안에 배치
+    - amount spike: AMOUNT_SPIKE_RATE 확률로 금액 × AMOUNT_SPIKE_MULTIPLIER
+    """
+    categories = np.repeat(np.arange(len(CATEGORIES), dtype=np.int8), category_counts)
+    n = len(categories)
+    user = users.sample(rng, n)
+    seconds = rng.integers(low, high, size=n)
+    fraud_type = np.zeros(n, dtype=np.int8)
+    fraud_type[rng.random(n) < AMOUNT_SPIKE_RATE] = FRAUD_TYPES.index('amount_spike')
+    
+    if patterns:
+        count = FraudPatternManager.VELOCITY_COUNT
+        spread = FraudPatternManager.VELOCITY_SPREAD_SECONDS
+        base = rng.integers(low, max(high - spread, low + 1), size=patterns)
+        categories = np.concatenate([
+            categories, np.full(patterns * count, CATEGORIES.index(FraudPatternManager.VELOCITY_CATEGORY), dtype=np.int8)
+        ])
+        user = np.concatenate([user, np.repeat(users.sample(rng, patterns), count)])
+        seconds = np.concatenate([
+            seconds, np.minimum(np.repeat(base, count) + rng.integers(0, spread + 1, size=patterns * count), high - 1)
+        ])
+        fraud_type = np.concatenate([fraud_type, np.full(patterns * count, FRAUD_TYPES.index('velocity'), dtype=np.int8)])
+    
+    tiers = users.tiers[user]
+    amounts = generate_amounts(rng, tiers, categories)
+    amounts[fraud_type == FRAUD_TYPES.index('amount_spike')] *= FraudPatternManager.AMOUNT_SPIKE_MULTIPLIER
+    merchants = MERCHANT_OFFSET[categories] + rng.integers(0, MERCHANT_COUNT[categories])
+    
+    order = np.argsort(seconds, kind='stable')
+    return {
+        'created_at': start_ts + seconds[order],
+        'user': user[order],
+        'user_tier': tiers[order],
+        'amount': amounts[order],
+        'merchant': merchants[order].astype(np.int16),
+        'merchant_category': categories[order],
+        'region': users.regions[user[order]],
+        'fraud_type': fraud_type[order],
+    }
+
+def iter_chunks(num_records: int, seed: int = 42, days: int = 7, end_date: datetime = datetime(2026, 2, 5),
+                users: UserTable = None, chunk_size: int = 1000000):
+    """
+    end_date까지 days일 구간의 거래를 시간순 청크(dict of arrays)로 생성
+    시간 셀(1시간, 건수가 chunk_size를 넘으면 초 구간으로 분할) 단위라 청크 경계를 넘어서도 시간순 유지
+    """
+    rng = np.random.default_rng(seed)
+    users = users or UserTable.default()
+    counts, patterns = plan_cells(rng, num_records, days)
+    count = FraudPatternManager.VELOCITY_COUNT
+    seq = 0
+    
+    for d in range(days):
+        day = end_date - timedelta(days=days - 1 - d)
+        day_start = int(datetime(day.year, day.month, day.day).timestamp())
+        day_of_week = day.weekday()
+        for hour in range(24):
+            cell_counts, cell_patterns = counts[d, hour], int(patterns[d, hour])
+            total = int(cell_counts.sum()) + cell_patterns * count
+            if total == 0:
+                continue
+            # 셀을 parts개 초 구간으로 나누고 카테고리별 건수도 구간별로 분배
+            parts = -(-total // chunk_size)
+            bounds = np.linspace(0, 3600, parts + 1).astype(np.int64)
+            part_counts = np.stack([rng.multinomial(c, [1 / parts] * parts) for c in cell_counts], axis=1)
+            part_patterns = rng.multinomial(cell_patterns, [1 / parts] * parts)
+            for part in range(parts):
+                chunk = generate_cell(rng, users, part_counts[part], int(part_patterns[part]),
+                                      day_start + hour * 3600, bounds[part], bounds[part + 1])
+                n = len(chunk['user'])
+                if n == 0:
+                    continue
+                chunk['tx_seq'] = np.arange(seq, seq + n, dtype=np.int64)
+                chunk['hour'] = np.full(n, hour, dtype=np.int8)
+                chunk['day_of_week'] = np.full(n, day_of_week, dtype=np.int8)
+                chunk['is_weekend'] = np.full(n, day_of_week >= 5)
+                chunk['time_slot'] = np.full(n, TIME_SLOT_BY_HOUR[hour], dtype=np.int8)
+                chunk['is_suspected_fraud'] = chunk['fraud_type'] > 0
+                seq += n
+                yield {name: chunk[name].astype(dtype, copy=False) for name, dtype in COLUMNS.items()}
+
+class NpyColumnWriter:
+    """
+    컬럼별 .npy (np.load(mmap_mode='r')로 바로 memmap) + meta.json + 사용자 표
+    전체 건수로 헤더를 먼저 쓰고 청크는 파일 끝에 이어 씀 (쓰기용 memmap을 잡지 않아 RSS 증가 없음)
+    """
+    
+    def __init__(self, path: str, num_records: int, users: UserTable):
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.num_records = num_records
+        self.position = 0
+        self.files = {}
+        for name, dtype in COLUMNS.items():
+            f = open(os.path.join(path, f"{name}.npy"), 'wb')
+            np.lib.format.write_array_header_1_0(f, {
+                'descr': np.lib.format.dtype_to_descr(np.dtype(dtype)),
+                'fortran_order': False,
+                'shape': (num_records,),
+            })
+            self.files[name] = f
+        np.save(os.path.join(path, 'users_tier.npy'), users.tiers)
+        np.save(os.path.join(path, 'users_region.npy'), users.regions)
+        np.save(os.path.join(path, 'users_card.npy'), users.card_suffixes)
+    
+    def write(self, chunk: dict):
+        for name, f in self.files.items():
+            f.write(np.ascontiguousarray(chunk[name]).tobytes())
+        self.position += len(chunk['tx_seq'])
+    
+    def close(self, meta: dict):
+        for f in self.files.values():
+            f.close()
+        self.files = {}
+        if self.position != self.num_records:
+            raise RuntimeError(f"wrote {self.position} rows, header says {self.num_records}")
+        with open(os.path.join(self.path, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False, indent=2)
+
+class ParquetColumnWriter:
+    """청크 = row group, 코드 컬럼은 dictionary 인코딩 문자열 (pyarrow 필요)"""
+    
+    def __init__(self, path: str, num_records: int, users: UserTable):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("Parquet output requires pyarrow (pip install pyarrow), or use --format npy")
+        self.pa = pa
+        self.user_ids = pa.array([users[u] for u in range(len(users))])
+        self.card_numbers = pa.array([f"4532-****-****-{suffix}" for suffix in users.card_suffixes.tolist()])
+        self.dictionaries = {name: pa.array(values) for name, values in CODES.items()}
+        self.path = path
+        self.writer = None
+        self.pq = pq
+    
+    def write(self, chunk: dict):
+        pa = self.pa
+        arrays = {
+            'tx_id': pa.array(chunk['tx_seq']),
+            'user_id': pa.DictionaryArray.from_arrays(pa.array(chunk['user']), self.user_ids),
+            'card_number': pa.DictionaryArray.from_arrays(pa.array(chunk['user']), self.card_numbers),
+        }
+        for name in COLUMNS:
+            if name in ('tx_seq', 'user'):
+                continue
+            if name in self.dictionaries:
+                arrays[name] = pa.DictionaryArray.from_arrays(pa.array(chunk[name]), self.dictionaries[name])
+            else:
+                arrays[name] = pa.array(chunk[name])
+        table = pa.table(arrays)
+        if self.writer is None:
+            self.writer = self.pq.ParquetWriter(self.path, table.schema)
+        self.writer.write_table(table)
+    
+    def close(self, meta: dict):
+        if self.writer is not None:
+            self.writer.add_key_value_metadata({'fds_meta': json.dumps(meta, ensure_ascii=False)})
+            self.writer.close()
+
+class CsvColumnWriter:
+    """generate_sample_csv와 같은 필드의 CSV (스트리밍, tx_id는 일련번호 16진수)"""
+    fieldnames = ['tx_id', 'user_id', 'user_tier', 'card_number', 'amount', 'merchant', 'merchant_category',
+                  'region', 'datetime', 'date', 'hour', 'day_of_week', 'day_name', 'is_weekend', 'time_slot',
+                  'is_suspected_fraud', 'fraud_type', 'fraud_reason']
+    
+    def __init__(self, path: str, num_records: int, users: UserTable):
+        self.users = users
+        self.file = open(path, 'w', newline='', encoding='utf-8')
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(self.fieldnames)
+    
+    def write(self, chunk: dict):
+        users = self.users
+        for seq, ts, user, tier, amount, merchant, category, region, hour, dow, weekend, slot, fraud, ftype in zip(
+            *(chunk[name].tolist() for name in COLUMNS)
+        ):
+            tx_datetime = datetime.fromtimestamp(ts)
+            self.writer.writerow([
+                f"{seq:08x}", users[user], TIERS[tier], f"4532-****-****-{users.card_suffixes[user]}", amount,
+                MERCHANT_NAMES[merchant], CATEGORIES[category], REGIONS[region],
+                tx_datetime.strftime('%Y-%m-%d %H:%M:%S'), tx_datetime.strftime('%Y-%m-%d'), hour, dow,
+                DAY_NAMES[dow], weekend, TIME_SLOTS[slot], fraud, FRAUD_TYPES[ftype] or None,
+                FRAUD_REASONS[ftype] or None
+            ])
+    
+    def close(self, meta: dict):
+        self.file.close()
+
+WRITERS = {
+    'npy': NpyColumnWriter,
+    'parquet': ParquetColumnWriter,
+    'csv': CsvColumnWriter,
+}
+
+def generate_columnar(num_records: int, output_path: str, fmt: str = 'npy', seed: int = 42, days: int = 7,
+                      end_date: datetime = datetime(2026, 2, 5), num_users: int = None,
+                      chunk_size: int = 1000000) -> TransactionStats:
+    """
+    generate_sample_csv와 같은 분포/이상거래 패턴의 대량 데이터 (시드 고정 시 재현 가능)
+    - 메모리: 청크(최대 chunk_size건) + 사용자 표만 유지
+    - 통계: 청크마다 누적 (전체 재스캔 없음)
+    """
+    if fmt not in WRITERS:
+        raise ValueError(f"Unknown format: {fmt} (available: {', '.join(WRITERS)})")
+    if num_users is None or num_users == NUM_USERS:
+        users = UserTable.default()
+    else:
+        users = UserTable.synthetic(num_users, np.random.default_rng([seed, num_users]))
+    
+    start = time.perf_counter()
+    writer = WRITERS[fmt](output_path, num_records, users)
+    stats = TransactionStats(len(users))
+    for chunk in iter_chunks(num_records, seed, days, end_date, users, chunk_size):
+        written = stats.total
+        writer.write(chunk)
+        stats.add_columns(chunk)
+        if stats.total // chunk_size > written // chunk_size or stats.total == num_records:
+            print(f"\r  {stats.total:,} / {num_records:,}건", end='', flush=True)
+    writer.close({
+        'version': 1,
+        'rows': stats.total,
+        'seed': seed,
+        'days': days,
+        'end_date': end_date.strftime('%Y-%m-%d'),
+        'num_users': len(users),
+        'columns': {name: np.dtype(dtype).str for name, dtype in COLUMNS.items()},
+        'codes': CODES,
+        'stats': stats.summary(),
+    })
+    elapsed = time.perf_counter() - start
+    print(f"\n✅ {stats.total:,}건 생성 완료: {output_path} ({elapsed:.1f}s, {stats.total / elapsed:,.0f}건/s)")
+    stats.report(users)
+    return stats
+
+def load_columns(path: str) -> tuple:
+    """generate_columnar(fmt='npy') 결과 → ({컬럼: memmap}, meta)"""
+    with open(os.path.join(path, 'meta.json'), encoding='utf-8') as f:
+        meta = json.load(f)
+    columns = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode='r') for name in meta['columns']}
+    return columns, meta
+
+def time_slice(columns: dict, start_ts: float = None, end_ts: float = None) -> dict:
+    """created_at 기준 [start_ts, end_ts) 구간 (정렬돼 있으므로 이진 탐색, 복사 없음)"""
+    created_at = columns['created_at']
+    low = 0 if start_ts is None else int(np.searchsorted(created_at, start_ts, side='left'))
+    high = len(created_at) if end_ts is None else int(np.searchsorted(created_at, end_ts, side='left'))
+    return {name: column[low:high] for name, column in columns.items()}
 
 if __name__ == "__main__":
-    os.makedirs('analysis/data', exist_ok=True)
-    generate_sample_csv(10000, 'analysis/data/sample_transactions.csv')
+    parser = argparse.ArgumentParser(description="Sample transaction generator")
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--format', choices=['csv', 'npy', 'parquet'], default='csv')
+    parser.add_argument('--output', default=None, help="default: analysis/data/sample_transactions.csv")
+    parser.add_argument('--stream', action='store_true', help="chunked generator (implied by npy/parquet)")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--days', type=int, default=7)
+    parser.add_argument('--end-date', default='2026-02-05')
+    parser.add_argument('--users', type=int, default=NUM_USERS)
+    parser.add_argument('--chunk-size', type=int, default=1000000)
+    args = parser.parse_args()
+    
+    if args.format == 'csv' and not args.stream:
+        os.makedirs('analysis/data', exist_ok=True)
+        generate_sample_csv(args.rows, args.output or 'analysis/data/sample_transactions.csv')
+    else:
+        output = args.output or f"analysis/data/sample_transactions.{'csv' if args.format == 'csv' else args.format}"
+        os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+        generate_columnar(args.rows, output, args.format, args.seed, args.days,
+                          datetime.strptime(args.end_date, '%Y-%m-%d'), args.users, args.chunk_size)
+
@@ -0,0 +1,55 @@
+"""
+가중치 샘플러 (Vose alias method)
+- 테이블 구축 O(n) 1회, 이후 샘플 1건당 O(1)
+- random.choices(weights=...)처럼 매번 누적 가중치를 다시 만들지 않음
+"""
+
+import random
+import numpy as np
+
+class AliasSampler:
+    def __init__(self, items: list, weights: list):
+        n = len(items)
+        if n == 0:
+            raise ValueError("AliasSampler requires at least one item")
+        self.items = list(items)
+        self.n = n
+        
+        total = float(sum(weights))
+        scaled = [w * n / total for w in weights]
+        prob = [0.0] * n
+        alias = list(range(n))
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        
+        while small and large:
+            small_index = small.pop()
+            large_index = large.pop()
+            prob[small_index] = scaled[small_index]
+            alias[small_index] = large_index
+            scaled[large_index] = (scaled[large_index] + scaled[small_index]) - 1.0
+            if scaled[large_index] < 1.0:
+                small.append(large_index)
+            else:
+                large.append(large_index)
+        # 부동소수 오차로 남은 항목은 확률 1
+        for i in large + small:
+            prob[i] = 1.0
+        
+        self.prob = prob
+        self.alias = alias
+        self.prob_array = np.array(prob, dtype=np.float64)
+        self.alias_array = np.array(alias, dtype=np.int64)
+    
+    def sample_index(self, rng=random) -> int:
+        i = int(rng.random() * self.n)
+        return i if rng.random() < self.prob[i] else self.alias[i]
+    
+    def sample(self, rng=random):
+        return self.items[self.sample_index(rng)]
+    
+    def sample_indices(self, size: int, np_rng: np.random.Generator) -> np.ndarray:
+        """size건을 한 번에 샘플링 (인덱스 배열)"""
+        columns = np_rng.integers(0, self.n, size=size)
+        coins = np_rng.random(size)
+        return np.where(coins < self.prob_array[columns], columns, self.alias_array[columns])
@@ -0,0 +1,102 @@
+import asyncio
+import pytest
+from loadgen import LoadProfile, ArrivalSchedule, OpenLoopRunner
+
+class FakeMetrics:
+    def __init__(self):
+        self.latencies = []
+        self.errors = 0
+    
+    def record_success(self, latency: float):
+        self.latencies.append(latency)
+    
+    def record_error(self, count: int = 1):
+        self.errors += count
+
+@pytest.mark.parametrize('spec, elapsed, expected', [
+    ('constant:500', 0, 500),
+    ('constant:500', 1e6, 500),
+    ('ramp:100:1100:10', 0, 100),
+    ('ramp:100:1100:10', 5, 600),
+    ('ramp:100:1100:10', 10, 1100),
+    ('ramp:100:1100:10', 60, 1100),
+    ('step:100:50:10:250', 0, 100),
+    ('step:100:50:10:250', 9.99, 100),
+    ('step:100:50:10:250', 10, 150),
+    ('step:100:50:10:250', 35, 250),
+    ('step:100:50:10:250', 1000, 250),
+])
+def test_profile_rate(spec, elapsed, expected):
+    assert LoadProfile.parse(spec).rate(elapsed) == pytest.approx(expected)
+
+@pytest.mark.parametrize('spec', ['constant', 'constant:1:2', 'ramp:1:2', 'step:1:2:3', 'burst:10', 'constant:fast'])
+def test_invalid_profile(spec):
+    with pytest.raises(ValueError):
+        LoadProfile.parse(spec)
+
+def test_profile_str_round_trip():
+    assert str(LoadProfile.parse('ramp:100:1100.5:10')) == 'ramp:100:1100.5:10'
+
+def test_fixed_schedule_is_evenly_spaced():
+    schedule = ArrivalSchedule(LoadProfile.parse('constant:100'), 'fixed', start=50.0)
+    times = [schedule.advance() for _ in range(1000)]
+    assert times[0] == 50.0
+    gaps = [b - a for a, b in zip(times, times[1:])]
+    assert gaps == pytest.approx([0.01] * 999)
+
+def test_ramp_schedule_follows_rate():
+    schedule = ArrivalSchedule(LoadProfile.parse('ramp:100:1100:10'), 'fixed', start=0.0)
+    times = schedule.due(20.0, 10 ** 6)
+    # ∫ rate dt = 10초 평균 600 TPS + 10초 1100 TPS
+    assert len(times) == pytest.approx(6000 + 11000, rel=0.001)
+    in_first_second = sum(1 for t in times if t < 1)
+    assert in_first_second == pytest.approx(150, rel=0.05)
+
+def test_poisson_schedule_mean_rate_and_seed():
+    profile = LoadProfile.parse('constant:1000')
+    times = ArrivalSchedule(profile, 'poisson', start=0.0, seed=7).due(10.0, 10 ** 6)
+    assert len(times) == pytest.approx(10000, rel=0.03)
+    gaps = [b - a for a, b in zip(times, times[1:])]
+    assert len(set(round(g, 9) for g in gaps)) > len(gaps) * 0.99  # 고정 간격이 아님
+    assert ArrivalSchedule(profile, 'poisson', start=0.0, seed=7).due(10.0, 10 ** 6) == times
+
+def test_due_respects_limit_and_keeps_backlog():
+    schedule = ArrivalSchedule(LoadProfile.parse('constant:1000'), 'fixed', start=0.0)
+    first = schedule.due(0.9995, 300)
+    assert len(first) == 300
+    # 밀린 전송은 버리지 않고 다음 호출에서 이어서 (보냈어야 할 시각 그대로)
+    rest = schedule.due(0.9995, 10 ** 6)
+    assert len(first) + len(rest) == 1000
+    assert rest[0] == pytest.approx(first[-1] + 0.001)
+    assert schedule.due(0.9995, 10 ** 6) == []
+
+def test_unknown_arrival():
+    with pytest.raises(ValueError, match='ARRIVAL'):
+        ArrivalSchedule(LoadProfile.parse('constant:1'), 'bursty')
+
+def test_runner_drops_when_inflight_is_full():
+    async def scenario():
+        release = asyncio.Event()
+        sent = []
+        
+        async def send_batch(intended_times):
+            sent.append(len(intended_times))
+            await release.wait()
+        
+        metrics = FakeMetrics()
+        schedule = ArrivalSchedule(LoadProfile.parse('constant:1000'), 'fixed', start=0.0)
+        runner = OpenLoopRunner(schedule, send_batch, metrics, max_batch=10, max_inflight=2)
+        runner._dispatch(schedule.due(1.0, 10))
+        runner._dispatch(schedule.due(1.0, 10))
+        runner._dispatch(schedule.due(1.0, 10))
+        await asyncio.sleep(0)
+        assert sent == [10, 10]
+        assert runner.dropped == 10 and metrics.errors == 10
+        
+        release.set()
+        await asyncio.gather(*runner.inflight)
+        assert runner.completed == 20
+        # 지연시간은 '보냈어야 할 시각'(start=0) 기준
+        assert len(metrics.latencies) == 20 and min(metrics.latencies) > 0
+    
+    asyncio.run(scenario())
@@ -0,0 +1,32 @@
+import csv
+from metrics import MetricsCollector
+
+# 기존 phase*_generator_metrics.csv 컬럼 (docs/02-phase1-baseline-results.md 분석 형식)
+BASELINE_COLUMNS = [
+    'timestamp', 'tps', 'success_count', 'error_count',
+    'error_rate', 'latency_avg_ms', 'latency_p50_ms',
+    'latency_p95_ms', 'latency_p99_ms', 'cpu_percent',
+    'memory_percent', 'queue_length'
+]
+
+def read_rows(path: str) -> list:
+    with open(path, newline='') as f:
+        return list(csv.reader(f))
+
+def test_metrics_csv_keeps_baseline_schema(tmp_path):
+    metrics = MetricsCollector(str(tmp_path), phase=9)
+    for i in range(1500):
+        metrics.record_success(0.001 * (i % 50 + 1))
+    metrics.record_error(15)
+    result = metrics.flush(queue_length=7, target_tps=1200.5)
+    
+    header, row = read_rows(tmp_path / 'phase9_generator_metrics.csv')
+    assert header == BASELINE_COLUMNS
+    assert dict(zip(header, row)) == {column: str(result[column]) for column in BASELINE_COLUMNS}
+    assert result['error_rate'] == 0.0099
+    
+    header, row = read_rows(tmp_path / 'phase9_generator_metrics_ext.csv')
+    extended = dict(zip(header, row))
+    assert extended['timestamp'] == result['timestamp']
+    assert extended['target_tps'] == '1200.5'
+    assert float(extended['latency_p999_ms']) > 0
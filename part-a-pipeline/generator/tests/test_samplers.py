@@ -0,0 +1,56 @@
+import random
+import numpy as np
+import pytest
+from samplers import AliasSampler
+
+def table_probabilities(sampler: AliasSampler) -> list:
+    # 열 i 선택(1/n) 후 prob[i]로 자기 자신, 나머지는 alias[i]
+    result = [0.0] * sampler.n
+    for i in range(sampler.n):
+        result[i] += sampler.prob[i] / sampler.n
+        result[sampler.alias[i]] += (1.0 - sampler.prob[i]) / sampler.n
+    return result
+
+@pytest.mark.parametrize('weights', [
+    [1],
+    [1, 1, 1, 1],
+    [85, 13, 2],
+    [0, 5, 0, 1],
+    [0.001, 1000, 3.5, 7, 0.25],
+])
+def test_table_reproduces_weights_exactly(weights):
+    sampler = AliasSampler(list(range(len(weights))), weights)
+    total = sum(weights)
+    assert table_probabilities(sampler) == pytest.approx([w / total for w in weights], abs=1e-12)
+
+def test_random_weights_table():
+    rng = random.Random(1)
+    weights = [rng.paretovariate(1.2) for _ in range(1000)]
+    sampler = AliasSampler(list(range(1000)), weights)
+    total = sum(weights)
+    assert table_probabilities(sampler) == pytest.approx([w / total for w in weights], abs=1e-12)
+
+def test_zero_weight_is_never_sampled():
+    sampler = AliasSampler(['a', 'b', 'c'], [0, 3, 1])
+    rng = random.Random(2)
+    assert 'a' not in {sampler.sample(rng) for _ in range(10000)}
+    indices = sampler.sample_indices(10000, np.random.default_rng(2))
+    assert 0 not in set(indices.tolist())
+
+def test_sample_frequencies():
+    weights = [85, 13, 2]
+    sampler = AliasSampler(['normal', 'premium', 'vip'], weights)
+    rng = random.Random(3)
+    counts = {'normal': 0, 'premium': 0, 'vip': 0}
+    for _ in range(100000):
+        counts[sampler.sample(rng)] += 1
+    assert counts['normal'] / 100000 == pytest.approx(0.85, abs=0.005)
+    assert counts['vip'] / 100000 == pytest.approx(0.02, abs=0.002)
+    
+    indices = sampler.sample_indices(100000, np.random.default_rng(3))
+    frequencies = np.bincount(indices, minlength=3) / 100000
+    assert frequencies == pytest.approx([0.85, 0.13, 0.02], abs=0.005)
+
+def test_empty_items_rejected():
+    with pytest.raises(ValueError):
+        AliasSampler([], [])
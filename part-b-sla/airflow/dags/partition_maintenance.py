@@ -0,0 +1,58 @@
+"""
+fds.transactions 파티션 유지보수 DAG (database/init_schema_partitioned.sql 사용 시)
+- 매시간 fds.ensure_partitions() 호출
+  → 다가올 파티션 미리 생성, 보존 기간 지난 파티션 DETACH + DROP
+- 접속 정보는 컨테이너 환경변수(.env의 POSTGRES_*) 사용
+"""
+
+import os
+import psycopg2
+from datetime import datetime, timedelta
+from airflow import DAG
+from airflow.operators.python import PythonOperator
+
+PARTITION_AHEAD = int(os.getenv('PARTITION_AHEAD', 7))
+PARTITION_RETENTION = os.getenv('PARTITION_RETENTION', '30 days')
+PARTITION_GRANULARITY = os.getenv('PARTITION_GRANULARITY', 'day')  # day | hour
+PARTITION_DROP = os.getenv('PARTITION_DROP', '1') == '1'  # 0이면 DETACH만
+
+def ensure_partitions():
+    conn = psycopg2.connect(
+        host=os.getenv('POSTGRES_HOST', 'my-postgres'),
+        port=int(os.getenv('POSTGRES_PORT', 5432)),
+        user=os.getenv('POSTGRES_USER', 'calme'),
+        password=os.getenv('POSTGRES_PASSWORD', ''),
+        dbname=os.getenv('POSTGRES_DB', 'blood_db')
+    )
+    try:
+        with conn, conn.cursor() as cur:
+            cur.execute(
+                "SELECT action, partition_name FROM fds.ensure_partitions(%s, %s::interval, %s, %s)",
+                (PARTITION_AHEAD, PARTITION_RETENTION, PARTITION_GRANULARITY, PARTITION_DROP)
+            )
+            changes = cur.fetchall()
+    finally:
+        conn.close()
+
+    for action, partition_name in changes:
+        print(f"[Partition] {action}: fds.{partition_name}")
+    if not changes:
+        print("[Partition] No changes")
+    return len(changes)
+
+with DAG(
+    dag_id='fds_partition_maintenance',
+    schedule='@hourly',
+    start_date=datetime(2024, 1, 1),
+    catchup=False,
+    max_active_runs=1,
+    default_args={
+        'retries': 2,
+        'retry_delay': timedelta(minutes=5),
+    },
+    tags=['fds', 'maintenance'],
+) as dag:
+    PythonOperator(
+        task_id='ensure_partitions',
+        python_callable=ensure_partitions,
+    )